@@ -0,0 +1,351 @@
+# bench.py - Benchmark and load-test harness for main.py
+# Drives the bio page, admin login and admin update routes either
+# in-process through the Flask test client or over a local gunicorn
+# unix socket, and reports req/s, p50/p99 latency and bytes per response.
+#
+#   python bench.py                              # in-process, print a report
+#   python bench.py --mode gunicorn --workers 4 --concurrency 8
+#   python bench.py --save bench_baseline.json   # record a baseline
+#   python bench.py --compare bench_baseline.json --threshold 0.15
+#
+# --compare exits with status 1 when any scenario's throughput drops more
+# than --threshold below the baseline. Every run works on a fresh
+# temporary data directory, so the real bio_data.json is never touched.
+
+import os
+import sys
+import json
+import time
+import socket
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+import http.client
+from urllib.parse import urlencode
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Credentials of DEFAULT_DATA in main.py; each run starts from defaults
+ADMIN_EMAIL = 'RUHIVIG@BIO.COM'
+ADMIN_PASSWORD = 'RUHIVIGQNR'
+
+# ============================================================
+# SCENARIOS
+# name, method, path, extra headers, form (callable of the request
+# number, so writes really change the document), needs admin session,
+# expected status
+# ============================================================
+SCENARIOS = [
+    ('index', 'GET', '/', {}, None, False, 200),
+    ('index_gzip', 'GET', '/', {'Accept-Encoding': 'gzip'}, None, False, 200),
+    ('index_lite', 'GET', '/', {'Save-Data': 'on'}, None, False, 200),
+    ('index_304', 'GET', '/', {'If-None-Match': None}, None, False, 304),
+    ('api_profile', 'GET', '/api/profile', {}, None, False, 200),
+    ('login_page', 'GET', '/admin/login', {}, None, False, 200),
+    ('login', 'POST', '/admin/login', {},
+     lambda i: {'email': ADMIN_EMAIL, 'password': ADMIN_PASSWORD}, False, 302),
+    ('dashboard', 'GET', '/admin/dashboard', {}, None, True, 200),
+    ('update_profile', 'POST', '/admin/update/profile', {},
+     lambda i: {'name': f'Bench {i}', 'tagline': 'benchmarking'}, True, 302),
+    ('update_bio', 'POST', '/admin/update/bio', {},
+     lambda i: {'age': str(i % 100), 'skills': 'Python, Flask, SQLite'}, True, 302),
+    ('update_socials', 'POST', '/admin/update/socials', {},
+     lambda i: {'youtube_label': f'YouTube {i}', 'youtube_url': 'https://youtube.com/@bench',
+                'youtube_enabled': 'on'}, True, 302),
+    ('update_second_dev', 'POST', '/admin/update/second_dev', {},
+     lambda i: {'enabled': 'on', 'name': f'Dev {i}'}, True, 302),
+    ('update_music', 'POST', '/admin/update/music', {},
+     lambda i: {'music_url': f'https://example.com/{i}.mp3'}, True, 302),
+    ('update_custom_css', 'POST', '/admin/update/custom_css', {},
+     lambda i: {'custom_css': f'body {{ --bench: {i}; }}'}, True, 302),
+]
+
+
+# ============================================================
+# DRIVERS
+# Both expose request(method, path, headers, body) -> (status,
+# headers, body bytes) and are safe to call from several threads.
+# ============================================================
+class InProcessDriver:
+    def __init__(self, workdir):
+        # main.py resolves its data files against the working directory
+        os.chdir(workdir)
+        sys.path.insert(0, REPO_DIR)
+        import main
+        self.main = main
+        self.app = main.app
+        self.local = threading.local()
+
+    def request(self, method, path, headers, body):
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            # Cookies are sent explicitly so every request carries the
+            # same session and flashed messages never pile up
+            client = self.local.client = self.app.test_client(use_cookies=False)
+        response = client.open(path, method=method, headers=headers, data=body)
+        return response.status_code, response.headers, response.get_data()
+
+    def close(self):
+        # Connect the counter store while still inside the work directory,
+        # otherwise the flush at exit would create it next to main.py
+        self.main.counters.flush()
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=30):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class GunicornDriver:
+    def __init__(self, workdir, workers, startup_timeout=20):
+        self.socket_path = os.path.join(workdir, 'bench.sock')
+        env = dict(os.environ, BIO_SECRET_KEY='bench-secret')
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn',
+             '--bind', f'unix:{self.socket_path}',
+             '--workers', str(workers),
+             '--chdir', workdir,
+             '--pythonpath', REPO_DIR,
+             '--log-level', 'warning',
+             'main:app'],
+            cwd=workdir, env=env,
+        )
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            if self.process.poll() is not None:
+                raise RuntimeError(f'gunicorn exited with status {self.process.returncode}')
+            try:
+                self.request('GET', '/api/profile', {}, None)
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    self.close()
+                    raise RuntimeError('gunicorn did not start in time')
+                time.sleep(0.1)
+
+    def request(self, method, path, headers, body):
+        # gunicorn's sync workers close every connection, so there is
+        # no keep-alive to reuse
+        conn = UnixHTTPConnection(self.socket_path)
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            return response.status, response.headers, response.read()
+        finally:
+            conn.close()
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+# ============================================================
+# RUNNER
+# ============================================================
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def admin_cookie(driver):
+    body = urlencode({'email': ADMIN_EMAIL, 'password': ADMIN_PASSWORD}).encode()
+    status, headers, _ = driver.request(
+        'POST', '/admin/login',
+        {'Content-Type': 'application/x-www-form-urlencoded'}, body,
+    )
+    cookie = headers.get('Set-Cookie', '')
+    if status != 302 or not cookie:
+        raise RuntimeError(f'admin login failed with status {status}')
+    return cookie.split(';', 1)[0]
+
+
+def run_scenario(driver, scenario, requests, concurrency, warmup, cookie):
+    name, method, path, headers, form, needs_admin, expected = scenario
+    headers = dict(headers)
+    if needs_admin:
+        headers['Cookie'] = cookie
+    if form is not None:
+        headers['Content-Type'] = 'application/x-www-form-urlencoded'
+    if 'If-None-Match' in headers:
+        # Revalidate against whatever the page currently is
+        _, response_headers, _ = driver.request('GET', path, {}, None)
+        headers['If-None-Match'] = response_headers.get('ETag', '')
+
+    def one(i):
+        body = urlencode(form(i)).encode() if form is not None else None
+        start = time.perf_counter()
+        status, _, payload = driver.request(method, path, headers, body)
+        return time.perf_counter() - start, status, len(payload)
+
+    for i in range(warmup):
+        one(i)
+
+    latencies = []
+    sizes = []
+    errors = []
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def worker():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            elapsed, status, size = one(warmup + i)
+            with lock:
+                latencies.append(elapsed)
+                sizes.append(size)
+                if status != expected:
+                    errors.append(status)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': requests,
+        'rps': round(requests / wall, 1) if wall else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'bytes': round(sum(sizes) / len(sizes)) if sizes else 0,
+        'errors': len(errors),
+        'unexpected_status': sorted(set(errors)),
+    }
+
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix='bio-bench-')
+    cwd = os.getcwd()
+    selected = [s for s in SCENARIOS if not args.only or s[0] in args.only]
+    try:
+        if args.mode == 'gunicorn':
+            driver = GunicornDriver(workdir, args.workers)
+        else:
+            os.environ.setdefault('BIO_SECRET_KEY', 'bench-secret')
+            driver = InProcessDriver(workdir)
+        try:
+            cookie = admin_cookie(driver)
+            results = {}
+            for scenario in selected:
+                results[scenario[0]] = run_scenario(
+                    driver, scenario, args.requests, args.concurrency, args.warmup, cookie
+                )
+                print_row(scenario[0], results[scenario[0]])
+        finally:
+            driver.close()
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        'mode': args.mode,
+        'workers': args.workers if args.mode == 'gunicorn' else None,
+        'concurrency': args.concurrency,
+        'requests': args.requests,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'results': results,
+    }
+
+
+# ============================================================
+# REPORTING
+# ============================================================
+HEADER = f"{'scenario':<20}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'bytes':>9}{'errors':>8}"
+
+
+def print_row(name, result):
+    print(f"{name:<20}{result['rps']:>10.1f}{result['p50_ms']:>10.3f}"
+          f"{result['p99_ms']:>10.3f}{result['bytes']:>9}{result['errors']:>8}", flush=True)
+
+
+def compare(report, baseline, threshold):
+    # Only throughput gates the run; latency changes are shown for context
+    print()
+    print(f"{'scenario':<20}{'base req/s':>12}{'req/s':>10}{'change':>9}{'p99 change':>12}")
+    regressions = []
+    for name, result in report['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if not base or not base.get('rps'):
+            print(f"{name:<20}{'-':>12}{result['rps']:>10.1f}{'new':>9}")
+            continue
+        change = result['rps'] / base['rps'] - 1
+        p99_change = result['p99_ms'] / base['p99_ms'] - 1 if base.get('p99_ms') else 0.0
+        flag = ''
+        if change < -threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:<20}{base['rps']:>12.1f}{result['rps']:>10.1f}"
+              f"{change:>+9.1%}{p99_change:>+12.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark main.py routes.')
+    parser.add_argument('--mode', choices=('inprocess', 'gunicorn'), default='inprocess')
+    parser.add_argument('--requests', type=int, default=500, help='measured requests per scenario')
+    parser.add_argument('--warmup', type=int, default=20, help='unmeasured requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=1, help='client threads')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    parser.add_argument('--only', nargs='+', metavar='SCENARIO',
+                        choices=[s[0] for s in SCENARIOS], help='run only these scenarios')
+    parser.add_argument('--save', metavar='FILE', help='write the results as a baseline JSON file')
+    parser.add_argument('--compare', metavar='FILE', help='baseline JSON file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help='allowed throughput drop before --compare fails (default 0.15)')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        # Read the baseline first so a typo fails before the run
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('mode') != args.mode:
+            print(f"warning: baseline was recorded in {baseline.get('mode')} mode", file=sys.stderr)
+
+    print(f"mode={args.mode} requests={args.requests} concurrency={args.concurrency}"
+          + (f" workers={args.workers}" if args.mode == 'gunicorn' else ''))
+    print(HEADER)
+    report = run(args)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\nbaseline written to {args.save}")
+
+    status = 0
+    if any(result['errors'] for result in report['results'].values()):
+        print('\nsome requests returned an unexpected status', file=sys.stderr)
+        status = 2
+    if args.compare:
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\nthroughput regressed more than {args.threshold:.0%}: {', '.join(regressions)}",
+                  file=sys.stderr)
+            status = status or 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,20 +2,191 @@
 # Complete Single-File Flask Application with Admin Panel
 
 import os
+import copy
+import io
+import gzip
+import atexit
+import re
 import json
+import math
+import time
+import shutil
 import hashlib
 import secrets
-from datetime import datetime, timedelta
+import sqlite3
+import threading
+import urllib.request
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
 from functools import wraps
+from urllib.parse import urlparse
 from flask import (
-    Flask, render_template_string, request, redirect,
-    url_for, session, flash, jsonify, make_response
+    Flask, render_template, request, redirect, g, has_request_context,
+    url_for, session, flash, jsonify, make_response, send_from_directory
 )
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SecureCookieSession, SessionInterface
+from itsdangerous import BadSignature, Signer
+from werkzeug.datastructures import Headers
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = ImageOps = None
 
 app = Flask(__name__)
-app.secret_key = secrets.token_hex(32)
 app.permanent_session_lifetime = timedelta(hours=24)
 
+# ============================================================
+# SECRET KEY & SESSIONS (multi-worker safe)
+# Every gunicorn worker must sign cookies with the same key, so the
+# key comes from BIO_SECRET_KEY or is generated once into
+# SECRET_KEY_FILE and shared. BIO_SESSION_STORE=sqlite keeps the
+# session contents server-side in a database all workers share,
+# so a logout in one worker ends the session everywhere.
+#   gunicorn -w 4 -b 0.0.0.0:5000 main:app
+# ============================================================
+SECRET_KEY_FILE = os.environ.get('BIO_SECRET_FILE', '.bio_secret_key')
+SESSION_STORE = os.environ.get('BIO_SESSION_STORE', 'cookie')
+SESSION_DB_FILE = os.environ.get('BIO_SESSION_DB', 'bio_sessions.db')
+SESSION_PURGE_INTERVAL = 600
+
+
+def load_secret_key(path=SECRET_KEY_FILE):
+    if os.environ.get('BIO_SECRET_KEY'):
+        return os.environ['BIO_SECRET_KEY']
+    for _ in range(50):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                key = f.read().strip()
+            if key:
+                return key
+        except FileNotFoundError:
+            pass
+        # Write a complete key under a private name, then link it into
+        # place: link() fails if another worker got there first
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(secrets.token_hex(32))
+        try:
+            os.link(tmp_path, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(tmp_path)
+    raise RuntimeError(f"Could not read or create secret key file {path}")
+
+
+class ServerSideSession(SecureCookieSession):
+    def __init__(self, initial=None, sid=None):
+        super().__init__(initial)
+        self.sid = sid
+        self.replaced_sid = None
+
+    def regenerate(self):
+        # Same data under a fresh sid; save_session drops the old row
+        if self.replaced_sid is None:
+            self.replaced_sid = self.sid
+        self.sid = secrets.token_urlsafe(32)
+        self.modified = True
+
+
+class SQLiteSessionInterface(SessionInterface):
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, path):
+        self.path = path
+        self.purged_at = 0.0
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "sid TEXT PRIMARY KEY, data TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _signer(self, app):
+        return Signer(app.secret_key, salt='bio-session')
+
+    def open_session(self, app, request):
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie:
+            try:
+                sid = self._signer(app).unsign(cookie).decode()
+            except BadSignature:
+                sid = None
+            if sid:
+                row = self._connect().execute(
+                    "SELECT data FROM sessions WHERE sid = ? AND expires > ?",
+                    (sid, time.time()),
+                ).fetchone()
+                if row:
+                    return ServerSideSession(self.serializer.loads(row[0]), sid=sid)
+        return ServerSideSession(sid=secrets.token_urlsafe(32))
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        conn = self._connect()
+        if session.replaced_sid is not None:
+            conn.execute("DELETE FROM sessions WHERE sid = ?", (session.replaced_sid,))
+        if not session:
+            if session.modified:
+                conn.execute("DELETE FROM sessions WHERE sid = ?", (session.sid,))
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+        if not self.should_set_cookie(app, session):
+            return
+        expires = self.get_expiration_time(app, session)
+        expires_ts = (expires.timestamp() if expires else
+                      time.time() + app.permanent_session_lifetime.total_seconds())
+        conn.execute(
+            "INSERT INTO sessions (sid, data, expires) VALUES (?, ?, ?) "
+            "ON CONFLICT(sid) DO UPDATE SET data = excluded.data, expires = excluded.expires",
+            (session.sid, self.serializer.dumps(dict(session)), expires_ts),
+        )
+        if time.monotonic() - self.purged_at > SESSION_PURGE_INTERVAL:
+            conn.execute("DELETE FROM sessions WHERE expires < ?", (time.time(),))
+            self.purged_at = time.monotonic()
+        response.set_cookie(
+            name,
+            self._signer(app).sign(session.sid).decode(),
+            expires=expires,
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+
+
+app.secret_key = load_secret_key()
+if SESSION_STORE == 'sqlite':
+    app.session_interface = SQLiteSessionInterface(SESSION_DB_FILE)
+
 # ============================================================
 # DATABASE / CONFIG FILE (JSON-based for single-file simplicity)
 # ============================================================
@@ -101,36 +272,1248 @@ DEFAULT_DATA = {
         "autoplay": False
     },
     "custom_css": "",
+    "media_cache": {},
+    "images": {},
     "visitor_count": 0,
     "created_at": str(datetime.now())
 }
 
 
-def load_data():
-    if os.path.exists(DATA_FILE):
+# ============================================================
+# STORAGE BACKENDS
+# "json" (default) keeps the whole document in DATA_FILE and
+# rewrites it atomically. "sqlite" stores one row per top-level
+# section in a WAL-mode database, so each admin form writes only
+# its own section in a transaction and readers never block.
+# Select with BIO_STORAGE=json|sqlite (BIO_DB_FILE for the path).
+#
+# Both backends also offer update(apply, expected): a read-modify-
+# write of the latest stored document that other workers cannot
+# interleave with, optionally conditional on the document still
+# being at one of the expected versions. That keeps two admins saving
+# different forms from overwriting each other's sections.
+# ============================================================
+STORAGE_BACKEND = os.environ.get('BIO_STORAGE', 'json')
+DB_FILE = os.environ.get('BIO_DB_FILE', 'bio_data.db')
+
+
+class VersionConflict(Exception):
+    def __init__(self, version):
+        super().__init__(f"document is at version {version}")
+        self.version = version
+
+
+def _mtime_datetime(seconds):
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).replace(microsecond=0)
+
+
+class JSONFileStorage:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self):
+        # The thread lock covers this process, flock() on a side file the
+        # other workers (the data file itself is replaced on every write)
+        with self.lock, open(f"{self.path}.lock", 'a') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+    def signature(self):
         try:
-            with open(DATA_FILE, 'r', encoding='utf-8') as f:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def read(self):
+        with open(self.path, 'rb') as f:
+            raw = f.read()
+        data = json.loads(raw.decode('utf-8'))
+        modified_at = _mtime_datetime(os.stat(self.path).st_mtime)
+        return data, hashlib.sha1(raw).hexdigest()[:16], modified_at
+
+    def write(self, data, sections=None):
+        # A single file can only be rewritten whole; sections is ignored
+        with self._locked():
+            return self._write(data)
+
+    def update(self, apply, expected=None):
+        with self._locked():
+            try:
+                data, version, _ = self.read()
+            except FileNotFoundError:
+                data, version = copy.deepcopy(DEFAULT_DATA), None
+            if expected is not None and version not in expected:
+                raise VersionConflict(version)
+            apply(data)
+            version, modified_at = self._write(data)
+            return data, version, modified_at
+
+    def _write(self, data):
+        raw = json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(raw)
+            f.flush()
+            os.fsync(f.fileno())
+        # Atomic rename: readers in other workers see either the old or the
+        # new file, never a half-written one, and the inode change is picked
+        # up by their next stat check.
+        os.replace(tmp_path, self.path)
+        return hashlib.sha1(raw).hexdigest()[:16], _mtime_datetime(os.stat(self.path).st_mtime)
+
+
+class SQLiteStorage:
+    def __init__(self, path, import_from=None):
+        self.path = path
+        self.import_from = import_from
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sections ("
+                "name TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta ("
+                "key TEXT PRIMARY KEY, value REAL NOT NULL)"
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+            self._import_legacy(conn)
+        return conn
+
+    def _import_legacy(self, conn):
+        # First start on SQLite: carry over an existing bio_data.json
+        if not self.import_from or not os.path.exists(self.import_from):
+            return
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'revision'").fetchone():
+            return
+        try:
+            with open(self.import_from, 'r', encoding='utf-8') as f:
                 data = json.load(f)
-            for key in DEFAULT_DATA:
-                if key not in data:
-                    data[key] = DEFAULT_DATA[key]
-            return data
-        except (json.JSONDecodeError, Exception):
-            return DEFAULT_DATA.copy()
+        except (OSError, ValueError):
+            return
+        self.write(data)
+
+    def signature(self):
+        row = self._connect().execute(
+            "SELECT value FROM meta WHERE key = 'revision'"
+        ).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _version(data):
+        raw = json.dumps(data, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        return hashlib.sha1(raw).hexdigest()[:16]
+
+    def _read(self, conn):
+        data = {name: json.loads(value) for name, value in conn.execute(
+            "SELECT name, value FROM sections"
+        )}
+        meta = dict(conn.execute("SELECT key, value FROM meta"))
+        return data, self._version(data), _mtime_datetime(meta.get('updated_at', 0))
+
+    def read(self):
+        conn = self._connect()
+        conn.execute("BEGIN")
+        try:
+            return self._read(conn)
+        finally:
+            conn.execute("COMMIT")
+
+    def _put(self, conn, data, names, now):
+        conn.executemany(
+            "INSERT INTO sections (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = excluded.value",
+            [(name, json.dumps(data[name], ensure_ascii=False)) for name in names],
+        )
+        conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('revision', 1) "
+            "ON CONFLICT(key) DO UPDATE SET value = value + 1"
+        )
+        conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('updated_at', ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (now,),
+        )
+
+    def write(self, data, sections=None):
+        names = list(data) if sections is None else list(sections)
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if sections is None:
+                conn.execute("DELETE FROM sections")
+            self._put(conn, data, names, now)
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        # Other sections may have been changed by another worker; let the
+        # next read pick up the merged document
+        return None, _mtime_datetime(now)
+
+    def update(self, apply, expected=None):
+        # The write lock is taken before reading, so the check and the
+        # write are one step for every worker
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            data, version, _ = self._read(conn)
+            if expected is not None and version not in expected:
+                raise VersionConflict(version)
+            before = copy.deepcopy(data)
+            apply(data)
+            # Only rows whose section actually changed are rewritten
+            self._put(conn, data, [name for name in data if data[name] != before.get(name)], now)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return data, self._version(data), _mtime_datetime(now)
+
+
+def make_storage(backend=STORAGE_BACKEND, directory=''):
+    data_file = os.path.join(directory, DATA_FILE)
+    if backend == 'sqlite':
+        return SQLiteStorage(os.path.join(directory, DB_FILE), import_from=data_file)
+    return JSONFileStorage(data_file)
+
+
+# ============================================================
+# DOCUMENT CACHE
+# The parsed document is kept in memory and revalidated against
+# the storage signature (file stat or SQLite revision) at most
+# every DATA_CACHE_TTL seconds, so an admin save in one gunicorn
+# worker becomes visible to every other worker within that bound.
+# ============================================================
+DATA_CACHE_TTL = float(os.environ.get('BIO_DATA_CACHE_TTL', '1.0'))
+
+
+class DocumentCache:
+    def __init__(self, storage, ttl=DATA_CACHE_TTL):
+        self.storage = storage
+        self.ttl = ttl
+        # (document, version) swapped as one tuple so readers never pair a
+        # document with another document's version
+        self.current = None
+        self.signature = None
+        self.modified_at = None
+        self.checked_at = 0.0
+        self.lock = threading.RLock()
+
+    def _reload(self, signature):
+        try:
+            data, version, modified_at = self.storage.read()
+        except (OSError, ValueError, sqlite3.Error):
+            # Keep serving the last good document if storage is unreadable
+            if self.current is not None:
+                return
+            data = copy.deepcopy(DEFAULT_DATA)
+            version, modified_at = 'default', None
+        self._set(data, version, modified_at, signature)
+
+    def _set(self, data, version, modified_at, signature):
+        for key in DEFAULT_DATA:
+            if key not in data:
+                data[key] = copy.deepcopy(DEFAULT_DATA[key])
+        self.current = (data, version)
+        self.signature = signature
+        self.modified_at = modified_at
+
+    def snapshot(self):
+        now = time.monotonic()
+        current = self.current
+        if current is not None and now - self.checked_at < self.ttl:
+            return current
+        with self.lock:
+            if self.current is not None and now - self.checked_at < self.ttl:
+                return self.current
+            signature = self.storage.signature()
+            if signature is None:
+                self.storage.write(DEFAULT_DATA)
+                signature = self.storage.signature()
+            if self.current is None or signature != self.signature:
+                self._reload(signature)
+            self.checked_at = now
+            return self.current
+
+    def get(self):
+        return self.snapshot()[0]
+
+    def store(self, data, sections=None):
+        if sections is not None:
+            values = {name: data[name] for name in sections}
+            self.update(lambda current: current.update(values))
+            return
+        with self.lock:
+            version, modified_at = self.storage.write(data, sections)
+            if version is None:
+                # Force a reload on the next access
+                self.current = None
+            else:
+                self._set(copy.deepcopy(data), version, modified_at, self.storage.signature())
+                self.checked_at = time.monotonic()
+
+    def update(self, apply, expected=None):
+        # apply(document) edits the latest stored document in place;
+        # raises VersionConflict when expected is given and stale
+        with self.lock:
+            try:
+                data, version, modified_at = self.storage.update(apply, expected)
+            except VersionConflict:
+                # Our copy is older than storage; reload on next access
+                self.current = None
+                raise
+            self._set(data, version, modified_at, self.storage.signature())
+            self.checked_at = time.monotonic()
+            return version
+
+
+# ============================================================
+# TENANTS
+# One process can serve many bio pages. With BIO_TENANTS_DIR set,
+# every subdirectory is a tenant with its own data document (and
+# so its own admin credentials), rendered pages and counters.
+# Tenants are picked by host name (BIO_TENANT_MODE=host, the
+# default) or by a /u/<name>/ path prefix (BIO_TENANT_MODE=path).
+# At most BIO_TENANT_CACHE_SIZE tenants stay loaded; the least
+# recently used are evicted and reload from disk on their next
+# request. Without BIO_TENANTS_DIR there is a single tenant backed
+# by DATA_FILE in the working directory.
+# ============================================================
+TENANTS_DIR = os.environ.get('BIO_TENANTS_DIR', '')
+TENANT_MODE = os.environ.get('BIO_TENANT_MODE', 'host')
+TENANT_CACHE_SIZE = int(os.environ.get('BIO_TENANT_CACHE_SIZE', '256'))
+TENANT_PATH_PREFIX = '/u/'
+TENANT_NAME_RE = re.compile(r'[a-z0-9][a-z0-9.-]{0,62}')
+
+
+class Tenant:
+    def __init__(self, name='', directory='', base=''):
+        self.name = name
+        self.directory = directory
+        # URL prefix of the tenant's routes ("/u/<name>" in path mode)
+        self.base = base
+        self.documents = DocumentCache(make_storage(directory=directory))
+        self.page_cache = {}
+        self.api_cache = {}
+        self.visitor_count_seeded = False
+
+    def key(self, name):
+        # Counter and sketch names are namespaced per tenant
+        return f'{self.name}/{name}' if self.name else name
+
+
+class TenantRegistry:
+    def __init__(self, root, max_size=TENANT_CACHE_SIZE):
+        self.root = root
+        self.max_size = max_size
+        self.tenants = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, name):
+        with self.lock:
+            tenant = self.tenants.get(name)
+            if tenant is not None:
+                self.tenants.move_to_end(name)
+                return tenant
+        if not TENANT_NAME_RE.fullmatch(name):
+            return None
+        directory = os.path.join(self.root, name)
+        if not os.path.isdir(directory):
+            return None
+        base = TENANT_PATH_PREFIX + name if TENANT_MODE == 'path' else ''
+        tenant = Tenant(name, directory, base)
+        with self.lock:
+            tenant = self.tenants.setdefault(name, tenant)
+            self.tenants.move_to_end(name)
+            while len(self.tenants) > self.max_size:
+                self.tenants.popitem(last=False)
+        return tenant
+
+
+default_tenant = Tenant()
+tenants = TenantRegistry(TENANTS_DIR)
+
+
+def current_tenant():
+    if not TENANTS_DIR:
+        return default_tenant
+    return g.tenant
+
+
+def get_data():
+    # Shared, read-only view of the cached document. Do not mutate.
+    return current_tenant().documents.get()
+
+
+def data_version():
+    return current_tenant().documents.snapshot()[1]
+
+
+def load_data():
+    # Private copy for callers that modify the document and save it back
+    return copy.deepcopy(current_tenant().documents.get())
+
+
+def save_data(data, sections=None):
+    # sections: top-level keys that changed; None rewrites the whole document
+    tenant = current_tenant()
+    tenant.documents.store(data, sections)
+    document_changed(tenant)
+
+
+def update_data(apply, expected=None):
+    # apply(document) edits the latest stored document in place. With
+    # expected (a set of versions), raises VersionConflict unless the
+    # document is still at one of them. Returns the new version.
+    tenant = current_tenant()
+    version = tenant.documents.update(apply, expected)
+    document_changed(tenant)
+    return version
+
+
+def document_changed(tenant):
+    tenant.page_cache.clear()
+    tenant.api_cache.clear()
+    if EXPORT_DIR:
+        export_static_site(tenant)
+
+
+# ============================================================
+# VISITOR COUNTERS (write-behind)
+# Page views are appended to an in-memory queue and merged into
+# a small SQLite table with "value = value + n" every
+# COUNTER_FLUSH_INTERVAL seconds, so the hot path never writes
+# to disk and concurrent workers never lose increments.
+# ============================================================
+COUNTER_DB_FILE = os.environ.get('BIO_COUNTER_DB', 'bio_counters.db')
+COUNTER_FLUSH_INTERVAL = float(os.environ.get('BIO_COUNTER_FLUSH_INTERVAL', '5'))
+
+
+class HyperLogLog:
+    # 2**12 one-byte registers (4 KB, ~1.6% standard error) regardless of
+    # how many visitors are added
+    P = 12
+    M = 1 << P
+
+    def __init__(self, registers=None):
+        self.registers = bytearray(registers) if registers else bytearray(self.M)
+
+    def add(self, hash64):
+        index = hash64 >> (64 - self.P)
+        rest = (hash64 << self.P) & 0xFFFFFFFFFFFFFFFF
+        rank = 64 - self.P + 1 if rest == 0 else 65 - rest.bit_length()
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, registers):
+        self.registers = bytearray(map(max, self.registers, registers))
+
+    def count(self):
+        m = self.M
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+DAILY_NAME_RE = re.compile(r':(\d{4}-\d{2}-\d{2})$')
+
+
+class CounterStore:
+    def __init__(self, path, flush_interval=COUNTER_FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.pending = deque()
+        # Only names this worker reads are loaded back from the table
+        self.watched = set()
+        self.totals = {}
+        self.sketches = {}
+        self.estimates = {}
+        self.salt = None
+        self.flushed_at = 0.0
+        self.flush_lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def _connect(self):
+        # One connection per process: gunicorn forks workers after import
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS counters ("
+                "name TEXT PRIMARY KEY, value INTEGER NOT NULL DEFAULT 0)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sketches ("
+                "name TEXT PRIMARY KEY, registers BLOB NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS settings ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL)"
+            )
+            # One salt shared by all workers, so each visitor hashes the same
+            conn.execute(
+                "INSERT OR IGNORE INTO settings (key, value) VALUES ('hash_salt', ?)",
+                (secrets.token_bytes(16),),
+            )
+            conn.commit()
+            self.salt = conn.execute(
+                "SELECT value FROM settings WHERE key = 'hash_salt'"
+            ).fetchone()[0]
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def seed(self, name, value):
+        # value() is only called when the counter has no row yet
+        with self.flush_lock:
+            conn = self._connect()
+            if conn.execute("SELECT 1 FROM counters WHERE name = ?", (name,)).fetchone():
+                return
+            with conn:
+                conn.execute(
+                    "INSERT OR IGNORE INTO counters (name, value) VALUES (?, ?)",
+                    (name, value()),
+                )
+
+    def incr(self, name, n=1):
+        # deque.append is atomic, so request threads never block here
+        self.pending.append((name, n))
+        self.maybe_flush()
+
+    def get(self, name):
+        if name not in self.watched:
+            self._watch(name)
+        self.maybe_flush()
+        return self.totals.get(name, 0)
+
+    def _watch(self, name):
+        with self.flush_lock:
+            try:
+                row = self._connect().execute(
+                    "SELECT value FROM counters WHERE name = ?", (name,)
+                ).fetchone()
+            except sqlite3.Error:
+                row = None
+            self.totals[name] = row[0] if row else 0
+            self.watched.add(name)
+
+    def observe(self, names, item):
+        # Only the salted hash touches the sketch registers; the item
+        # itself is never kept
+        if self.salt is None:
+            self._connect()
+        digest = hashlib.blake2b(item, digest_size=8, key=self.salt).digest()
+        hash64 = int.from_bytes(digest, 'big')
+        for name in names:
+            sketch = self.sketches.get(name)
+            if sketch is None:
+                sketch = self.sketches.setdefault(name, HyperLogLog())
+            sketch.add(hash64)
+        self.maybe_flush()
+
+    def estimate(self, name):
+        if name not in self.estimates:
+            self.estimates[name] = None
+            self.flushed_at = 0.0
+        self.maybe_flush()
+        return self.estimates.get(name) or 0
+
+    def maybe_flush(self):
+        if time.monotonic() - self.flushed_at < self.flush_interval:
+            return
+        if self.flush_lock.acquire(blocking=False):
+            try:
+                self._flush()
+            finally:
+                self.flush_lock.release()
+
+    def flush(self):
+        with self.flush_lock:
+            self._flush()
+
+    def _flush(self):
+        batch = {}
+        while True:
+            try:
+                name, n = self.pending.popleft()
+            except IndexError:
+                break
+            batch[name] = batch.get(name, 0) + n
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO counters (name, value) VALUES (?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                    list(batch.items()),
+                )
+            self.totals = self._read_totals(conn)
+        except sqlite3.Error:
+            # Put the batch back so the increments survive a busy database
+            for name, n in batch.items():
+                self.pending.append((name, n))
+        try:
+            self._flush_sketches(conn)
+        except sqlite3.Error:
+            pass
+        self.flushed_at = time.monotonic()
+
+    def _read_totals(self, conn):
+        names = list(self.watched)
+        totals = dict.fromkeys(names, 0)
+        for i in range(0, len(names), 500):
+            chunk = names[i:i + 500]
+            totals.update(conn.execute(
+                f"SELECT name, value FROM counters WHERE name IN ({','.join('?' * len(chunk))})",
+                chunk,
+            ))
+        return totals
+
+    def prune_daily(self, prefix, keep_after):
+        # Daily counter names end in the date, e.g. "click:github:2025-01-31"
+        with self.flush_lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "DELETE FROM counters WHERE substr(name, 1, ?) = ? "
+                    "AND name GLOB '*:[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]' "
+                    "AND substr(name, -10) < ?",
+                    (len(prefix), prefix, keep_after),
+                )
+            for name in list(self.watched):
+                match = DAILY_NAME_RE.search(name)
+                if name.startswith(prefix) and match and match.group(1) < keep_after:
+                    self.watched.discard(name)
+                    self.totals.pop(name, None)
+
+    def _flush_sketches(self, conn):
+        sketches, self.sketches = self.sketches, {}
+        if sketches:
+            try:
+                with conn:
+                    # IMMEDIATE: the read-max-write merge must not interleave
+                    # with another worker's
+                    conn.execute("BEGIN IMMEDIATE")
+                    for name, sketch in sketches.items():
+                        row = conn.execute(
+                            "SELECT registers FROM sketches WHERE name = ?", (name,)
+                        ).fetchone()
+                        if row:
+                            sketch.merge(row[0])
+                        conn.execute(
+                            "INSERT INTO sketches (name, registers) VALUES (?, ?) "
+                            "ON CONFLICT(name) DO UPDATE SET registers = excluded.registers",
+                            (name, bytes(sketch.registers)),
+                        )
+            except sqlite3.Error:
+                # Merge the registers back so the observations survive a busy
+                # database; max() makes re-merging harmless
+                for name, sketch in sketches.items():
+                    current = self.sketches.setdefault(name, sketch)
+                    if current is not sketch:
+                        current.merge(sketch.registers)
+                raise
+        for name in list(self.estimates):
+            row = conn.execute(
+                "SELECT registers FROM sketches WHERE name = ?", (name,)
+            ).fetchone()
+            self.estimates[name] = HyperLogLog(row[0]).count() if row else 0
+
+    def prune_sketches(self, prefix, keep_after):
+        # Names sort by date, e.g. "uniques:2025-01-31"
+        with self.flush_lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "DELETE FROM sketches WHERE name >= ? AND name < ?",
+                    (prefix, prefix + keep_after),
+                )
+            for name in list(self.estimates):
+                if prefix <= name < prefix + keep_after:
+                    del self.estimates[name]
+
+    def reset_sketches(self, prefix=''):
+        with self.flush_lock:
+            self.sketches = {k: v for k, v in self.sketches.items() if not k.startswith(prefix)}
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "DELETE FROM sketches WHERE substr(name, 1, ?) = ?", (len(prefix), prefix)
+                )
+            for name in self.estimates:
+                if name.startswith(prefix):
+                    self.estimates[name] = 0
+
+    def reset(self, name, value=0):
+        with self.flush_lock:
+            self._flush()
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT INTO counters (name, value) VALUES (?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET value = excluded.value",
+                    (name, value),
+                )
+            self.totals[name] = value
+            self.watched.add(name)
+
+
+counters = CounterStore(COUNTER_DB_FILE)
+atexit.register(counters.flush)
+
+
+def visitor_count_key(tenant):
+    # A tenant's counter starts from the visitor_count in its own document
+    key = tenant.key('visitor_count')
+    if not tenant.visitor_count_seeded:
+        counters.seed(key, lambda: tenant.documents.get().get('visitor_count', 0))
+        tenant.visitor_count_seeded = True
+    return key
+
+
+# ============================================================
+# RENDERED PAGE CACHE
+# The bio page only changes when an admin saves, so it is rendered
+# once per data version; a request then costs a dictionary lookup
+# and a byte write. The visitor count is fetched by the page from
+# /api/views, which keeps the HTML identical for every visitor.
+# Each tenant keeps its own cache.
+# ============================================================
+def render_bio_page(tenant, data, version, lite=False):
+    page_cache = tenant.page_cache
+    key = (version, lite)
+    body = page_cache.get(key)
+    if body is None:
+        body = render_template(
+            main_template, data=data, lite=lite, base=tenant.base
+        ).encode('utf-8')
+        # Only the current version is worth keeping
+        if any(cached_version != version for cached_version, _ in page_cache):
+            page_cache.clear()
+        page_cache[key] = body
+    return body
+
+
+# ============================================================
+# LITE VARIANT
+# Save-Data, slow connections (ECT client hint), low-memory
+# devices (Device-Memory) and ?lite=1 get a stripped-down page
+# with no loading screen, particles, video or web fonts. It is
+# rendered and cached as a separate variant; ?lite=0 forces the
+# full page.
+# ============================================================
+LITE_ECT = ('slow-2g', '2g')
+LITE_DEVICE_MEMORY = 1.0
+LITE_HINT_HEADERS = 'Save-Data, ECT, Device-Memory'
+
+
+def wants_lite_page():
+    lite = request.args.get('lite')
+    if lite is not None:
+        return lite.lower() not in ('0', 'false', 'no', '')
+    if request.headers.get('Save-Data', '').strip().lower() == 'on':
+        return True
+    if request.headers.get('ECT', '').strip().lower() in LITE_ECT:
+        return True
+    try:
+        return float(request.headers.get('Device-Memory', '')) <= LITE_DEVICE_MEMORY
+    except ValueError:
+        return False
+
+
+# ============================================================
+# JSON API CACHE
+# Public profile data for widgets and other sites, serialized once
+# per data version. The admin section is never included.
+# ============================================================
+def public_links(data):
+    return [
+        {
+            'key': key,
+            'label': link.get('label', ''),
+            'url': link.get('url', ''),
+            'icon': link.get('icon', ''),
+            'color': link.get('color', ''),
+        }
+        for key, link in data['social_links'].items()
+        if link.get('enabled')
+    ]
+
+
+API_PAYLOADS = {
+    'profile': lambda data: {
+        'profile': data['profile'],
+        'bio_info': data['bio_info'],
+        'skills': data['skills'],
+        'social_links': public_links(data),
+    },
+    'links': lambda data: {'social_links': public_links(data)},
+}
+
+
+def render_api(tenant, name, data, version):
+    api_cache = tenant.api_cache
+    key = (name, version)
+    body = api_cache.get(key)
+    if body is None:
+        body = json.dumps(API_PAYLOADS[name](data), ensure_ascii=False).encode('utf-8')
+        if any(cached_version != version for _, cached_version in api_cache):
+            api_cache.clear()
+        api_cache[key] = body
+    return body
+
+
+# ============================================================
+# HTTP CACHING
+# Strong ETag from the data version plus the template source, so
+# browsers, CDNs and reverse proxies can revalidate with a 304.
+# ============================================================
+PAGE_CACHE_CONTROL = os.environ.get(
+    'BIO_PAGE_CACHE_CONTROL', 'public, max-age=0, stale-while-revalidate=60'
+)
+
+
+def page_etag(version, lite=False):
+    etag = f"{version}-{TEMPLATE_VERSION}"
+    return etag + '-lite' if lite else etag
+
+
+def cacheable_response(body, etag, last_modified=None, cache_control=PAGE_CACHE_CONTROL,
+                       mimetype='text/html'):
+    response = app.response_class(body, mimetype=mimetype)
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = cache_control
+    # Turns the response into a 304 when If-None-Match/If-Modified-Since match
+    return response.make_conditional(request)
+
+
+# ============================================================
+# LOCAL MEDIA CACHE
+# The background video and music can be pulled into MEDIA_DIR once
+# from the admin panel. Files are named by content hash, so they are
+# served with immutable caching; the page keeps the remote URL as a
+# second <source> in case the local copy is missing.
+# ============================================================
+MEDIA_DIR = os.environ.get('BIO_MEDIA_DIR', 'media')
+MEDIA_MAX_BYTES = int(os.environ.get('BIO_MEDIA_MAX_MB', '100')) * 1024 * 1024
+MEDIA_FETCH_TIMEOUT = 30
+MEDIA_MAX_AGE = 31536000
+
+
+def fetch_media(url):
+    parsed = urlparse(url)
+    if parsed.scheme not in ('http', 'https'):
+        raise ValueError('only http(s) URLs can be cached')
+    ext = os.path.splitext(parsed.path)[1].lower()
+    if not ext.isascii() or not ext[1:].isalnum() or len(ext) > 6:
+        ext = ''
+    os.makedirs(MEDIA_DIR, exist_ok=True)
+    tmp_path = os.path.join(MEDIA_DIR, f".download.{os.getpid()}.{secrets.token_hex(4)}")
+    digest = hashlib.sha1()
+    size = 0
+    req = urllib.request.Request(url, headers={'User-Agent': 'RuhibioQNR-media-cache'})
+    try:
+        with urllib.request.urlopen(req, timeout=MEDIA_FETCH_TIMEOUT) as resp, \
+                open(tmp_path, 'wb') as f:
+            while True:
+                chunk = resp.read(64 * 1024)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > MEDIA_MAX_BYTES:
+                    raise ValueError('file is larger than the media size limit')
+                digest.update(chunk)
+                f.write(chunk)
+        filename = digest.hexdigest()[:20] + ext
+        os.replace(tmp_path, os.path.join(MEDIA_DIR, filename))
+        return filename
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+# ============================================================
+# UPLOADED IMAGES
+# Profile pictures can be uploaded from the admin panel instead of
+# linked. The original goes to MEDIA_DIR and square WebP and JPEG
+# copies are made once, at upload time, for each of IMAGE_WIDTHS
+# (1x-3x of the 100-150px avatars) up to the original's size. The
+# document maps the picture URL to its variants under "images" and
+# the page offers them through srcset. Needs Pillow.
+# ============================================================
+IMAGE_WIDTHS = (100, 150, 240, 300, 450)
+IMAGE_MAX_BYTES = int(os.environ.get('BIO_IMAGE_MAX_MB', '10')) * 1024 * 1024
+IMAGE_EXTENSIONS = {'JPEG': '.jpg', 'PNG': '.png', 'WEBP': '.webp', 'GIF': '.gif'}
+
+
+def _write_media(filename, body):
+    path = os.path.join(MEDIA_DIR, filename)
+    if not os.path.exists(path):
+        _replace_file(path, body)
+
+
+def store_image(raw):
+    if Image is None:
+        raise ValueError('image uploads need Pillow installed')
+    try:
+        image = Image.open(io.BytesIO(raw))
+        image.load()
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ValueError('not a readable image') from e
+    ext = IMAGE_EXTENSIONS.get(image.format)
+    if ext is None:
+        raise ValueError(f'{image.format} images are not supported')
+    image = ImageOps.exif_transpose(image)
+    has_alpha = image.mode in ('RGBA', 'LA') or 'transparency' in image.info
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    os.makedirs(MEDIA_DIR, exist_ok=True)
+    digest = hashlib.sha1(raw).hexdigest()[:20]
+    original = digest + ext
+    _write_media(original, raw)
+    side = min(image.size)
+    variants = {'webp': [], 'jpeg': []}
+    for width in [w for w in IMAGE_WIDTHS if w <= side] or [side]:
+        square = ImageOps.fit(image, (width, width), Image.LANCZOS)
+        out = io.BytesIO()
+        square.save(out, 'WEBP', quality=80, method=6)
+        _write_media(f'{digest}-{width}.webp', out.getvalue())
+        variants['webp'].append([width, f'{digest}-{width}.webp'])
+        if has_alpha:
+            # JPEG has no alpha channel; flatten onto white
+            background = Image.new('RGB', square.size, (255, 255, 255))
+            background.paste(square, mask=square.getchannel('A'))
+            square = background
+        out = io.BytesIO()
+        square.save(out, 'JPEG', quality=82, optimize=True, progressive=True)
+        _write_media(f'{digest}-{width}.jpg', out.getvalue())
+        variants['jpeg'].append([width, f'{digest}-{width}.jpg'])
+    return original, variants
+
+
+def image_files(data):
+    files = set()
+    for url, variants in data.get('images', {}).items():
+        files.add(url.rsplit('/', 1)[-1])
+        for entries in variants.values():
+            files.update(filename for _, filename in entries)
+    return files
+
+
+# ============================================================
+# STATIC EXPORT
+# With BIO_EXPORT_DIR set, every save_data() also writes the
+# rendered bio page (plus gzip/brotli variants) and the
+# fingerprinted assets into that directory, so nginx or any
+# static server can serve the page with no Python involved.
+# Locally cached media is copied alongside. Only /api/views (the
+# view counter beacon) and /go/ (link click redirects) still need
+# to be proxied to this app.
+# ============================================================
+EXPORT_DIR = os.environ.get('BIO_EXPORT_DIR', '')
+
+
+def _replace_file(path, body):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(body)
+    os.replace(tmp_path, path)
+
+
+def export_static_site(tenant, directory=None):
+    # Tenants export into <BIO_EXPORT_DIR>/<tenant name>/
+    directory = directory or (os.path.join(EXPORT_DIR, tenant.name) if EXPORT_DIR else '')
+    if not directory:
+        return
+    data, version = tenant.documents.snapshot()
+    body = render_bio_page(tenant, data, version)
+    try:
+        asset_dir = os.path.join(directory, 'assets')
+        # Assets first: the new page must never reference a missing file
+        for asset in assets.values():
+            write_asset_files(asset, asset_dir)
+        media_dir = os.path.join(directory, 'media')
+        for filename in set(data.get('media_cache', {}).values()) | image_files(data):
+            target = os.path.join(media_dir, filename)
+            if not os.path.exists(target):
+                os.makedirs(media_dir, exist_ok=True)
+                shutil.copyfile(os.path.join(MEDIA_DIR, filename), target + '.tmp')
+                os.replace(target + '.tmp', target)
+        variants = {'.gz': gzip.compress(body, 9, mtime=0)}
+        if brotli is not None:
+            variants['.br'] = brotli.compress(body)
+        index_path = os.path.join(directory, 'index.html')
+        for suffix, compressed in variants.items():
+            _replace_file(index_path + suffix, compressed)
+        _replace_file(index_path, body)
+    except OSError as e:
+        app.logger.warning("Static export to %s failed: %s", directory, e)
+
+
+# ============================================================
+# RESPONSE COMPRESSION (WSGI middleware)
+# HTML and JSON responses are compressed according to
+# Accept-Encoding. Responses that carry an ETag (which encodes the
+# data version) are compressed once and the bytes are reused until
+# the next admin save; the rest are compressed per request.
+# ============================================================
+COMPRESS_MIN_SIZE = 500
+COMPRESSIBLE_TYPES = ('text/html', 'application/json')
+
+
+class CompressionMiddleware:
+    def __init__(self, wsgi_app, min_size=COMPRESS_MIN_SIZE, cache_size=64):
+        self.wsgi_app = wsgi_app
+        self.min_size = min_size
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.encodings = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+    def negotiate(self, accept_encoding):
+        accepted = {}
+        for item in accept_encoding.split(','):
+            name, _, params = item.strip().partition(';')
+            q = 1.0
+            if params.strip().startswith('q='):
+                try:
+                    q = float(params.strip()[2:])
+                except ValueError:
+                    q = 0.0
+            accepted[name.strip().lower()] = q
+        for encoding in self.encodings:
+            if accepted.get(encoding, accepted.get('*', 0)) > 0:
+                return encoding
+        return None
+
+    def compress(self, body, encoding, best=False):
+        if encoding == 'br':
+            return brotli.compress(body, quality=11 if best else 5)
+        return gzip.compress(body, 9 if best else 6, mtime=0)
+
+    def cached_compress(self, key, body, encoding):
+        with self.lock:
+            compressed = self.cache.get(key)
+            if compressed is not None:
+                self.cache.move_to_end(key)
+                return compressed
+        # Spent once per data version, so use the best ratio
+        compressed = self.compress(body, encoding, best=True)
+        with self.lock:
+            self.cache[key] = compressed
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return compressed
+
+    def __call__(self, environ, start_response):
+        encoding = self.negotiate(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        revalidating = False
+        if encoding is not None:
+            # Compressed representations carry "<etag>-<encoding>"; hand the
+            # app the plain tag so its own 304 check still matches
+            inm = environ.get('HTTP_IF_NONE_MATCH', '')
+            if f'-{encoding}"' in inm:
+                environ['HTTP_IF_NONE_MATCH'] = inm.replace(f'-{encoding}"', '"')
+                revalidating = True
+
+        captured = {}
+
+        def capture(status, headers, exc_info=None):
+            captured['status'] = status
+            captured['headers'] = headers
+            captured['exc_info'] = exc_info
+            return lambda data: None
+
+        app_iter = self.wsgi_app(environ, capture)
+        status = captured['status']
+        headers = Headers(captured['headers'])
+        etag = headers.get('ETag')
+        if revalidating and etag and status.startswith('304'):
+            headers['ETag'] = etag[:-1] + f'-{encoding}"'
+
+        content_type = headers.get('Content-Type', '').split(';')[0].strip()
+        if content_type not in COMPRESSIBLE_TYPES:
+            start_response(status, headers.to_wsgi_list(), captured['exc_info'])
+            return app_iter
+        headers.add('Vary', 'Accept-Encoding')
+        if (encoding is None or not status.startswith('200')
+                or 'Content-Encoding' in headers
+                or 'no-transform' in headers.get('Cache-Control', '')):
+            start_response(status, headers.to_wsgi_list(), captured['exc_info'])
+            return app_iter
+
+        try:
+            body = b''.join(app_iter)
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+        if len(body) < self.min_size:
+            start_response(status, headers.to_wsgi_list(), captured['exc_info'])
+            return [body]
+
+        if etag:
+            key = (environ.get('HTTP_HOST', ''), environ.get('SCRIPT_NAME', ''),
+                   environ.get('PATH_INFO', ''), environ.get('QUERY_STRING', ''), etag, encoding)
+            body = self.cached_compress(key, body, encoding)
+            headers['ETag'] = etag[:-1] + f'-{encoding}"'
+        else:
+            body = self.compress(body, encoding)
+        headers['Content-Encoding'] = encoding
+        headers['Content-Length'] = str(len(body))
+        start_response(status, headers.to_wsgi_list(), captured['exc_info'])
+        return [body]
+
+
+app.wsgi_app = CompressionMiddleware(app.wsgi_app)
+
+
+# ============================================================
+# LINK CLICK TRACKING
+# /go/<key> counts a click as two queued counter increments
+# (all-time and per UTC day) and redirects; the batches reach
+# SQLite with the regular counter flush.
+# ============================================================
+CLICK_STATS_DAYS = 7
+
+
+def count_click(link_key):
+    tenant = current_tenant()
+    today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+    counters.incr(tenant.key(f'click:{link_key}'))
+    counters.incr(tenant.key(f'click:{link_key}:{today}'))
+
+
+def link_click_stats(data, days=CLICK_STATS_DAYS):
+    tenant = current_tenant()
+    today = datetime.now(timezone.utc).date()
+    day_names = [(today - timedelta(days=i)).strftime('%Y-%m-%d') for i in range(days - 1, -1, -1)]
+    # Daily rows older than the chart are never read again
+    counters.prune_daily(tenant.key('click:'), day_names[0])
+    rows = []
+    for key, link in data['social_links'].items():
+        rows.append({
+            'key': key,
+            'label': link.get('label', key),
+            'total': counters.get(tenant.key(f'click:{key}')),
+            'daily': [counters.get(tenant.key(f'click:{key}:{day}')) for day in day_names],
+        })
+    return day_names, rows
+
+
+# ============================================================
+# UNIQUE VISITORS
+# Daily and all-time unique visitors are estimated with
+# HyperLogLog sketches over a salted hash of IP + user agent:
+# fixed memory, and nothing identifying is stored per visitor.
+# The IP is REMOTE_ADDR; X-Forwarded-For is client-controlled and
+# would let anyone inflate the counts. Behind trusted reverse
+# proxies set BIO_PROXY_HOPS to their number so ProxyFix(x_for=N)
+# takes the client address from the hops they appended.
+# ============================================================
+UNIQUE_DAYS_KEPT = 30
+PROXY_HOPS = int(os.environ.get('BIO_PROXY_HOPS', '0'))
+if PROXY_HOPS:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=PROXY_HOPS)
+
+
+def count_unique_visitor():
+    ip = request.remote_addr or ''
+    agent = request.headers.get('User-Agent', '')
+    tenant = current_tenant()
+    today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+    counters.observe(
+        (tenant.key('uniques'), tenant.key(f'uniques:{today}')),
+        f'{ip}\x00{agent}'.encode(),
+    )
+
+
+def unique_visitor_stats():
+    tenant = current_tenant()
+    today = datetime.now(timezone.utc).date()
+    cutoff = (today - timedelta(days=UNIQUE_DAYS_KEPT)).strftime('%Y-%m-%d')
+    counters.prune_sketches(tenant.key('uniques:'), cutoff)
+    return {
+        'total': counters.estimate(tenant.key('uniques')),
+        'today': counters.estimate(tenant.key(f"uniques:{today.strftime('%Y-%m-%d')}")),
+    }
+
+
+# ============================================================
+# TENANT ROUTING
+# ============================================================
+TENANT_FREE_ENDPOINTS = ('serve_asset', 'serve_media', 'static')
+
+
+class TenantPathMiddleware:
+    # /u/<name>/rest -> SCRIPT_NAME=/u/<name>, PATH_INFO=/rest, so routes
+    # and url_for() work unchanged under the prefix
+    def __init__(self, wsgi_app, prefix=TENANT_PATH_PREFIX):
+        self.wsgi_app = wsgi_app
+        self.prefix = prefix
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if path.startswith(self.prefix):
+            name, _, rest = path[len(self.prefix):].partition('/')
+            environ['SCRIPT_NAME'] = environ.get('SCRIPT_NAME', '') + self.prefix + name
+            environ['PATH_INFO'] = '/' + rest
+            environ['bio.tenant'] = name
+        return self.wsgi_app(environ, start_response)
+
+
+# Outside CompressionMiddleware, so its cache key sees the tenant prefix
+if TENANTS_DIR and TENANT_MODE == 'path':
+    app.wsgi_app = TenantPathMiddleware(app.wsgi_app)
+
+
+@app.before_request
+def resolve_tenant():
+    if not TENANTS_DIR or request.endpoint in TENANT_FREE_ENDPOINTS:
+        return None
+    if TENANT_MODE == 'path':
+        name = request.environ.get('bio.tenant', '')
     else:
-        save_data(DEFAULT_DATA)
-        return DEFAULT_DATA.copy()
+        name = request.host.split(':')[0].lower()
+    tenant = tenants.get(name)
+    if tenant is None:
+        return make_response('Not Found', 404)
+    g.tenant = tenant
+    return None
 
 
-def save_data(data):
-    with open(DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+@app.context_processor
+def inject_tenant_base():
+    if has_request_context() and (not TENANTS_DIR or 'tenant' in g):
+        return {'base': current_tenant().base}
+    return {}
 
 
 def admin_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if not session.get('admin_logged_in'):
+        if (not session.get('admin_logged_in')
+                or session.get('admin_tenant', '') != current_tenant().name):
             return redirect(url_for('admin_login'))
         return f(*args, **kwargs)
     return decorated_function
@@ -142,10 +1525,57 @@ def admin_required(f):
 
 @app.route('/')
 def index():
-    data = load_data()
-    data['visitor_count'] = data.get('visitor_count', 0) + 1
-    save_data(data)
-    return render_template_string(MAIN_HTML, data=data)
+    tenant = current_tenant()
+    data, version = tenant.documents.snapshot()
+    lite = wants_lite_page()
+    response = cacheable_response(
+        render_bio_page(tenant, data, version, lite),
+        page_etag(version, lite),
+        last_modified=tenant.documents.modified_at,
+    )
+    response.vary.update(h.strip() for h in LITE_HINT_HEADERS.split(','))
+    response.headers['Accept-CH'] = 'ECT, Device-Memory'
+    return response
+
+
+@app.route('/api/profile')
+@app.route('/api/links')
+def api_profile():
+    name = request.path.rsplit('/', 1)[-1]
+    tenant = current_tenant()
+    data, version = tenant.documents.snapshot()
+    response = cacheable_response(
+        render_api(tenant, name, data, version),
+        f"{version}-{name}",
+        last_modified=tenant.documents.modified_at,
+        mimetype='application/json',
+    )
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Access-Control-Expose-Headers'] = 'ETag'
+    return response
+
+
+@app.route('/go/<link_key>')
+def go_link(link_key):
+    link = get_data()['social_links'].get(link_key)
+    if not link or not link.get('enabled') or not link.get('url'):
+        return make_response('Not Found', 404)
+    count_click(link_key)
+    response = redirect(link['url'])
+    # Every click must reach the app to be counted
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+@app.route('/api/views', methods=['GET', 'POST'])
+def api_views():
+    key = visitor_count_key(current_tenant())
+    if request.method == 'POST':
+        counters.incr(key)
+        count_unique_visitor()
+    response = jsonify(visitor_count=counters.get(key))
+    response.headers['Cache-Control'] = 'no-store'
+    return response
 
 
 @app.route('/admin/login', methods=['GET', 'POST'])
@@ -153,17 +1583,21 @@ def admin_login():
     if request.method == 'POST':
         email = request.form.get('email', '').strip()
         password = request.form.get('password', '').strip()
-        data = load_data()
+        data = get_data()
         password_hash = hashlib.sha256(password.encode()).hexdigest()
         if (email.upper() == data['admin']['email'].upper() and
                 password_hash == data['admin']['password_hash']):
+            # A sid held before login must not become the admin session
+            if isinstance(session, ServerSideSession):
+                session.regenerate()
             session.permanent = True
             session['admin_logged_in'] = True
+            session['admin_tenant'] = current_tenant().name
             flash('Welcome back, Admin! 💖', 'success')
             return redirect(url_for('admin_dashboard'))
         else:
             flash('Invalid credentials! ❌', 'error')
-    return render_template_string(ADMIN_LOGIN_HTML)
+    return render_template(admin_login_template)
 
 
 @app.route('/admin/logout')
@@ -177,8 +1611,16 @@ def admin_logout():
 @app.route('/admin/dashboard')
 @admin_required
 def admin_dashboard():
-    data = load_data()
-    return render_template_string(ADMIN_DASHBOARD_HTML, data=data)
+    data = get_data()
+    click_days, link_clicks = link_click_stats(data)
+    return render_template(
+        admin_dashboard_template,
+        data=data,
+        visitor_count=counters.get(visitor_count_key(current_tenant())),
+        uniques=unique_visitor_stats(),
+        click_days=click_days,
+        link_clicks=link_clicks,
+    )
 
 
 @app.route('/admin/update/profile', methods=['POST'])
@@ -190,7 +1632,7 @@ def update_profile():
     data['profile']['about'] = request.form.get('about', data['profile']['about'])
     data['profile']['profile_pic'] = request.form.get('profile_pic', data['profile']['profile_pic'])
     data['profile']['background_video'] = request.form.get('background_video', data['profile']['background_video'])
-    save_data(data)
+    save_data(data, sections=('profile',))
     flash('Profile updated successfully! ✅', 'success')
     return redirect(url_for('admin_dashboard'))
 
@@ -206,7 +1648,7 @@ def update_bio():
     skills_raw = request.form.get('skills', '')
     if skills_raw:
         data['skills'] = [s.strip() for s in skills_raw.split(',') if s.strip()]
-    save_data(data)
+    save_data(data, sections=('bio_info', 'skills'))
     flash('Bio info updated! ✅', 'success')
     return redirect(url_for('admin_dashboard'))
 
@@ -224,7 +1666,7 @@ def update_socials():
         if url_val is not None:
             data['social_links'][key]['url'] = url_val
         data['social_links'][key]['enabled'] = enabled == 'on'
-    save_data(data)
+    save_data(data, sections=('social_links',))
     flash('Social links updated! ✅', 'success')
     return redirect(url_for('admin_dashboard'))
 
@@ -241,7 +1683,7 @@ def update_second_dev():
     skills_raw = request.form.get('skills', '')
     if skills_raw:
         data['second_developer']['skills'] = [s.strip() for s in skills_raw.split(',') if s.strip()]
-    save_data(data)
+    save_data(data, sections=('second_developer',))
     flash('Second developer updated! ✅', 'success')
     return redirect(url_for('admin_dashboard'))
 
@@ -252,7 +1694,7 @@ def update_music():
     data = load_data()
     data['music']['url'] = request.form.get('music_url', data['music']['url'])
     data['music']['autoplay'] = request.form.get('autoplay') == 'on'
-    save_data(data)
+    save_data(data, sections=('music',))
     flash('Music settings updated! ✅', 'success')
     return redirect(url_for('admin_dashboard'))
 
@@ -273,7 +1715,7 @@ def update_password():
         flash('Password must be at least 4 characters! ❌', 'error')
     else:
         data['admin']['password_hash'] = hashlib.sha256(new_pass.encode()).hexdigest()
-        save_data(data)
+        save_data(data, sections=('admin',))
         flash('Password changed successfully! 🔐', 'success')
     return redirect(url_for('admin_dashboard'))
 
@@ -285,7 +1727,7 @@ def update_email():
     new_email = request.form.get('new_email', '').strip()
     if new_email:
         data['admin']['email'] = new_email
-        save_data(data)
+        save_data(data, sections=('admin',))
         flash(f'Admin email updated to {new_email}! ✅', 'success')
     else:
         flash('Email cannot be empty! ❌', 'error')
@@ -297,15 +1739,199 @@ def update_email():
 def update_custom_css():
     data = load_data()
     data['custom_css'] = request.form.get('custom_css', '')
-    save_data(data)
+    save_data(data, sections=('custom_css',))
     flash('Custom CSS updated! ✅', 'success')
     return redirect(url_for('admin_dashboard'))
 
 
+# ============================================================
+# ADMIN JSON API
+# GET /admin/api/document returns the editable sections with the
+# document version as a strong ETag. PATCH takes a JSON merge patch
+# (RFC 7386: objects merge, null removes a key, anything else
+# replaces) holding only the changed fields, and must send that
+# ETag in If-Match. If someone saved in between the answer is 412
+# with the current document and ETag, so the client can reapply
+# its change and retry. Only the patched sections are written.
+# ============================================================
+ADMIN_API_SECTIONS = (
+    'profile', 'bio_info', 'skills', 'social_links',
+    'second_developer', 'music', 'custom_css',
+)
+
+
+def merge_patch(target, patch):
+    if not isinstance(patch, dict):
+        return copy.deepcopy(patch)
+    result = copy.deepcopy(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = merge_patch(result.get(key), value)
+    return result
+
+
+def check_shape(value, template, path):
+    # The keys and value types the templates and form handlers rely on;
+    # extra keys are allowed
+    if type(value) is not type(template):
+        raise ValueError(f"{path} must be a {type(template).__name__}")
+    if isinstance(template, dict):
+        for key, item in template.items():
+            if key not in value:
+                raise ValueError(f"{path}.{key} is required")
+            check_shape(value[key], item, f"{path}.{key}")
+    elif isinstance(template, list) and template:
+        for i, item in enumerate(value):
+            check_shape(item, template[0], f"{path}[{i}]")
+
+
+def check_section(name, value, previous):
+    if name != 'social_links':
+        check_shape(value, DEFAULT_DATA[name], name)
+        return
+    # Link names are free-form: each link keeps the shape it had, and new
+    # links need the shape of a default one
+    check_shape(value, {}, name)
+    link_template = next(iter(DEFAULT_DATA['social_links'].values()))
+    previous = previous if isinstance(previous, dict) else {}
+    for key, link in value.items():
+        template = previous.get(key)
+        check_shape(link, template if isinstance(template, dict) else link_template, f"{name}.{key}")
+
+
+def admin_api_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if (not session.get('admin_logged_in')
+                or session.get('admin_tenant', '') != current_tenant().name):
+            return jsonify(error='login required'), 401
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def admin_document_response(status=200):
+    data, version = current_tenant().documents.snapshot()
+    response = jsonify({name: data[name] for name in ADMIN_API_SECTIONS})
+    response.status_code = status
+    response.set_etag(version)
+    # no-transform keeps CompressionMiddleware from suffixing the ETag,
+    # so clients can echo it back in If-Match unchanged
+    response.headers['Cache-Control'] = 'no-store, no-transform'
+    return response
+
+
+@app.route('/admin/api/document', methods=['GET', 'PATCH'])
+@admin_api_required
+def admin_api_document():
+    if request.method == 'GET':
+        return admin_document_response()
+
+    if not request.if_match:
+        return jsonify(error='If-Match header required'), 428
+    patch = request.get_json(silent=True)
+    if not isinstance(patch, dict) or not patch:
+        return jsonify(error='Body must be a non-empty JSON object'), 400
+    unknown = sorted(set(patch) - set(ADMIN_API_SECTIONS))
+    if unknown:
+        return jsonify(error=f"Not editable: {', '.join(unknown)}"), 400
+
+    def apply(document):
+        for name, value in patch.items():
+            merged = merge_patch(document.get(name), value)
+            check_section(name, merged, document.get(name))
+            document[name] = merged
+
+    expected = None if request.if_match.star_tag else request.if_match.as_set()
+    try:
+        update_data(apply, expected)
+    except VersionConflict:
+        return admin_document_response(412)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    return admin_document_response()
+
+
+@app.route('/admin/media', methods=['POST'])
+@admin_required
+def update_media_cache():
+    data = load_data()
+    if request.form.get('action') == 'clear':
+        data['media_cache'] = {}
+        save_data(data, sections=('media_cache',))
+        flash('Media now served from the original URLs! 🌐', 'success')
+        return redirect(url_for('admin_dashboard'))
+    media_cache = {}
+    for url in (data['profile']['background_video'], data['music']['url']):
+        if not url:
+            continue
+        try:
+            media_cache[url] = fetch_media(url)
+        except (OSError, ValueError) as e:
+            flash(f'Could not cache {url}: {e} ❌', 'error')
+    data['media_cache'] = media_cache
+    save_data(data, sections=('media_cache',))
+    if media_cache:
+        flash(f'{len(media_cache)} media file(s) cached locally! 💾', 'success')
+    return redirect(url_for('admin_dashboard'))
+
+
+@app.route('/admin/upload/image', methods=['POST'])
+@admin_required
+def upload_image():
+    # Refuse oversized uploads before the form is parsed and spooled to disk
+    request.max_content_length = IMAGE_MAX_BYTES + 64 * 1024
+    try:
+        if (request.content_length or 0) > request.max_content_length:
+            raise RequestEntityTooLarge()
+        section = {'profile': 'profile', 'second_dev': 'second_developer'}.get(request.form.get('target'))
+        upload = request.files.get('image')
+    except RequestEntityTooLarge:
+        flash(f'Image is larger than {IMAGE_MAX_BYTES // (1024 * 1024)} MB! ❌', 'error')
+        return redirect(url_for('admin_dashboard'))
+    if section is None or upload is None or not upload.filename:
+        flash('Choose an image to upload! ❌', 'error')
+        return redirect(url_for('admin_dashboard'))
+    try:
+        original, variants = store_image(upload.read())
+    except (OSError, ValueError) as e:
+        flash(f'Could not use that image: {e} ❌', 'error')
+        return redirect(url_for('admin_dashboard'))
+    url = f'/media/{original}'
+
+    def apply(document):
+        document[section]['profile_pic'] = url
+        # Keep variants only for pictures that are still in use
+        in_use = {document['profile']['profile_pic'], document['second_developer']['profile_pic']}
+        images = {u: v for u, v in document.get('images', {}).items() if u in in_use}
+        images[url] = variants
+        document['images'] = images
+
+    update_data(apply)
+    flash('Profile picture uploaded! 🖼️', 'success')
+    return redirect(url_for('admin_dashboard'))
+
+
+@app.route('/media/<filename>')
+def serve_media(filename):
+    # Werkzeug answers Range requests with 206 and hands the open file to
+    # the server's wsgi.file_wrapper (sendfile under gunicorn)
+    response = send_from_directory(
+        os.path.abspath(MEDIA_DIR), filename, conditional=True, max_age=MEDIA_MAX_AGE
+    )
+    # Names are content hashes, so a cached copy never goes stale
+    response.headers['Cache-Control'] = ASSET_CACHE_CONTROL
+    return response
+
+
 @app.route('/admin/reset', methods=['POST'])
 @admin_required
 def reset_data():
-    save_data(DEFAULT_DATA.copy())
+    save_data(copy.deepcopy(DEFAULT_DATA))
+    tenant = current_tenant()
+    counters.reset(tenant.key('visitor_count'))
+    counters.reset_sketches(tenant.key('uniques'))
     flash('All data reset to defaults! 🔄', 'success')
     return redirect(url_for('admin_dashboard'))
 
@@ -314,17 +1940,7 @@ def reset_data():
 # MAIN BIO PAGE HTML
 # ============================================================
 
-MAIN_HTML = r'''
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0, maximum-scale=1.0, user-scalable=no">
-    <title>{{ data.profile.name }} | Bio Link</title>
-    <link rel="preconnect" href="https://fonts.googleapis.com">
-    <link href="https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;500;600;700;800;900&family=Orbitron:wght@400;700;900&display=swap" rel="stylesheet">
-    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.0/css/all.min.css">
-    <style>
+MAIN_CSS = r'''
         /* ======== RESET & ROOT ======== */
         * { margin:0; padding:0; box-sizing:border-box; }
         :root {
@@ -465,6 +2081,20 @@ MAIN_HTML = r'''
             100%{transform:scale(0) rotate(180deg) translateY(-50px);opacity:0}
         }
 
+        /* ======== LITE VARIANT ======== */
+        body.lite .main-content { opacity:1; transform:none; animation:none; }
+        /* No icon font on lite pages: text glyphs stand in for the icons */
+        body.lite i[class*="fa-"] { font-style:normal; font-weight:700; line-height:1; }
+        body.lite .fa-music::before { content:'\266A'; }
+        body.lite .fa-pause::before { content:'\275A\275A'; }
+        body.lite .fa-heart::before { content:'\2665'; }
+        body.lite .fa-info-circle::before { content:'i'; }
+        body.lite .fa-code::before { content:'</>'; }
+        body.lite .fa-link::before { content:'#'; }
+        body.lite .fa-arrow-right::before { content:'\2192'; }
+        body.lite .fa-telegram::before { content:'\2708'; }
+        body.lite i[data-initial]::before { content:attr(data-initial); }
+
         /* ======== MAIN CONTENT ======== */
         .main-content {
             position:relative; z-index:10;
@@ -807,50 +2437,212 @@ MAIN_HTML = r'''
             .profile-pic-ring { width: 136px; height: 136px; }
             .profile-pic-ring-inner { width: 128px; height: 128px; }
         }
+'''
 
-        /* ======== CUSTOM CSS INJECTION ======== */
-        {{ data.custom_css }}
-    </style>
-</head>
-<body>
-
-<!-- ======== LOADING SCREEN ======== -->
-<div id="loading-screen">
-    <div class="loading-hearts" id="loadingHearts"></div>
-    <div class="loading-title">SYSTEM ACCESS</div>
-    <div class="loading-bar-container">
-        <div class="loading-bar"></div>
-    </div>
-    <div class="loading-text">INITIALIZING PROFILE...</div>
-    <div class="loading-percent" id="loadPercent">0%</div>
-</div>
-
-<!-- ======== BACKGROUND VIDEO ======== -->
-<div class="bg-video-container">
-    <!-- REPLACE THIS VIDEO URL WITH YOUR OWN -->
-    <video autoplay muted loop playsinline>
-        <source src="{{ data.profile.background_video }}" type="video/mp4">
-    </video>
-</div>
-<div class="bg-overlay"></div>
+MAIN_JS = r'''
+    // ======== LOADING SCREEN ========
+    (function() {
+        const loadPercent = document.getElementById('loadPercent');
+        const heartsContainer = document.getElementById('loadingHearts');
+        if(!loadPercent) return;
+        let percent = 0;
+        const hearts = ['💖','💗','💕','✨','🌸','💝','💞','🎀'];
+        for(let i=0;i<20;i++){
+            const h = document.createElement('div');
+            h.className='loading-heart';
+            h.textContent=hearts[Math.floor(Math.random()*hearts.length)];
+            h.style.left=Math.random()*100+'%';
+            h.style.animationDelay=Math.random()*3+'s';
+            h.style.animationDuration=(2+Math.random()*3)+'s';
+            heartsContainer.appendChild(h);
+        }
+        const interval = setInterval(()=>{
+            percent += Math.floor(Math.random()*8)+1;
+            if(percent>100) percent=100;
+            loadPercent.textContent = percent+'%';
+            if(percent>=100){
+                clearInterval(interval);
+                setTimeout(()=>{
+                    document.getElementById('loading-screen').classList.add('hidden');
+                },600);
+            }
+        },80);
+    })();
 
-<!-- ======== FLOATING PARTICLES ======== -->
-<div class="particles-container" id="particles"></div>
+    // ======== FLOATING PARTICLES ========
+    (function(){
+        const container=document.getElementById('particles');
+        if(!container) return;
+        const items=['💖','💗','✨','🌸','💕','⭐','💝','🎀','🦋','💞'];
+        for(let i=0;i<25;i++){
+            const p=document.createElement('div');
+            p.className='particle';
+            p.textContent=items[Math.floor(Math.random()*items.length)];
+            p.style.left=Math.random()*100+'%';
+            p.style.fontSize=(0.6+Math.random()*1.2)+'rem';
+            p.style.animationDuration=(8+Math.random()*15)+'s';
+            p.style.animationDelay=Math.random()*10+'s';
+            container.appendChild(p);
+        }
+    })();
 
-<!-- ======== TOAST CONTAINER ======== -->
-<div class="toast-container" id="toastContainer"></div>
+    // ======== SPARKLE CURSOR TRAIL ========
+    let lastSparkle=0;
+    const liteMode=document.body.classList.contains('lite');
+    document.addEventListener('mousemove',function(e){
+        if(liteMode||Date.now()-lastSparkle<60) return;
+        lastSparkle=Date.now();
+        createSparkle(e.clientX,e.clientY);
+    });
+    document.addEventListener('touchmove',function(e){
+        if(liteMode||Date.now()-lastSparkle<80) return;
+        lastSparkle=Date.now();
+        const t=e.touches[0];
+        createSparkle(t.clientX,t.clientY);
+    },{passive:true});
 
-<!-- ======== MAIN CONTENT ======== -->
-<div class="main-content" id="mainContent">
+    function createSparkle(x,y){
+        const s=document.createElement('div');
+        s.className='sparkle';
+        const items=['✨','💖','⭐','💗','🌸'];
+        s.textContent=items[Math.floor(Math.random()*items.length)];
+        s.style.left=x+'px';
+        s.style.top=y+'px';
+        document.body.appendChild(s);
+        setTimeout(()=>s.remove(),1000);
+    }
 
-    <!-- PROFILE SECTION -->
-    <div class="glass-card profile-section">
-        <div class="profile-pic-wrapper">
-            <div class="profile-pic-ring"></div>
+    // ======== TOAST NOTIFICATIONS ========
+    function showToast(msg){
+        const c=document.getElementById('toastContainer');
+        const t=document.createElement('div');
+        t.className='toast';
+        t.innerHTML='<span>💖</span> <span>'+msg+'</span>';
+        c.appendChild(t);
+        setTimeout(()=>t.remove(),3000);
+    }
+
+    // ======== MUSIC TOGGLE ========
+    let musicPlaying=false;
+    function toggleMusic(){
+        const audio=document.getElementById('bgMusic');
+        const btn=document.getElementById('musicBtn');
+        const icon=document.getElementById('musicIcon');
+        if(musicPlaying){
+            audio.pause();
+            btn.classList.remove('playing');
+            icon.className='fas fa-music';
+            showToast('Music paused 🎵');
+        } else {
+            audio.play().then(()=>{
+                btn.classList.add('playing');
+                icon.className='fas fa-pause';
+                showToast('Now playing music 🎶');
+            }).catch(()=>{
+                showToast('Click again to play music 🎵');
+            });
+        }
+        musicPlaying=!musicPlaying;
+    }
+
+    // ======== VISITOR COUNT (kept out of the HTML so the page stays cacheable) ========
+    fetch(document.body.dataset.base+'/api/views',{method:'POST'}).then(r=>r.json()).then(d=>{
+        document.getElementById('visitorCount').textContent=d.visitor_count;
+    }).catch(()=>{});
+
+    // ======== SECOND DEVELOPER TOGGLE ========
+    function toggleSecondDev(){
+        const s=document.getElementById('secondDevSection');
+        if(s){
+            s.classList.toggle('active');
+            if(s.classList.contains('active')){
+                showToast('Second developer revealed! 🌟');
+                s.scrollIntoView({behavior:'smooth',block:'start'});
+            }
+        }
+    }
+'''
+
+MAIN_HTML = r'''
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0, maximum-scale=1.0, user-scalable=no">
+    <title>{{ data.profile.name }} | Bio Link</title>
+    {% if not lite %}
+    <link rel="preconnect" href="https://fonts.googleapis.com">
+    <link href="https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;500;600;700;800;900&family=Orbitron:wght@400;700;900&display=swap" rel="stylesheet">
+    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.0/css/all.min.css">
+    {% endif %}
+    <link rel="stylesheet" href="{{ asset_url('main.css') }}">
+    {% if data.custom_css %}
+    <style>
+        /* ======== CUSTOM CSS INJECTION ======== */
+        {{ data.custom_css }}
+    </style>
+    {% endif %}
+</head>
+<body{% if lite %} class="lite"{% endif %} data-base="{{ base }}">
+
+{% if not lite %}
+<!-- ======== LOADING SCREEN ======== -->
+<div id="loading-screen">
+    <div class="loading-hearts" id="loadingHearts"></div>
+    <div class="loading-title">SYSTEM ACCESS</div>
+    <div class="loading-bar-container">
+        <div class="loading-bar"></div>
+    </div>
+    <div class="loading-text">INITIALIZING PROFILE...</div>
+    <div class="loading-percent" id="loadPercent">0%</div>
+</div>
+
+<!-- ======== BACKGROUND VIDEO ======== -->
+<div class="bg-video-container">
+    <!-- REPLACE THIS VIDEO URL WITH YOUR OWN -->
+    <video autoplay muted loop playsinline>
+        {% set local_video = data.media_cache.get(data.profile.background_video) %}
+        {% if local_video %}
+        <source src="/media/{{ local_video }}" type="video/mp4">
+        {% endif %}
+        <source src="{{ data.profile.background_video }}" type="video/mp4">
+    </video>
+</div>
+<div class="bg-overlay"></div>
+
+<!-- ======== FLOATING PARTICLES ======== -->
+<div class="particles-container" id="particles"></div>
+{% endif %}
+
+<!-- ======== TOAST CONTAINER ======== -->
+<div class="toast-container" id="toastContainer"></div>
+
+<!-- ======== MAIN CONTENT ======== -->
+{% macro picture(url, alt, sizes, attrs) -%}
+{%- set variants = data.images.get(url) -%}
+{%- if variants -%}
+<picture>
+    <source type="image/webp" sizes="{{ sizes }}"
+            srcset="{% for width, file in variants.webp %}/media/{{ file }} {{ width }}w{{ ', ' if not loop.last }}{% endfor %}">
+    <img src="/media/{{ (variants.jpeg[:2]|last)[1] }}" alt="{{ alt }}" sizes="{{ sizes }}"
+         srcset="{% for width, file in variants.jpeg %}/media/{{ file }} {{ width }}w{{ ', ' if not loop.last }}{% endfor %}"
+         decoding="async" {{ attrs|safe }}>
+</picture>
+{%- else -%}
+<img src="{{ url }}" alt="{{ alt }}" {{ attrs|safe }}>
+{%- endif -%}
+{%- endmacro %}
+<div class="main-content" id="mainContent">
+
+    <!-- PROFILE SECTION -->
+    <div class="glass-card profile-section">
+        <div class="profile-pic-wrapper">
+            <div class="profile-pic-ring"></div>
             <div class="profile-pic-ring-inner"></div>
             <!-- REPLACE THIS PROFILE PICTURE URL -->
-            <img src="{{ data.profile.profile_pic }}" alt="Profile" class="profile-pic"
-                 onerror="this.src='data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iMTUwIiBoZWlnaHQ9IjE1MCIgeG1sbnM9Imh0dHA6Ly93d3cudzMub3JnLzIwMDAvc3ZnIj48Y2lyY2xlIGN4PSI3NSIgY3k9Ijc1IiByPSI3NSIgZmlsbD0iIzMzMCIvPjx0ZXh0IHg9Ijc1IiB5PSI4NSIgZm9udC1zaXplPSI0MCIgZmlsbD0iI2ZmMTQ5MyIgdGV4dC1hbmNob3I9Im1pZGRsZSIgZm9udC1mYW1pbHk9IkFyaWFsIj7wn4y4PC90ZXh0Pjwvc3ZnPg=='">
+            {{ picture(data.profile.profile_pic, 'Profile', '(max-width: 480px) 120px, 150px',
+                       'class="profile-pic" width="150" height="150"
+                 onerror="this.src=\'data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iMTUwIiBoZWlnaHQ9IjE1MCIgeG1sbnM9Imh0dHA6Ly93d3cudzMub3JnLzIwMDAvc3ZnIj48Y2lyY2xlIGN4PSI3NSIgY3k9Ijc1IiByPSI3NSIgZmlsbD0iIzMzMCIvPjx0ZXh0IHg9Ijc1IiB5PSI4NSIgZm9udC1zaXplPSI0MCIgZmlsbD0iI2ZmMTQ5MyIgdGV4dC1hbmNob3I9Im1pZGRsZSIgZm9udC1mYW1pbHk9IkFyaWFsIj7wn4y4PC90ZXh0Pjwvc3ZnPg==\'"') }}
         </div>
         <h1 class="profile-name">{{ data.profile.name }}</h1>
         <p class="profile-tagline">{{ data.profile.tagline }}</p>
@@ -918,10 +2710,10 @@ MAIN_HTML = r'''
         <div class="section-title"><i class="fas fa-link"></i> CONNECT</div>
         {% for key, link in data.social_links.items() %}
         {% if link.enabled %}
-        <a href="{{ link.url }}" target="_blank" rel="noopener" class="social-btn"
+        <a href="{{ base }}/go/{{ key }}" target="_blank" rel="noopener" class="social-btn"
            onclick="showToast('Opening {{ link.label }}... 💖')">
             <div class="icon" style="background:{{ link.color }}22;color:{{ link.color }}">
-                <i class="{{ link.icon }}"></i>
+                <i class="{{ link.icon }}" data-initial="{{ link.label[:1] }}"></i>
             </div>
             <span>{{ link.label }}</span>
             <span class="arrow"><i class="fas fa-arrow-right"></i></span>
@@ -942,9 +2734,9 @@ MAIN_HTML = r'''
         <div class="glass-card profile-section">
             <div class="profile-pic-wrapper" style="width:100px;height:100px;">
                 <div class="profile-pic-ring" style="width:116px;height:116px;"></div>
-                <img src="{{ data.second_developer.profile_pic }}" alt="Dev 2"
-                     class="profile-pic" style="width:100px;height:100px;"
-                     onerror="this.src='data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iMTAwIiBoZWlnaHQ9IjEwMCIgeG1sbnM9Imh0dHA6Ly93d3cudzMub3JnLzIwMDAvc3ZnIj48Y2lyY2xlIGN4PSI1MCIgY3k9IjUwIiByPSI1MCIgZmlsbD0iIzMzMCIvPjx0ZXh0IHg9IjUwIiB5PSI2MCIgZm9udC1zaXplPSIzMCIgZmlsbD0iI2ZmMTQ5MyIgdGV4dC1hbmNob3I9Im1pZGRsZSI+8J+SqzwvdGV4dD48L3N2Zz4='">
+                {{ picture(data.second_developer.profile_pic, 'Dev 2', '100px',
+                           'class="profile-pic" style="width:100px;height:100px;" width="100" height="100" loading="lazy"
+                     onerror="this.src=\'data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iMTAwIiBoZWlnaHQ9IjEwMCIgeG1sbnM9Imh0dHA6Ly93d3cudzMub3JnLzIwMDAvc3ZnIj48Y2lyY2xlIGN4PSI1MCIgY3k9IjUwIiByPSI1MCIgZmlsbD0iIzMzMCIvPjx0ZXh0IHg9IjUwIiB5PSI2MCIgZm9udC1zaXplPSIzMCIgZmlsbD0iI2ZmMTQ5MyIgdGV4dC1hbmNob3I9Im1pZGRsZSI+8J+SqzwvdGV4dD48L3N2Zz4=\'"') }}
             </div>
             <h2 class="profile-name" style="font-size:1.2rem;">{{ data.second_developer.name }}</h2>
             <p class="about-text" style="margin-top:10px;">{{ data.second_developer.about }}</p>
@@ -965,7 +2757,7 @@ MAIN_HTML = r'''
 
     <!-- VISITOR COUNTER -->
     <div class="visitor-counter">
-        👁 TOTAL VIEWS: <span>{{ data.visitor_count }}</span>
+        👁 TOTAL VIEWS: <span id="visitorCount">…</span>
     </div>
 
     <!-- FOOTER -->
@@ -980,127 +2772,18 @@ MAIN_HTML = r'''
     <i class="fas fa-music" id="musicIcon"></i>
 </button>
 <!-- REPLACE THIS MUSIC URL WITH YOUR OWN MP3 -->
-<audio id="bgMusic" loop preload="auto">
+<audio id="bgMusic" loop preload="{{ 'none' if lite else 'auto' }}">
+    {% set local_music = data.media_cache.get(data.music.url) %}
+    {% if local_music %}
+    <source src="/media/{{ local_music }}" type="audio/mpeg">
+    {% endif %}
     <source src="{{ data.music.url }}" type="audio/mpeg">
 </audio>
 
+<script src="{{ asset_url('main.js') }}"></script>
+{% if data.music.autoplay %}
 <script>
-    // ======== LOADING SCREEN ========
-    (function() {
-        const loadPercent = document.getElementById('loadPercent');
-        const heartsContainer = document.getElementById('loadingHearts');
-        let percent = 0;
-        const hearts = ['💖','💗','💕','✨','🌸','💝','💞','🎀'];
-        for(let i=0;i<20;i++){
-            const h = document.createElement('div');
-            h.className='loading-heart';
-            h.textContent=hearts[Math.floor(Math.random()*hearts.length)];
-            h.style.left=Math.random()*100+'%';
-            h.style.animationDelay=Math.random()*3+'s';
-            h.style.animationDuration=(2+Math.random()*3)+'s';
-            heartsContainer.appendChild(h);
-        }
-        const interval = setInterval(()=>{
-            percent += Math.floor(Math.random()*8)+1;
-            if(percent>100) percent=100;
-            loadPercent.textContent = percent+'%';
-            if(percent>=100){
-                clearInterval(interval);
-                setTimeout(()=>{
-                    document.getElementById('loading-screen').classList.add('hidden');
-                },600);
-            }
-        },80);
-    })();
-
-    // ======== FLOATING PARTICLES ========
-    (function(){
-        const container=document.getElementById('particles');
-        const items=['💖','💗','✨','🌸','💕','⭐','💝','🎀','🦋','💞'];
-        for(let i=0;i<25;i++){
-            const p=document.createElement('div');
-            p.className='particle';
-            p.textContent=items[Math.floor(Math.random()*items.length)];
-            p.style.left=Math.random()*100+'%';
-            p.style.fontSize=(0.6+Math.random()*1.2)+'rem';
-            p.style.animationDuration=(8+Math.random()*15)+'s';
-            p.style.animationDelay=Math.random()*10+'s';
-            container.appendChild(p);
-        }
-    })();
-
-    // ======== SPARKLE CURSOR TRAIL ========
-    let lastSparkle=0;
-    document.addEventListener('mousemove',function(e){
-        if(Date.now()-lastSparkle<60) return;
-        lastSparkle=Date.now();
-        createSparkle(e.clientX,e.clientY);
-    });
-    document.addEventListener('touchmove',function(e){
-        if(Date.now()-lastSparkle<80) return;
-        lastSparkle=Date.now();
-        const t=e.touches[0];
-        createSparkle(t.clientX,t.clientY);
-    },{passive:true});
-
-    function createSparkle(x,y){
-        const s=document.createElement('div');
-        s.className='sparkle';
-        const items=['✨','💖','⭐','💗','🌸'];
-        s.textContent=items[Math.floor(Math.random()*items.length)];
-        s.style.left=x+'px';
-        s.style.top=y+'px';
-        document.body.appendChild(s);
-        setTimeout(()=>s.remove(),1000);
-    }
-
-    // ======== TOAST NOTIFICATIONS ========
-    function showToast(msg){
-        const c=document.getElementById('toastContainer');
-        const t=document.createElement('div');
-        t.className='toast';
-        t.innerHTML='<span>💖</span> <span>'+msg+'</span>';
-        c.appendChild(t);
-        setTimeout(()=>t.remove(),3000);
-    }
-
-    // ======== MUSIC TOGGLE ========
-    let musicPlaying=false;
-    function toggleMusic(){
-        const audio=document.getElementById('bgMusic');
-        const btn=document.getElementById('musicBtn');
-        const icon=document.getElementById('musicIcon');
-        if(musicPlaying){
-            audio.pause();
-            btn.classList.remove('playing');
-            icon.className='fas fa-music';
-            showToast('Music paused 🎵');
-        } else {
-            audio.play().then(()=>{
-                btn.classList.add('playing');
-                icon.className='fas fa-pause';
-                showToast('Now playing music 🎶');
-            }).catch(()=>{
-                showToast('Click again to play music 🎵');
-            });
-        }
-        musicPlaying=!musicPlaying;
-    }
-
-    // ======== SECOND DEVELOPER TOGGLE ========
-    function toggleSecondDev(){
-        const s=document.getElementById('secondDevSection');
-        if(s){
-            s.classList.toggle('active');
-            if(s.classList.contains('active')){
-                showToast('Second developer revealed! 🌟');
-                s.scrollIntoView({behavior:'smooth',block:'start'});
-            }
-        }
-    }
-
     // ======== AUTO MUSIC (if enabled) ========
-    {% if data.music.autoplay %}
     document.addEventListener('click',function autoPlay(){
         document.getElementById('bgMusic').play().then(()=>{
             document.getElementById('musicBtn').classList.add('playing');
@@ -1109,8 +2792,8 @@ MAIN_HTML = r'''
         }).catch(()=>{});
         document.removeEventListener('click',autoPlay);
     },{once:true});
-    {% endif %}
 </script>
+{% endif %}
 </body>
 </html>
 '''
@@ -1119,16 +2802,7 @@ MAIN_HTML = r'''
 # ADMIN LOGIN PAGE HTML
 # ============================================================
 
-ADMIN_LOGIN_HTML = r'''
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width,initial-scale=1.0">
-    <title>Admin Login | RuhibioQNR</title>
-    <link href="https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;600;700;800&family=Orbitron:wght@400;700;900&display=swap" rel="stylesheet">
-    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.0/css/all.min.css">
-    <style>
+ADMIN_LOGIN_CSS = r'''
         *{margin:0;padding:0;box-sizing:border-box}
         body{
             font-family:'Poppins',sans-serif;
@@ -1228,7 +2902,35 @@ ADMIN_LOGIN_HTML = r'''
             font-size:.65rem;color:rgba(255,255,255,0.2);
             letter-spacing:1px;
         }
-    </style>
+'''
+
+ADMIN_LOGIN_JS = r'''
+        (function(){
+            const c=document.getElementById('particles');
+            const items=['💖','✨','🌸','💗','⭐','💕'];
+            for(let i=0;i<15;i++){
+                const p=document.createElement('div');
+                p.className='particle';
+                p.textContent=items[Math.floor(Math.random()*items.length)];
+                p.style.left=Math.random()*100+'%';
+                p.style.fontSize=(0.5+Math.random()*1)+'rem';
+                p.style.animationDuration=(6+Math.random()*12)+'s';
+                p.style.animationDelay=Math.random()*8+'s';
+                c.appendChild(p);
+            }
+        })();
+'''
+
+ADMIN_LOGIN_HTML = r'''
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width,initial-scale=1.0">
+    <title>Admin Login | RuhibioQNR</title>
+    <link href="https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;600;700;800&family=Orbitron:wght@400;700;900&display=swap" rel="stylesheet">
+    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.0/css/all.min.css">
+    <link rel="stylesheet" href="{{ asset_url('admin-login.css') }}">
 </head>
 <body>
     <div class="particles" id="particles"></div>
@@ -1256,26 +2958,11 @@ ADMIN_LOGIN_HTML = r'''
                     <i class="fas fa-sign-in-alt"></i> ACCESS PANEL
                 </button>
             </form>
-            <a href="/" class="back-link">← Back to Bio</a>
+            <a href="{{ base }}/" class="back-link">← Back to Bio</a>
             <div class="server-info">RuhibioQNR • Secure Admin Portal</div>
         </div>
     </div>
-    <script>
-        (function(){
-            const c=document.getElementById('particles');
-            const items=['💖','✨','🌸','💗','⭐','💕'];
-            for(let i=0;i<15;i++){
-                const p=document.createElement('div');
-                p.className='particle';
-                p.textContent=items[Math.floor(Math.random()*items.length)];
-                p.style.left=Math.random()*100+'%';
-                p.style.fontSize=(0.5+Math.random()*1)+'rem';
-                p.style.animationDuration=(6+Math.random()*12)+'s';
-                p.style.animationDelay=Math.random()*8+'s';
-                c.appendChild(p);
-            }
-        })();
-    </script>
+    <script src="{{ asset_url('admin-login.js') }}"></script>
 </body>
 </html>
 '''
@@ -1284,16 +2971,7 @@ ADMIN_LOGIN_HTML = r'''
 # ADMIN DASHBOARD HTML
 # ============================================================
 
-ADMIN_DASHBOARD_HTML = r'''
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width,initial-scale=1.0">
-    <title>Admin Dashboard | RuhibioQNR</title>
-    <link href="https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;500;600;700;800&family=Orbitron:wght@400;700;900&display=swap" rel="stylesheet">
-    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.0/css/all.min.css">
-    <style>
+ADMIN_DASHBOARD_CSS = r'''
         *{margin:0;padding:0;box-sizing:border-box}
         :root{
             --pink:#ff1493;--magenta:#ff00ff;
@@ -1386,6 +3064,19 @@ ADMIN_DASHBOARD_HTML = r'''
             letter-spacing:2px;text-transform:uppercase;margin-top:5px;
         }
 
+        /* LINK CLICKS */
+        .clicks-table{width:100%;border-collapse:collapse;font-size:.8rem}
+        .clicks-table th{
+            font-size:.65rem;color:rgba(255,255,255,0.4);letter-spacing:2px;
+            text-transform:uppercase;text-align:center;padding:8px;font-weight:600;
+        }
+        .clicks-table td{
+            padding:10px 8px;text-align:center;color:rgba(255,255,255,0.7);
+            border-top:1px solid var(--border);
+        }
+        .clicks-table th:first-child,.clicks-table td:first-child{text-align:left}
+        .clicks-table .total{color:var(--pink);font-weight:700}
+
         /* SECTIONS */
         .admin-section{
             background:var(--card);border:1px solid var(--border);
@@ -1519,7 +3210,45 @@ ADMIN_DASHBOARD_HTML = r'''
             .topbar h1{font-size:1rem}
             .stats-grid{grid-template-columns:1fr 1fr}
         }
-    </style>
+'''
+
+ADMIN_DASHBOARD_JS = r'''
+    // Smooth scroll for sidebar links
+    document.querySelectorAll('.sidebar-menu a[href^="#"]').forEach(a=>{
+        a.addEventListener('click',function(e){
+            e.preventDefault();
+            const target=document.querySelector(this.getAttribute('href'));
+            if(target){
+                target.scrollIntoView({behavior:'smooth',block:'start'});
+                // Update active
+                document.querySelectorAll('.sidebar-menu a').forEach(l=>l.classList.remove('active'));
+                this.classList.add('active');
+                // Close mobile sidebar
+                document.querySelector('.sidebar').classList.remove('open');
+            }
+        });
+    });
+
+    // Auto-hide flash messages
+    setTimeout(()=>{
+        document.querySelectorAll('.flash-msg').forEach(m=>{
+            m.style.transition='opacity 0.5s';
+            m.style.opacity='0';
+            setTimeout(()=>m.remove(),500);
+        });
+    },4000);
+'''
+
+ADMIN_DASHBOARD_HTML = r'''
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width,initial-scale=1.0">
+    <title>Admin Dashboard | RuhibioQNR</title>
+    <link href="https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;500;600;700;800&family=Orbitron:wght@400;700;900&display=swap" rel="stylesheet">
+    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.0/css/all.min.css">
+    <link rel="stylesheet" href="{{ asset_url('admin-dashboard.css') }}">
 </head>
 <body>
 
@@ -1533,16 +3262,18 @@ ADMIN_DASHBOARD_HTML = r'''
     <div class="sidebar-brand">💖 RuhibioQNR<br><small style="font-size:.55rem;color:rgba(255,255,255,.3)">ADMIN PANEL</small></div>
     <ul class="sidebar-menu">
         <li><a href="#stats" class="active"><i class="fas fa-chart-bar"></i> Dashboard</a></li>
+        <li><a href="#clicks-section"><i class="fas fa-mouse-pointer"></i> Link Clicks</a></li>
         <li><a href="#profile-section"><i class="fas fa-user"></i> Profile</a></li>
         <li><a href="#bio-section"><i class="fas fa-info-circle"></i> Bio Info</a></li>
         <li><a href="#socials-section"><i class="fas fa-link"></i> Social Links</a></li>
         <li><a href="#seconddev-section"><i class="fas fa-user-friends"></i> 2nd Developer</a></li>
         <li><a href="#music-section"><i class="fas fa-music"></i> Music</a></li>
+        <li><a href="#media-section"><i class="fas fa-hdd"></i> Media Cache</a></li>
         <li><a href="#security-section"><i class="fas fa-shield-alt"></i> Security</a></li>
         <li><a href="#css-section"><i class="fas fa-paint-brush"></i> Custom CSS</a></li>
         <li><a href="#danger-section"><i class="fas fa-exclamation-triangle"></i> Danger Zone</a></li>
-        <li><a href="/"><i class="fas fa-eye"></i> View Bio</a></li>
-        <li><a href="/admin/logout"><i class="fas fa-sign-out-alt"></i> Logout</a></li>
+        <li><a href="{{ base }}/"><i class="fas fa-eye"></i> View Bio</a></li>
+        <li><a href="{{ base }}/admin/logout"><i class="fas fa-sign-out-alt"></i> Logout</a></li>
     </ul>
 </nav>
 
@@ -1552,8 +3283,8 @@ ADMIN_DASHBOARD_HTML = r'''
     <div class="topbar">
         <h1>DASHBOARD</h1>
         <div class="topbar-actions">
-            <a href="/" target="_blank" class="topbar-btn"><i class="fas fa-eye"></i> View Live</a>
-            <a href="/admin/logout" class="topbar-btn danger"><i class="fas fa-sign-out-alt"></i> Logout</a>
+            <a href="{{ base }}/" target="_blank" class="topbar-btn"><i class="fas fa-eye"></i> View Live</a>
+            <a href="{{ base }}/admin/logout" class="topbar-btn danger"><i class="fas fa-sign-out-alt"></i> Logout</a>
         </div>
     </div>
 
@@ -1571,9 +3302,17 @@ ADMIN_DASHBOARD_HTML = r'''
     <!-- STATS -->
     <div class="stats-grid" id="stats">
         <div class="stat-card">
-            <div class="stat-value">{{ data.visitor_count }}</div>
+            <div class="stat-value">{{ visitor_count }}</div>
             <div class="stat-label">Total Views</div>
         </div>
+        <div class="stat-card">
+            <div class="stat-value">{{ uniques.total }}</div>
+            <div class="stat-label">Unique Visitors</div>
+        </div>
+        <div class="stat-card">
+            <div class="stat-value">{{ uniques.today }}</div>
+            <div class="stat-label">Uniques Today</div>
+        </div>
         <div class="stat-card">
             <div class="stat-value">{{ data.social_links|length }}</div>
             <div class="stat-label">Social Links</div>
@@ -1588,10 +3327,31 @@ ADMIN_DASHBOARD_HTML = r'''
         </div>
     </div>
 
+    <!-- ======== LINK CLICKS ======== -->
+    <div class="admin-section" id="clicks-section">
+        <div class="section-header"><i class="fas fa-mouse-pointer"></i> LINK CLICKS</div>
+        <div style="overflow-x:auto">
+        <table class="clicks-table">
+            <tr>
+                <th>Link</th>
+                {% for day in click_days %}<th>{{ day[5:] }}</th>{% endfor %}
+                <th>Total</th>
+            </tr>
+            {% for row in link_clicks %}
+            <tr>
+                <td>{{ row.label }}</td>
+                {% for count in row.daily %}<td>{{ count }}</td>{% endfor %}
+                <td class="total">{{ row.total }}</td>
+            </tr>
+            {% endfor %}
+        </table>
+        </div>
+    </div>
+
     <!-- ======== PROFILE EDIT ======== -->
     <div class="admin-section" id="profile-section">
         <div class="section-header"><i class="fas fa-user"></i> EDIT PROFILE</div>
-        <form method="POST" action="/admin/update/profile">
+        <form method="POST" action="{{ base }}/admin/update/profile">
             <div class="form-row">
                 <div class="form-group">
                     <label>Display Name</label>
@@ -1609,7 +3369,7 @@ ADMIN_DASHBOARD_HTML = r'''
             <div class="form-row">
                 <div class="form-group">
                     <label>Profile Picture URL</label>
-                    <input type="url" name="profile_pic" value="{{ data.profile.profile_pic }}" placeholder="https://...">
+                    <input type="text" name="profile_pic" value="{{ data.profile.profile_pic }}" placeholder="https://...">
                 </div>
                 <div class="form-group">
                     <label>Background Video URL</label>
@@ -1618,12 +3378,20 @@ ADMIN_DASHBOARD_HTML = r'''
             </div>
             <button type="submit" class="submit-btn"><i class="fas fa-save"></i> Save Profile</button>
         </form>
+        <form method="POST" action="{{ base }}/admin/upload/image" enctype="multipart/form-data" style="margin-top:20px">
+            <input type="hidden" name="target" value="profile">
+            <div class="form-group">
+                <label>Or Upload a Picture (resized copies are made for phones)</label>
+                <input type="file" name="image" accept="image/jpeg,image/png,image/webp,image/gif">
+            </div>
+            <button type="submit" class="submit-btn"><i class="fas fa-upload"></i> Upload Picture</button>
+        </form>
     </div>
 
     <!-- ======== BIO INFO EDIT ======== -->
     <div class="admin-section" id="bio-section">
         <div class="section-header"><i class="fas fa-info-circle"></i> EDIT BIO INFO</div>
-        <form method="POST" action="/admin/update/bio">
+        <form method="POST" action="{{ base }}/admin/update/bio">
             <div class="form-row">
                 <div class="form-group">
                     <label>Age</label>
@@ -1676,7 +3444,7 @@ ADMIN_DASHBOARD_HTML = r'''
     <!-- ======== SOCIAL LINKS EDIT ======== -->
     <div class="admin-section" id="socials-section">
         <div class="section-header"><i class="fas fa-link"></i> EDIT SOCIAL LINKS</div>
-        <form method="POST" action="/admin/update/socials">
+        <form method="POST" action="{{ base }}/admin/update/socials">
             {% for key, link in data.social_links.items() %}
             <div class="social-edit-item">
                 <div class="social-edit-header"><i class="{{ link.icon }}"></i> {{ key|upper }}</div>
@@ -1704,7 +3472,7 @@ ADMIN_DASHBOARD_HTML = r'''
     <!-- ======== SECOND DEVELOPER EDIT ======== -->
     <div class="admin-section" id="seconddev-section">
         <div class="section-header"><i class="fas fa-user-friends"></i> SECOND DEVELOPER</div>
-        <form method="POST" action="/admin/update/second_dev">
+        <form method="POST" action="{{ base }}/admin/update/second_dev">
             <div class="checkbox-group" style="margin-bottom:20px">
                 <input type="checkbox" id="dev_enabled" name="enabled"
                        {% if data.second_developer.enabled %}checked{% endif %}>
@@ -1717,7 +3485,7 @@ ADMIN_DASHBOARD_HTML = r'''
                 </div>
                 <div class="form-group">
                     <label>Profile Picture URL</label>
-                    <input type="url" name="profile_pic" value="{{ data.second_developer.profile_pic }}">
+                    <input type="text" name="profile_pic" value="{{ data.second_developer.profile_pic }}">
                 </div>
             </div>
             <div class="form-group">
@@ -1736,12 +3504,20 @@ ADMIN_DASHBOARD_HTML = r'''
             </div>
             <button type="submit" class="submit-btn"><i class="fas fa-save"></i> Save</button>
         </form>
+        <form method="POST" action="{{ base }}/admin/upload/image" enctype="multipart/form-data" style="margin-top:20px">
+            <input type="hidden" name="target" value="second_dev">
+            <div class="form-group">
+                <label>Or Upload a Picture (resized copies are made for phones)</label>
+                <input type="file" name="image" accept="image/jpeg,image/png,image/webp,image/gif">
+            </div>
+            <button type="submit" class="submit-btn"><i class="fas fa-upload"></i> Upload Picture</button>
+        </form>
     </div>
 
     <!-- ======== MUSIC EDIT ======== -->
     <div class="admin-section" id="music-section">
         <div class="section-header"><i class="fas fa-music"></i> MUSIC SETTINGS</div>
-        <form method="POST" action="/admin/update/music">
+        <form method="POST" action="{{ base }}/admin/update/music">
             <div class="form-group">
                 <label>Music MP3 URL</label>
                 <input type="url" name="music_url" value="{{ data.music.url }}"
@@ -1756,12 +3532,35 @@ ADMIN_DASHBOARD_HTML = r'''
         </form>
     </div>
 
+    <!-- ======== MEDIA CACHE ======== -->
+    <div class="admin-section" id="media-section">
+        <div class="section-header"><i class="fas fa-hdd"></i> MEDIA CACHE</div>
+        <p style="color:rgba(255,255,255,0.4);font-size:.85rem;margin-bottom:20px;">
+            Download the background video and music once and serve them from this server.
+            The original URLs stay as a fallback.
+        </p>
+        <div class="form-group">
+            <label>Background Video</label>
+            <input type="text" readonly
+                   value="{{ '/media/' ~ data.media_cache[data.profile.background_video] if data.profile.background_video in data.media_cache else 'Remote: ' ~ data.profile.background_video }}">
+        </div>
+        <div class="form-group">
+            <label>Music</label>
+            <input type="text" readonly
+                   value="{{ '/media/' ~ data.media_cache[data.music.url] if data.music.url in data.media_cache else 'Remote: ' ~ data.music.url }}">
+        </div>
+        <form method="POST" action="{{ base }}/admin/media">
+            <button type="submit" name="action" value="cache" class="submit-btn"><i class="fas fa-download"></i> Cache Locally</button>
+            <button type="submit" name="action" value="clear" class="submit-btn" style="background:linear-gradient(135deg,#555,#333)"><i class="fas fa-broom"></i> Use Remote URLs</button>
+        </form>
+    </div>
+
     <!-- ======== SECURITY ======== -->
     <div class="admin-section" id="security-section">
         <div class="section-header"><i class="fas fa-shield-alt"></i> SECURITY</div>
 
         <!-- CHANGE EMAIL -->
-        <form method="POST" action="/admin/update/email" style="margin-bottom:25px;">
+        <form method="POST" action="{{ base }}/admin/update/email" style="margin-bottom:25px;">
             <div class="form-group">
                 <label>Admin Email</label>
                 <input type="text" name="new_email" value="{{ data.admin.email }}">
@@ -1770,7 +3569,7 @@ ADMIN_DASHBOARD_HTML = r'''
         </form>
 
         <!-- CHANGE PASSWORD -->
-        <form method="POST" action="/admin/update/password">
+        <form method="POST" action="{{ base }}/admin/update/password">
             <div class="form-row">
                 <div class="form-group">
                     <label>Current Password</label>
@@ -1792,7 +3591,7 @@ ADMIN_DASHBOARD_HTML = r'''
     <!-- ======== CUSTOM CSS ======== -->
     <div class="admin-section" id="css-section">
         <div class="section-header"><i class="fas fa-paint-brush"></i> CUSTOM CSS</div>
-        <form method="POST" action="/admin/update/custom_css">
+        <form method="POST" action="{{ base }}/admin/update/custom_css">
             <div class="form-group">
                 <label>Custom CSS (injected into bio page)</label>
                 <textarea name="custom_css" rows="6" placeholder="/* Add custom styles here */
@@ -1810,7 +3609,7 @@ ADMIN_DASHBOARD_HTML = r'''
         <p style="color:rgba(255,255,255,0.4);font-size:.85rem;margin-bottom:20px;">
             This will reset ALL data to defaults. This action cannot be undone!
         </p>
-        <form method="POST" action="/admin/reset"
+        <form method="POST" action="{{ base }}/admin/reset"
               onsubmit="return confirm('⚠️ Are you sure? This will reset EVERYTHING to defaults!')">
             <button type="submit" class="submit-btn" style="background:linear-gradient(135deg,#ff0000,#cc0000)">
                 <i class="fas fa-trash-alt"></i> Reset All Data
@@ -1824,36 +3623,115 @@ ADMIN_DASHBOARD_HTML = r'''
     </div>
 </div>
 
-<script>
-    // Smooth scroll for sidebar links
-    document.querySelectorAll('.sidebar-menu a[href^="#"]').forEach(a=>{
-        a.addEventListener('click',function(e){
-            e.preventDefault();
-            const target=document.querySelector(this.getAttribute('href'));
-            if(target){
-                target.scrollIntoView({behavior:'smooth',block:'start'});
-                // Update active
-                document.querySelectorAll('.sidebar-menu a').forEach(l=>l.classList.remove('active'));
-                this.classList.add('active');
-                // Close mobile sidebar
-                document.querySelector('.sidebar').classList.remove('open');
-            }
-        });
-    });
-
-    // Auto-hide flash messages
-    setTimeout(()=>{
-        document.querySelectorAll('.flash-msg').forEach(m=>{
-            m.style.transition='opacity 0.5s';
-            m.style.opacity='0';
-            setTimeout(()=>m.remove(),500);
-        });
-    },4000);
-</script>
+<script src="{{ asset_url('admin-dashboard.js') }}"></script>
 </body>
 </html>
 '''
 
+# ============================================================
+# STATIC ASSETS
+# The CSS/JS above is fingerprinted by content hash at startup,
+# precompressed once (gzip, plus brotli when the module is
+# installed) and served with immutable long-lived caching. The
+# files are also written to ASSET_DIR for nginx or a CDN origin.
+# ============================================================
+ASSET_DIR = os.environ.get('BIO_ASSET_DIR', 'assets')
+ASSET_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+ASSET_SOURCES = {
+    'main.css': MAIN_CSS,
+    'main.js': MAIN_JS,
+    'admin-login.css': ADMIN_LOGIN_CSS,
+    'admin-login.js': ADMIN_LOGIN_JS,
+    'admin-dashboard.css': ADMIN_DASHBOARD_CSS,
+    'admin-dashboard.js': ADMIN_DASHBOARD_JS,
+}
+ASSET_MIMETYPES = {
+    '.css': 'text/css; charset=utf-8',
+    '.js': 'text/javascript; charset=utf-8',
+}
+
+assets = {}        # logical name -> asset
+asset_files = {}   # fingerprinted file name -> asset
+
+
+def build_assets():
+    for name, source in ASSET_SOURCES.items():
+        body = source.encode('utf-8')
+        digest = hashlib.sha1(body).hexdigest()[:10]
+        stem, ext = os.path.splitext(name)
+        filename = f"{stem}.{digest}{ext}"
+        variants = {'identity': body, 'gzip': gzip.compress(body, 9, mtime=0)}
+        if brotli is not None:
+            variants['br'] = brotli.compress(body)
+        asset = {
+            'filename': filename,
+            'digest': digest,
+            'mimetype': ASSET_MIMETYPES[ext],
+            'variants': variants,
+        }
+        assets[name] = asset
+        asset_files[filename] = asset
+        write_asset_files(asset, ASSET_DIR)
+
+
+def write_asset_files(asset, directory):
+    suffixes = {'identity': '', 'gzip': '.gz', 'br': '.br'}
+    try:
+        os.makedirs(directory, exist_ok=True)
+        for encoding, body in asset['variants'].items():
+            path = os.path.join(directory, asset['filename'] + suffixes[encoding])
+            # Fingerprinted names never change content, so existing files are final
+            if not os.path.exists(path):
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(body)
+                os.replace(tmp_path, path)
+    except OSError:
+        # The in-memory copies are still served by /assets/
+        pass
+
+
+def asset_url(name):
+    return f"/assets/{assets[name]['filename']}"
+
+
+@app.route('/assets/<filename>')
+def serve_asset(filename):
+    asset = asset_files.get(filename)
+    if asset is None:
+        return make_response('Not Found', 404)
+    encoding = request.accept_encodings.best_match(list(asset['variants']), 'identity')
+    response = make_response(asset['variants'][encoding])
+    response.headers['Content-Type'] = asset['mimetype']
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = ASSET_CACHE_CONTROL
+    response.set_etag(asset['digest'])
+    return response.make_conditional(request)
+
+
+build_assets()
+app.jinja_env.globals['asset_url'] = asset_url
+
+# ============================================================
+# COMPILED TEMPLATES
+# Parsed and compiled once at startup instead of on every request
+# ============================================================
+
+main_template = app.jinja_env.from_string(MAIN_HTML)
+# Covers the asset fingerprints too, since the page links to them by name
+TEMPLATE_VERSION = hashlib.sha1(
+    (MAIN_HTML + assets['main.css']['filename'] + assets['main.js']['filename']).encode('utf-8')
+).hexdigest()[:8]
+admin_login_template = app.jinja_env.from_string(ADMIN_LOGIN_HTML)
+admin_dashboard_template = app.jinja_env.from_string(ADMIN_DASHBOARD_HTML)
+
+if EXPORT_DIR and not TENANTS_DIR:
+    with app.app_context():
+        export_static_site(default_tenant)
+
 # ============================================================
 # RUN THE APPLICATION
 # ============================================================
@@ -17,6 +17,7 @@ import json
 import time
 import signal
 import shutil
+import gzip
 import sqlite3
 import hashlib
 import zipfile
@@ -27,6 +28,7 @@ import platform
 import subprocess
 import traceback
 import threading
+import queue
 import mimetypes
 import re
 import uuid
@@ -36,14 +38,14 @@ import tempfile
 from telegram.constants import ChatAction
 from enum import Enum, auto
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import (
     Dict, List, Optional, Tuple, Any,
     Union, Callable, Set, TypeVar, Coroutine
 )
 from dataclasses import dataclass, field, asdict
 from collections import defaultdict, deque
-from functools import wraps, lru_cache
+from functools import wraps, lru_cache, partial
 from contextlib import contextmanager, asynccontextmanager
 from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
@@ -122,6 +124,25 @@ LOGS_DIR = BASE_DIR / "logs"
 BACKUPS_DIR = BASE_DIR / "backups"
 TEMP_DIR = BASE_DIR / "temp"
 DATABASE_PATH = BASE_DIR / "ruhi_hosting.db"
+DB_WORKER_THREADS = 4  # threads serving awaitable database calls
+DB_READ_POOL_SIZE = 4  # read-only connections that query alongside the writer
+LOG_FLUSH_INTERVAL = 0.25  # seconds between process log group commits
+LOG_FLUSH_BATCH = 500  # flush early once this many lines are waiting
+LOG_QUEUE_MAX = 20000  # lines held in memory before new ones are dropped
+LOG_STORE_DIR = LOGS_DIR / "segments"  # append-only process output segments
+LOG_SEGMENT_MAX_BYTES = 4 * 1024 * 1024  # seal the active segment at this size
+LOG_SEGMENT_MAX_AGE = 6 * 3600  # ...or once it is this many seconds old
+LOG_INDEX_INTERVAL = 256  # lines per sparse index entry / gzip block
+LOG_TAIL_CACHE = 500  # recent lines per project kept in memory
+USER_CACHE_TTL = 60  # seconds a cached user row answers authorization checks
+USER_ACTIVITY_FLUSH_INTERVAL = 30  # seconds between batched last_active writes
+RETENTION_CHUNK_ROWS = 2000  # rows deleted per retention transaction
+RETENTION_PAUSE = 0.05  # seconds the writer is left free between chunks
+VACUUM_STEP_PAGES = 256  # free pages returned to the OS per incremental step
+# Opt-in retention for tables cleanup never pruned before; None keeps everything
+RETENTION_DEPLOYMENT_LOG_DAYS: Optional[int] = None
+RETENTION_DEPLOYMENT_LOG_ROWS: Optional[int] = None  # newest rows kept per project
+RETENTION_NOTIFICATION_DAYS: Optional[int] = None
 
 # ── Create directories ──
 for _dir in [PROJECTS_DIR, UPLOADS_DIR, LOGS_DIR, BACKUPS_DIR, TEMP_DIR]:
@@ -409,7 +430,8 @@ class DatabaseManager:
     Thread-safe with connection pooling.
     """
 
-    SCHEMA_VERSION = 3
+    # Version that SCHEMA_SQL creates; later changes live in MIGRATIONS
+    BASELINE_VERSION = 3
 
     SCHEMA_SQL = """
     -- ═══════════════════════════════════════
@@ -497,7 +519,7 @@ class DatabaseManager:
 
     -- ═══════════════════════════════════════
     -- Table: process_logs
-    -- Stores stdout/stderr output from processes
+    -- Legacy stdout/stderr store; rows are moved to the log segments at startup
     -- ═══════════════════════════════════════
     CREATE TABLE IF NOT EXISTS process_logs (
         id              INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -582,52 +604,208 @@ class DatabaseManager:
     );
 
     -- ═══════════════════════════════════════
-    -- Indexes for performance
+    -- Indexes for performance (composite ones come from MIGRATIONS)
     -- ═══════════════════════════════════════
-    CREATE INDEX IF NOT EXISTS idx_projects_user ON projects(user_id);
     CREATE INDEX IF NOT EXISTS idx_projects_status ON projects(status);
-    CREATE INDEX IF NOT EXISTS idx_deployment_logs_project ON deployment_logs(project_id);
-    CREATE INDEX IF NOT EXISTS idx_deployment_logs_user ON deployment_logs(user_id);
     CREATE INDEX IF NOT EXISTS idx_process_logs_project ON process_logs(project_id);
     CREATE INDEX IF NOT EXISTS idx_process_logs_created ON process_logs(created_at);
-    CREATE INDEX IF NOT EXISTS idx_file_operations_user ON file_operations(user_id);
     CREATE INDEX IF NOT EXISTS idx_system_stats_created ON system_stats(created_at);
-    CREATE INDEX IF NOT EXISTS idx_notifications_user ON notifications(user_id);
-    CREATE INDEX IF NOT EXISTS idx_notifications_read ON notifications(is_read);
     CREATE INDEX IF NOT EXISTS idx_scheduled_tasks_project ON scheduled_tasks(project_id);
     """
 
-    def __init__(self, db_path: Path = DATABASE_PATH):
+    # Ordered (version, description, statements, transactional). Each step runs
+    # once and is recorded in schema_version; transactional steps run in their
+    # own transaction. Statements must be idempotent so a step interrupted
+    # before it is recorded can simply rerun.
+    MIGRATIONS: List[Tuple[int, str, Tuple[str, ...], bool]] = [
+        (
+            4,
+            "composite indexes for per-project/per-user newest-first queries",
+            (
+                # Leading columns of the composites below make these redundant
+                "DROP INDEX IF EXISTS idx_projects_user",
+                "DROP INDEX IF EXISTS idx_deployment_logs_project",
+                "DROP INDEX IF EXISTS idx_deployment_logs_user",
+                "DROP INDEX IF EXISTS idx_file_operations_user",
+                "DROP INDEX IF EXISTS idx_notifications_user",
+                "DROP INDEX IF EXISTS idx_notifications_read",
+                "CREATE INDEX IF NOT EXISTS idx_projects_user_updated "
+                "ON projects(user_id, updated_at)",
+                "CREATE INDEX IF NOT EXISTS idx_deployment_logs_project_created "
+                "ON deployment_logs(project_id, created_at)",
+                "CREATE INDEX IF NOT EXISTS idx_deployment_logs_user_created "
+                "ON deployment_logs(user_id, created_at)",
+                "CREATE INDEX IF NOT EXISTS idx_deployment_logs_created "
+                "ON deployment_logs(created_at)",
+                "CREATE INDEX IF NOT EXISTS idx_file_operations_user_created "
+                "ON file_operations(user_id, created_at)",
+                "CREATE INDEX IF NOT EXISTS idx_file_operations_created "
+                "ON file_operations(created_at)",
+                "CREATE INDEX IF NOT EXISTS idx_notifications_user_created "
+                "ON notifications(user_id, created_at)",
+                "CREATE INDEX IF NOT EXISTS idx_notifications_user_read_created "
+                "ON notifications(user_id, is_read, created_at)",
+            ),
+            True,
+        ),
+        (
+            5,
+            "incremental auto-vacuum and a created_at index for notification retention",
+            (
+                "CREATE INDEX IF NOT EXISTS idx_notifications_created "
+                "ON notifications(created_at)",
+                # auto_vacuum only changes on an existing file through a VACUUM
+                "PRAGMA auto_vacuum=INCREMENTAL",
+                "VACUUM",
+            ),
+            False,
+        ),
+    ]
+
+    SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+    # Hot queries that must be answered from an index without a temp sort.
+    # check_query_plans() runs them through EXPLAIN QUERY PLAN at startup.
+    HOT_QUERIES: Dict[str, Tuple[str, tuple]] = {
+        "projects by user": (
+            "SELECT * FROM projects WHERE user_id = ? ORDER BY updated_at DESC",
+            (0,),
+        ),
+        "deployment logs by project": (
+            "SELECT * FROM deployment_logs WHERE project_id = ? "
+            "ORDER BY created_at DESC LIMIT ?",
+            ("", 20),
+        ),
+        "notifications by user": (
+            "SELECT * FROM notifications WHERE user_id = ? ORDER BY created_at DESC LIMIT ?",
+            (0, 20),
+        ),
+        "unread notifications": (
+            "SELECT * FROM notifications WHERE user_id = ? AND is_read = 0 "
+            "ORDER BY created_at DESC LIMIT ?",
+            (0, 20),
+        ),
+        "unread count": (
+            "SELECT COUNT(*) FROM notifications WHERE user_id = ? AND is_read = 0",
+            (0,),
+        ),
+        "recent system stats": (
+            "SELECT * FROM system_stats ORDER BY created_at DESC LIMIT ?",
+            (60,),
+        ),
+    }
+
+    def __init__(self, db_path: Path = DATABASE_PATH, read_pool_size: int = DB_READ_POOL_SIZE):
         self.db_path = db_path
+        # Serializes everything that goes through the single writer connection
         self._lock = threading.Lock()
-        self._local = threading.local()
+        self._writer: Optional[sqlite3.Connection] = None
+        # Read-only connections; WAL lets them run alongside the writer
+        self._read_pool_size = read_pool_size
+        self._readers: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._reader_count = 0
+        self._reader_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._lock_stats: Dict[str, Dict[str, float]] = {
+            kind: {"count": 0, "wait_total": 0.0, "wait_max": 0.0}
+            for kind in ("write", "read")
+        }
+        # Called with a user_id whenever ban/admin state changes
+        self.user_listeners: List[Callable[[int], None]] = []
         self._initialized = False
         self.initialize()
 
-    def _get_connection(self) -> sqlite3.Connection:
-        """Get thread-local database connection."""
-        if not hasattr(self._local, "connection") or self._local.connection is None:
+    def _open_connection(self, read_only: bool = False) -> sqlite3.Connection:
+        """Open a configured connection (read-only ones cannot write at all)."""
+        if read_only:
+            conn = sqlite3.connect(
+                # as_uri() percent-encodes "?", "#" and "%" in the path
+                Path(self.db_path).resolve().as_uri() + "?mode=ro",
+                uri=True,
+                timeout=30,
+                check_same_thread=False,
+            )
+            conn.execute("PRAGMA query_only=ON")
+        else:
             conn = sqlite3.connect(
                 str(self.db_path),
                 timeout=30,
                 check_same_thread=False,
             )
-            conn.row_factory = sqlite3.Row
             conn.execute("PRAGMA journal_mode=WAL")
             conn.execute("PRAGMA synchronous=NORMAL")
-            conn.execute("PRAGMA cache_size=10000")
-            conn.execute("PRAGMA temp_store=MEMORY")
-            conn.execute("PRAGMA mmap_size=268435456")
             conn.execute("PRAGMA foreign_keys=ON")
-            self._local.connection = conn
-        return self._local.connection
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA cache_size=10000")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=268435456")
+        return conn
 
     @property
     def conn(self) -> sqlite3.Connection:
-        return self._get_connection()
+        """The writer connection. Only use it while holding _lock."""
+        if self._writer is None:
+            self._writer = self._open_connection()
+        return self._writer
+
+    def _record_wait(self, kind: str, waited: float):
+        with self._stats_lock:
+            stats = self._lock_stats[kind]
+            stats["count"] += 1
+            stats["wait_total"] += waited
+            stats["wait_max"] = max(stats["wait_max"], waited)
+
+    @contextmanager
+    def _write_lock(self):
+        """Hold the writer for one statement/transaction, timing the wait."""
+        started = time.perf_counter()
+        with self._lock:
+            self._record_wait("write", time.perf_counter() - started)
+            yield self.conn
+
+    @contextmanager
+    def _read_connection(self):
+        """Borrow a pooled read-only connection, timing the wait."""
+        started = time.perf_counter()
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self._reader_lock:
+                if self._reader_count < self._read_pool_size:
+                    self._reader_count += 1
+                    grow = True
+                else:
+                    grow = False
+            if grow:
+                try:
+                    conn = self._open_connection(read_only=True)
+                except sqlite3.Error:
+                    with self._reader_lock:
+                        self._reader_count -= 1
+                    raise
+            else:
+                conn = self._readers.get()
+        self._record_wait("read", time.perf_counter() - started)
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    def get_lock_stats(self) -> Dict[str, Dict[str, float]]:
+        """Lock wait metrics: acquisitions and total/max/avg wait in seconds."""
+        with self._stats_lock:
+            result = {}
+            for kind, stats in self._lock_stats.items():
+                result[kind] = dict(stats)
+                result[kind]["wait_avg"] = (
+                    stats["wait_total"] / stats["count"] if stats["count"] else 0.0
+                )
+            result["read"]["pool_size"] = self._reader_count
+            return result
 
     def initialize(self):
-        """Initialize database schema."""
+        """Create the baseline schema and apply pending migrations."""
         with self._lock:
             if self._initialized:
                 return
@@ -635,72 +813,130 @@ class DatabaseManager:
                 cursor = self.conn.cursor()
                 # Execute schema SQL (split by semicolons for multi-statement)
                 cursor.executescript(self.SCHEMA_SQL)
-
-                # Insert or update schema version
-                cursor.execute(
-                    "INSERT OR REPLACE INTO schema_version (id, version, updated_at) "
-                    "VALUES (1, ?, CURRENT_TIMESTAMP)",
-                    (self.SCHEMA_VERSION,),
-                )
-                self.conn.commit()
+                version = self._migrate(self.conn)
                 self._initialized = True
                 logger.info(
-                    f"Database initialized successfully. Schema v{self.SCHEMA_VERSION}"
+                    f"Database initialized successfully. Schema v{version}"
                 )
             except Exception as e:
                 logger.error(f"Database initialization failed: {e}")
                 raise
+        self.check_query_plans()
+
+    def _migrate(self, conn: sqlite3.Connection) -> int:
+        """Apply MIGRATIONS newer than the recorded version; returns the new version."""
+        # A database without a version row was just created from SCHEMA_SQL
+        conn.execute(
+            "INSERT OR IGNORE INTO schema_version (id, version) VALUES (1, ?)",
+            (self.BASELINE_VERSION,),
+        )
+        conn.commit()
+        current = conn.execute(
+            "SELECT version FROM schema_version WHERE id = 1"
+        ).fetchone()["version"]
+        for version, description, statements, transactional in self.MIGRATIONS:
+            if version <= current:
+                continue
+            try:
+                if transactional:
+                    conn.execute("BEGIN IMMEDIATE")
+                for statement in statements:
+                    conn.execute(statement)
+                    if not transactional:
+                        conn.commit()
+                conn.execute(
+                    "UPDATE schema_version SET version = ?, updated_at = CURRENT_TIMESTAMP "
+                    "WHERE id = 1",
+                    (version,),
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                conn.rollback()
+                logger.error(f"Migration v{version} ({description}) failed: {e}")
+                raise
+            logger.info(f"Applied migration v{version}: {description}")
+            current = version
+        return current
+
+    def get_schema_version(self) -> int:
+        row = self.fetchone("SELECT version FROM schema_version WHERE id = 1")
+        return row["version"] if row else 0
+
+    def check_query_plans(self) -> Dict[str, List[str]]:
+        """EXPLAIN QUERY PLAN each of HOT_QUERIES; warn on full scans and temp sorts."""
+        plans = {}
+        for name, (query, params) in self.HOT_QUERIES.items():
+            rows = self.fetchall(f"EXPLAIN QUERY PLAN {query}", params)
+            details = [row["detail"] for row in rows]
+            plans[name] = details
+            for detail in details:
+                full_scan = detail.startswith("SCAN") and "USING" not in detail
+                if full_scan or "TEMP B-TREE" in detail:
+                    logger.warning(f"Query plan for '{name}' is not indexed: {detail}")
+        return plans
 
     def execute(
         self, query: str, params: tuple = (), fetch: bool = False
     ) -> Union[List[sqlite3.Row], int]:
-        """Execute a query with thread safety."""
-        with self._lock:
+        """Execute a query on the writer connection."""
+        with self._write_lock() as conn:
             try:
-                cursor = self.conn.cursor()
+                cursor = conn.cursor()
                 cursor.execute(query, params)
                 if fetch:
                     return cursor.fetchall()
-                self.conn.commit()
+                conn.commit()
                 return cursor.lastrowid
             except sqlite3.Error as e:
                 logger.error(f"DB Execute Error: {e}\nQuery: {query}\nParams: {params}")
-                self.conn.rollback()
+                conn.rollback()
                 raise
 
     def execute_many(self, query: str, params_list: List[tuple]):
         """Execute multiple queries."""
-        with self._lock:
+        with self._write_lock() as conn:
             try:
-                cursor = self.conn.cursor()
+                cursor = conn.cursor()
                 cursor.executemany(query, params_list)
-                self.conn.commit()
+                conn.commit()
             except sqlite3.Error as e:
                 logger.error(f"DB ExecuteMany Error: {e}")
-                self.conn.rollback()
+                conn.rollback()
                 raise
 
-    def fetchone(self, query: str, params: tuple = ()) -> Optional[sqlite3.Row]:
-        """Fetch a single row."""
-        with self._lock:
+    def execute_rowcount(self, query: str, params: tuple = ()) -> int:
+        """Execute one write in its own transaction and return the rows it touched."""
+        with self._write_lock() as conn:
             try:
-                cursor = self.conn.cursor()
+                count = conn.execute(query, params).rowcount
+                conn.commit()
+                return count
+            except sqlite3.Error as e:
+                logger.error(f"DB Execute Error: {e}\nQuery: {query}\nParams: {params}")
+                conn.rollback()
+                raise
+
+    def fetchone(self, query: str, params: tuple = ()) -> Optional[sqlite3.Row]:
+        """Fetch a single row on a pooled reader (does not wait for writes)."""
+        try:
+            with self._read_connection() as conn:
+                cursor = conn.cursor()
                 cursor.execute(query, params)
                 return cursor.fetchone()
-            except sqlite3.Error as e:
-                logger.error(f"DB Fetchone Error: {e}")
-                return None
+        except sqlite3.Error as e:
+            logger.error(f"DB Fetchone Error: {e}")
+            return None
 
     def fetchall(self, query: str, params: tuple = ()) -> List[sqlite3.Row]:
-        """Fetch all rows."""
-        with self._lock:
-            try:
-                cursor = self.conn.cursor()
+        """Fetch all rows on a pooled reader (does not wait for writes)."""
+        try:
+            with self._read_connection() as conn:
+                cursor = conn.cursor()
                 cursor.execute(query, params)
                 return cursor.fetchall()
-            except sqlite3.Error as e:
-                logger.error(f"DB Fetchall Error: {e}")
-                return []
+        except sqlite3.Error as e:
+            logger.error(f"DB Fetchall Error: {e}")
+            return []
 
     # ── User Operations ──
 
@@ -736,11 +972,15 @@ class DatabaseManager:
 
     def is_user_authorized(self, user_id: int) -> bool:
         """Check if user is authorized to use the bot."""
+        return self.check_authorized(user_id, self.get_user(user_id))
+
+    @staticmethod
+    def check_authorized(user_id: int, user: Optional[sqlite3.Row]) -> bool:
+        """Authorization rule applied to an already loaded user row."""
         if user_id == OWNER_ID:
             return True
         if ALLOWED_USERS and user_id in ALLOWED_USERS:
             return True
-        user = self.get_user(user_id)
         if user and user["is_admin"] and not user["is_banned"]:
             return True
         # If ALLOWED_USERS is empty, only owner
@@ -751,12 +991,18 @@ class DatabaseManager:
     def get_all_users(self) -> List[sqlite3.Row]:
         return self.fetchall("SELECT * FROM users ORDER BY last_active DESC")
 
+    def _user_changed(self, user_id: int):
+        for listener in self.user_listeners:
+            listener(user_id)
+
     def ban_user(self, user_id: int) -> bool:
         self.execute("UPDATE users SET is_banned = 1 WHERE user_id = ?", (user_id,))
+        self._user_changed(user_id)
         return True
 
     def unban_user(self, user_id: int) -> bool:
         self.execute("UPDATE users SET is_banned = 0 WHERE user_id = ?", (user_id,))
+        self._user_changed(user_id)
         return True
 
     def set_admin(self, user_id: int, is_admin: bool = True) -> bool:
@@ -764,8 +1010,13 @@ class DatabaseManager:
             "UPDATE users SET is_admin = ? WHERE user_id = ?",
             (1 if is_admin else 0, user_id),
         )
+        self._user_changed(user_id)
         return True
 
+    def touch_users(self, activity: List[Tuple[str, int]]):
+        """Write batched (last_active, user_id) pairs in one transaction."""
+        self.execute_many("UPDATE users SET last_active = ? WHERE user_id = ?", activity)
+
     def update_user_setting(self, user_id: int, key: str, value: Any):
         user = self.get_user(user_id)
         if user:
@@ -856,7 +1107,6 @@ class DatabaseManager:
 
     def delete_project(self, project_id: str) -> bool:
         try:
-            self.execute("DELETE FROM process_logs WHERE project_id = ?", (project_id,))
             self.execute(
                 "DELETE FROM deployment_logs WHERE project_id = ?", (project_id,)
             )
@@ -905,34 +1155,6 @@ class DatabaseManager:
             (project_id, limit),
         )
 
-    # ── Process Log Operations ──
-
-    def add_process_log(
-        self, project_id: str, content: str, log_type: str = "stdout"
-    ):
-        self.execute(
-            "INSERT INTO process_logs (project_id, log_type, content) VALUES (?, ?, ?)",
-            (project_id, log_type, content),
-        )
-
-    def get_process_logs(
-        self, project_id: str, limit: int = MAX_LOG_LINES, log_type: str = None
-    ) -> List[sqlite3.Row]:
-        if log_type:
-            return self.fetchall(
-                "SELECT * FROM process_logs WHERE project_id = ? AND log_type = ? "
-                "ORDER BY created_at DESC LIMIT ?",
-                (project_id, log_type, limit),
-            )
-        return self.fetchall(
-            "SELECT * FROM process_logs WHERE project_id = ? "
-            "ORDER BY created_at DESC LIMIT ?",
-            (project_id, limit),
-        )
-
-    def clear_process_logs(self, project_id: str):
-        self.execute("DELETE FROM process_logs WHERE project_id = ?", (project_id,))
-
     # ── File Operations Log ──
 
     def log_file_operation(
@@ -1027,22 +1249,6 @@ class DatabaseManager:
 
     # ── Cleanup ──
 
-    def cleanup_old_logs(self, days: int = 7):
-        """Remove logs older than specified days."""
-        self.execute(
-            "DELETE FROM process_logs WHERE created_at < datetime('now', ?)",
-            (f"-{days} days",),
-        )
-        self.execute(
-            "DELETE FROM system_stats WHERE created_at < datetime('now', ?)",
-            (f"-{days} days",),
-        )
-        self.execute(
-            "DELETE FROM file_operations WHERE created_at < datetime('now', ?)",
-            (f"-{days} days",),
-        )
-        logger.info(f"Cleaned up logs older than {days} days")
-
     def get_db_size(self) -> int:
         """Get database file size in bytes."""
         if self.db_path.exists():
@@ -1050,20 +1256,904 @@ class DatabaseManager:
         return 0
 
     def vacuum(self):
-        """Optimize database."""
-        with self._lock:
-            self.conn.execute("VACUUM")
+        """Rebuild the whole file. Blocks every writer; prefer incremental_vacuum()."""
+        with self._write_lock() as conn:
+            conn.execute("VACUUM")
             logger.info("Database vacuumed successfully")
 
+    def incremental_vacuum(
+        self, step_pages: int = VACUUM_STEP_PAGES, pause: float = RETENTION_PAUSE
+    ) -> int:
+        """Return free pages to the OS a few at a time; returns pages freed."""
+        freed = 0
+        while True:
+            with self._write_lock() as conn:
+                before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if not before:
+                    break
+                # execute() stops after the first page; executescript() runs it through
+                conn.executescript(f"PRAGMA incremental_vacuum({int(step_pages)});")
+                after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if after >= before:
+                # auto_vacuum is not INCREMENTAL on this file
+                break
+            freed += before - after
+            time.sleep(pause)
+        if freed:
+            logger.info(f"Incremental vacuum freed {freed} pages")
+        return freed
+
     def close(self):
-        """Close database connection."""
-        if hasattr(self._local, "connection") and self._local.connection:
-            self._local.connection.close()
-            self._local.connection = None
+        """Close the writer and every pooled reader connection."""
+        with self._lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        with self._reader_lock:
+            while True:
+                try:
+                    self._readers.get_nowait().close()
+                except queue.Empty:
+                    break
+                except sqlite3.Error:
+                    pass
+            self._reader_count = 0
+
+
+class AsyncDatabase:
+    """
+    Awaitable front end for DatabaseManager.
+    Every call runs on a small pool of dedicated DB worker threads, so a
+    slow query or a busy write lock never stalls the asyncio event loop.
+    Any DatabaseManager method can be awaited by name:
+
+        project = await adb.get_project(project_id)
+    """
+
+    def __init__(self, manager: DatabaseManager, workers: int = DB_WORKER_THREADS):
+        self._db = manager
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="db-worker"
+        )
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run any blocking callable on a DB worker thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, partial(func, *args, **kwargs)
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._db, name)
+        if not callable(attr):
+            return attr
+
+        async def call(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+
+        call.__name__ = name
+        call.__doc__ = attr.__doc__
+        # Cache the wrapper so later lookups skip __getattr__
+        setattr(self, name, call)
+        return call
+
+    async def close(self):
+        """Let queued calls finish, stop the workers and close their connections."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, partial(self._executor.shutdown, wait=True))
+        self._db.close()
+
+
+class LogSegment:
+    """One segment file of a project's log: plain while active, gzip once sealed."""
+
+    def __init__(self, base_seq: int, path: Path, sealed: bool = False):
+        self.base_seq = base_seq
+        self.path = path
+        self.sealed = sealed
+        self.last_seq = base_seq - 1
+        self.first_ts = 0.0
+        self.last_ts = 0.0
+        self.size = 0
+        self.created = time.time()
+        # Sparse index: (seq, ts, offset, length) every LOG_INDEX_INTERVAL
+        # records. In sealed segments each entry is one gzip member of
+        # `length` bytes; in the active segment length is 0.
+        self.index: List[Tuple[int, float, int, int]] = []
+
+    @property
+    def count(self) -> int:
+        return self.last_seq - self.base_seq + 1
 
+    def snapshot(self) -> "LogSegment":
+        copy = LogSegment(self.base_seq, self.path, self.sealed)
+        copy.__dict__.update(self.__dict__)
+        copy.index = list(self.index)
+        return copy
+
+    def meta(self) -> Dict[str, Any]:
+        return {
+            "base_seq": self.base_seq,
+            "last_seq": self.last_seq,
+            "first_ts": self.first_ts,
+            "last_ts": self.last_ts,
+            "size": self.size,
+            "created": self.created,
+            "index": self.index,
+        }
+
+
+class ProjectLog:
+    """Open state of one project's log: its segments, tail cache and file handle."""
+
+    def __init__(self, directory: Path, tail_size: int):
+        self.directory = directory
+        self.segments: List[LogSegment] = []
+        self.tail: deque = deque(maxlen=tail_size)
+        self.handle = None
+        self.lock = threading.RLock()
+
+    @property
+    def next_seq(self) -> int:
+        return self.segments[-1].last_seq + 1 if self.segments else 1
 
-# ── Global Database Instance ──
+    @property
+    def active(self) -> Optional[LogSegment]:
+        if self.segments and not self.segments[-1].sealed:
+            return self.segments[-1]
+        return None
+
+
+class SegmentedLogStore:
+    """
+    Append-only, per-project store for process output.
+    Each project has a directory of segment files named by their first
+    sequence number. Lines are appended as JSON records to the active
+    segment; once it reaches LOG_SEGMENT_MAX_BYTES or LOG_SEGMENT_MAX_AGE
+    it is sealed into a gzip file made of one member per index block, with
+    a sidecar .idx holding the sparse (seq, timestamp, offset) index.
+    Recent lines are kept in memory, so tail reads never touch disk; range
+    reads by sequence number or time seek straight to the right block; and
+    retention deletes whole segments instead of individual rows.
+    """
+
+    def __init__(
+        self,
+        root: Path = LOG_STORE_DIR,
+        segment_bytes: int = LOG_SEGMENT_MAX_BYTES,
+        segment_age: float = LOG_SEGMENT_MAX_AGE,
+        index_interval: int = LOG_INDEX_INTERVAL,
+        tail_size: int = LOG_TAIL_CACHE,
+    ):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.segment_age = segment_age
+        self.index_interval = index_interval
+        self.tail_size = tail_size
+        self._projects: Dict[str, ProjectLog] = {}
+        self._lock = threading.Lock()
+
+    # ── Opening & recovery ──
+
+    @staticmethod
+    def _dir_name(project_id: str) -> str:
+        if re.fullmatch(r"[A-Za-z0-9_.-]{1,64}", project_id) and not project_id.startswith("."):
+            return project_id
+        return "h_" + hashlib.sha1(project_id.encode()).hexdigest()[:20]
+
+    def _project(self, project_id: str) -> ProjectLog:
+        return self._open(self._dir_name(project_id))
+
+    def _open(self, dir_name: str) -> ProjectLog:
+        with self._lock:
+            plog = self._projects.get(dir_name)
+            if plog is None:
+                plog = ProjectLog(self.root / dir_name, self.tail_size)
+                with plog.lock:
+                    self._load(plog)
+                self._projects[dir_name] = plog
+            return plog
+
+    def _all_projects(self) -> List[ProjectLog]:
+        return [self._open(path.name) for path in self.root.iterdir() if path.is_dir()]
+
+    def _load(self, plog: ProjectLog):
+        if not plog.directory.exists():
+            return
+        segments = {}
+        for path in plog.directory.iterdir():
+            name = path.name
+            if name.endswith(".idx"):
+                try:
+                    meta = json.loads(path.read_text(encoding="utf-8"))
+                except (OSError, ValueError):
+                    continue
+                gz_path = path.with_name(name[:-4] + ".log.gz")
+                if not gz_path.exists():
+                    path.unlink(missing_ok=True)
+                    continue
+                seg = LogSegment(meta["base_seq"], gz_path, sealed=True)
+                seg.last_seq = meta["last_seq"]
+                seg.first_ts = meta["first_ts"]
+                seg.last_ts = meta["last_ts"]
+                seg.size = meta["size"]
+                seg.created = meta.get("created", seg.first_ts)
+                seg.index = [tuple(entry) for entry in meta["index"]]
+                segments[seg.base_seq] = seg
+        for path in plog.directory.glob("*.log"):
+            base_seq = int(path.stem)
+            if base_seq in segments:
+                # Crashed after sealing finished; the plain copy is stale
+                path.unlink(missing_ok=True)
+                continue
+            segments[base_seq] = self._recover_active(path, base_seq)
+        for path in plog.directory.glob("*.log.gz"):
+            if int(path.name.split(".")[0]) not in segments:
+                # Sealing never finished; the plain segment is still there
+                path.unlink(missing_ok=True)
+        plog.segments = [segments[k] for k in sorted(segments)]
+        # Anything but the newest plain segment is sealed now
+        for seg in plog.segments[:-1]:
+            if not seg.sealed:
+                self._seal(plog, seg)
+        plog.tail.extend(self._read_tail(plog, self.tail_size))
+
+    def _recover_active(self, path: Path, base_seq: int) -> LogSegment:
+        seg = LogSegment(base_seq, path)
+        offset = 0
+        with open(path, "rb") as f:
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break
+                try:
+                    seq, ts, _, _ = json.loads(raw)
+                except ValueError:
+                    break
+                self._note_record(seg, seq, ts, offset)
+                offset += len(raw)
+        if offset != path.stat().st_size:
+            # Drop a torn write at the end of the file
+            with open(path, "r+b") as f:
+                f.truncate(offset)
+        seg.size = offset
+        seg.created = seg.first_ts or path.stat().st_mtime
+        return seg
+
+    def _note_record(self, seg: LogSegment, seq: int, ts: float, offset: int, length: int = 0):
+        if seg.count == 0:
+            seg.first_ts = ts
+        if (seq - seg.base_seq) % self.index_interval == 0:
+            seg.index.append((seq, ts, offset, length))
+        seg.last_seq = seq
+        seg.last_ts = ts
+
+    # ── Writing ──
+
+    def append_batch(self, rows: List[Tuple[str, str, str, float]]):
+        """Append (project_id, log_type, content, timestamp) rows in order."""
+        by_project: Dict[str, List[Tuple[str, str, float]]] = {}
+        for project_id, log_type, content, ts in rows:
+            by_project.setdefault(project_id, []).append((log_type, content, ts))
+        for project_id, records in by_project.items():
+            plog = self._project(project_id)
+            with plog.lock:
+                self._append(plog, records)
+
+    def append(self, project_id: str, content: str, log_type: str = "stdout"):
+        self.append_batch([(project_id, log_type, content, time.time())])
+
+    def _active_segment(self, plog: ProjectLog) -> LogSegment:
+        """The segment to append to, sealing the current one if it is full or old."""
+        seg = plog.active
+        if seg is not None and (
+            seg.size >= self.segment_bytes
+            or (seg.count and time.time() - seg.created >= self.segment_age)
+        ):
+            self._seal(plog, seg)
+            seg = None
+        if seg is None:
+            plog.directory.mkdir(parents=True, exist_ok=True)
+            base_seq = plog.next_seq
+            seg = LogSegment(base_seq, plog.directory / f"{base_seq:020d}.log")
+            plog.segments.append(seg)
+        if plog.handle is None:
+            plog.handle = open(seg.path, "ab")
+        return seg
+
+    def _append(self, plog: ProjectLog, records: List[Tuple[str, str, float]]):
+        seg = self._active_segment(plog)
+        chunks = []
+        for log_type, content, ts in records:
+            if seg.size >= self.segment_bytes:
+                plog.handle.write(b"".join(chunks))
+                chunks = []
+                seg = self._active_segment(plog)
+            seq = seg.last_seq + 1
+            ts = round(ts, 3)
+            raw = (json.dumps([seq, ts, log_type, content], ensure_ascii=False) + "\n").encode("utf-8")
+            self._note_record(seg, seq, ts, seg.size)
+            seg.size += len(raw)
+            chunks.append(raw)
+            plog.tail.append(self._record(seq, ts, log_type, content))
+        plog.handle.write(b"".join(chunks))
+        plog.handle.flush()
+
+    def _seal(self, plog: ProjectLog, seg: LogSegment):
+        """Compress a plain segment into gzip blocks plus its .idx sidecar."""
+        if plog.handle is not None and plog.active is seg:
+            plog.handle.close()
+            plog.handle = None
+        gz_path = seg.path.with_name(seg.path.name + ".gz")
+        idx_path = seg.path.with_suffix(".idx")
+        sealed = LogSegment(seg.base_seq, gz_path, sealed=True)
+        sealed.created = seg.created
+        offset = 0
+        with open(seg.path, "rb") as src, open(gz_path, "wb") as dst:
+            block = []
+            for raw in src:
+                block.append(raw)
+                if len(block) == self.index_interval:
+                    offset = self._write_block(sealed, dst, block, offset)
+                    block = []
+            if block:
+                offset = self._write_block(sealed, dst, block, offset)
+            dst.flush()
+            os.fsync(dst.fileno())
+        sealed.size = offset
+        tmp_idx = idx_path.with_suffix(".idx.tmp")
+        tmp_idx.write_text(json.dumps(sealed.meta()), encoding="utf-8")
+        os.replace(tmp_idx, idx_path)
+        seg.path.unlink(missing_ok=True)
+        plog.segments[plog.segments.index(seg)] = sealed
+
+    def _write_block(self, seg: LogSegment, dst, block: List[bytes], offset: int) -> int:
+        first_seq, first_ts, _, _ = json.loads(block[0])
+        last_seq, last_ts, _, _ = json.loads(block[-1])
+        data = gzip.compress(b"".join(block), compresslevel=6)
+        dst.write(data)
+        if not seg.index:
+            seg.first_ts = first_ts
+        seg.index.append((first_seq, first_ts, offset, len(data)))
+        seg.last_seq, seg.last_ts = last_seq, last_ts
+        return offset + len(data)
+
+    # ── Reading ──
+
+    @staticmethod
+    def _record(seq: int, ts: float, log_type: str, content: str) -> Dict[str, Any]:
+        return {
+            "seq": seq,
+            "ts": ts,
+            "created_at": datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+            "log_type": log_type,
+            "content": content,
+        }
+
+    def _segments(self, plog: ProjectLog) -> List[LogSegment]:
+        with plog.lock:
+            return [seg.snapshot() for seg in plog.segments]
+
+    def _iter_segment(self, plog: ProjectLog, seg: LogSegment, start_seq: int = None, since: float = None):
+        """Yield a segment's records, starting from the block that can hold start_seq/since."""
+        block = 0
+        if start_seq is not None or since is not None:
+            for i, (seq, ts, _, _) in enumerate(seg.index):
+                if (start_seq is not None and seq > start_seq) or (since is not None and ts > since):
+                    break
+                block = i
+        try:
+            if seg.sealed:
+                with open(seg.path, "rb") as f:
+                    for _, _, offset, length in seg.index[block:]:
+                        f.seek(offset)
+                        for raw in gzip.decompress(f.read(length)).splitlines():
+                            yield self._record(*json.loads(raw))
+            else:
+                offset = seg.index[block][2] if seg.index else 0
+                with open(seg.path, "rb") as f:
+                    f.seek(offset)
+                    data = f.read(seg.size - offset)
+                for raw in data.splitlines():
+                    yield self._record(*json.loads(raw))
+        except FileNotFoundError:
+            # Sealed or dropped while we were reading; use its current form
+            with plog.lock:
+                current = next((s.snapshot() for s in plog.segments if s.base_seq == seg.base_seq), None)
+            if current is not None and current.sealed != seg.sealed:
+                for record in self._iter_segment(plog, current, start_seq, since):
+                    if start_seq is None or record["seq"] >= start_seq:
+                        yield record
+
+    def read(
+        self,
+        project_id: str,
+        start_seq: int = None,
+        end_seq: int = None,
+        since: float = None,
+        until: float = None,
+        limit: int = None,
+    ) -> List[Dict[str, Any]]:
+        """Records in sequence order, filtered by sequence number and/or time."""
+        plog = self._project(project_id)
+        result = []
+        for seg in self._segments(plog):
+            if seg.count == 0:
+                continue
+            if start_seq is not None and seg.last_seq < start_seq:
+                continue
+            if since is not None and seg.last_ts < since:
+                continue
+            if (end_seq is not None and seg.base_seq > end_seq) or (until is not None and seg.first_ts > until):
+                break
+            for record in self._iter_segment(plog, seg, start_seq, since):
+                if start_seq is not None and record["seq"] < start_seq:
+                    continue
+                if since is not None and record["ts"] < since:
+                    continue
+                if (end_seq is not None and record["seq"] > end_seq) or (until is not None and record["ts"] > until):
+                    return result
+                result.append(record)
+                if limit is not None and len(result) >= limit:
+                    return result
+        return result
+
+    def _read_tail(self, plog: ProjectLog, n: int) -> List[Dict[str, Any]]:
+        chunks = []
+        found = 0
+        for seg in reversed(self._segments(plog)):
+            if found >= n:
+                break
+            records = list(self._iter_segment(plog, seg))
+            chunks.append(records)
+            found += len(records)
+        records = [record for chunk in reversed(chunks) for record in chunk]
+        return records[-n:] if n else []
+
+    def tail(self, project_id: str, n: int = MAX_LOG_LINES) -> List[Dict[str, Any]]:
+        """Last n records, oldest first. Served from memory up to LOG_TAIL_CACHE."""
+        plog = self._project(project_id)
+        with plog.lock:
+            cached = list(plog.tail)
+            total = sum(seg.count for seg in plog.segments)
+        if n <= len(cached) or len(cached) >= total:
+            return cached[-n:] if n else []
+        return self._read_tail(plog, n)
+
+    def search(self, project_id: str, query: str, limit: int = 30) -> List[Dict[str, Any]]:
+        """Newest records whose content contains query (case-insensitive)."""
+        plog = self._project(project_id)
+        needle = query.lower()
+        matches = []
+        for seg in reversed(self._segments(plog)):
+            for record in reversed(list(self._iter_segment(plog, seg))):
+                if needle in record["content"].lower():
+                    matches.append(record)
+                    if len(matches) >= limit:
+                        return matches
+        return matches
+
+    def has_logs(self, project_id: str) -> bool:
+        plog = self._project(project_id)
+        with plog.lock:
+            return any(seg.count for seg in plog.segments)
+
+    # ── Retention & maintenance ──
+
+    def clear(self, project_id: str):
+        """Delete every segment of a project."""
+        plog = self._project(project_id)
+        with plog.lock:
+            if plog.handle is not None:
+                plog.handle.close()
+                plog.handle = None
+            shutil.rmtree(plog.directory, ignore_errors=True)
+            plog.segments = []
+            plog.tail.clear()
+
+    def drop_older_than(self, days: float) -> int:
+        """Delete whole segments whose newest line is older than `days`."""
+        cutoff = time.time() - days * 86400
+        dropped = 0
+        for plog in self._all_projects():
+            with plog.lock:
+                keep = []
+                for seg in plog.segments:
+                    if seg.count and seg.last_ts < cutoff:
+                        if not seg.sealed and plog.handle is not None:
+                            plog.handle.close()
+                            plog.handle = None
+                        seg.path.unlink(missing_ok=True)
+                        if seg.sealed:
+                            seg.path.with_name(seg.path.name[:-len(".log.gz")] + ".idx").unlink(missing_ok=True)
+                        dropped += 1
+                    else:
+                        keep.append(seg)
+                if not keep and plog.segments:
+                    # Keep numbering monotonic with an empty active segment
+                    last = plog.segments[-1]
+                    base_seq = last.last_seq + 1
+                    plog.segments = [LogSegment(base_seq, plog.directory / f"{base_seq:020d}.log")]
+                    plog.segments[0].path.touch()
+                else:
+                    plog.segments = keep
+                first = plog.segments[0].base_seq if plog.segments else 1
+                kept = [r for r in plog.tail if r["seq"] >= first]
+                plog.tail.clear()
+                plog.tail.extend(kept)
+        if dropped:
+            logger.info(f"Log store: dropped {dropped} segments older than {days} days")
+        return dropped
+
+    def import_rows(self, rows: List[Tuple[str, str, str, str]], batch: int = 5000) -> int:
+        """Import legacy (project_id, log_type, content, created_at) rows."""
+        pending = []
+        count = 0
+        for project_id, log_type, content, created_at in rows:
+            try:
+                ts = datetime.strptime(created_at, "%Y-%m-%d %H:%M:%S").replace(
+                    tzinfo=timezone.utc
+                ).timestamp()
+            except (TypeError, ValueError):
+                ts = time.time()
+            pending.append((project_id, log_type or "stdout", content, ts))
+            if len(pending) >= batch:
+                self.append_batch(pending)
+                count += len(pending)
+                pending = []
+        if pending:
+            self.append_batch(pending)
+            count += len(pending)
+        return count
+
+    def get_stats(self) -> Dict[str, int]:
+        stats = {"projects": 0, "segments": 0, "sealed": 0, "records": 0, "bytes": 0}
+        for plog in self._all_projects():
+            with plog.lock:
+                stats["projects"] += 1
+                for seg in plog.segments:
+                    stats["segments"] += 1
+                    stats["sealed"] += seg.sealed
+                    stats["records"] += seg.count
+                    stats["bytes"] += seg.size
+        return stats
+
+    def close(self):
+        with self._lock:
+            for plog in self._projects.values():
+                with plog.lock:
+                    if plog.handle is not None:
+                        plog.handle.close()
+                        plog.handle = None
+
+
+class ProcessLogWriter:
+    """
+    Group-commit writer for process output.
+    Output lines from every project are queued in memory and a background
+    thread appends them to the SegmentedLogStore in one batch every
+    LOG_FLUSH_INTERVAL seconds, or sooner once LOG_FLUSH_BATCH lines are
+    waiting. The queue is bounded; lines beyond LOG_QUEUE_MAX are dropped
+    and counted instead of growing memory without limit.
+    """
+
+    def __init__(
+        self,
+        store: SegmentedLogStore,
+        flush_interval: float = LOG_FLUSH_INTERVAL,
+        batch_size: int = LOG_FLUSH_BATCH,
+        max_queue: int = LOG_QUEUE_MAX,
+    ):
+        self._store = store
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_queue = max_queue
+        self._pending: deque = deque()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self.queued = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.batches = 0
+
+    def add(self, project_id: str, content: str, log_type: str = "stdout") -> bool:
+        """Queue one line; never blocks on disk. False if dropped."""
+        # Timestamp taken now rather than at flush time
+        created_at = time.time()
+        with self._cond:
+            if self._stopping or len(self._pending) >= self.max_queue:
+                self.dropped += 1
+                return False
+            self._pending.append((project_id, log_type, content, created_at))
+            self.queued += 1
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="process-log-writer", daemon=True
+                )
+                self._thread.start()
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._stopping or len(self._pending) >= self.batch_size,
+                    timeout=self.flush_interval,
+                )
+                if self._stopping:
+                    return
+            self.flush()
+
+    def flush(self) -> int:
+        """Append everything queued so far in one batch."""
+        with self._flush_lock:
+            with self._cond:
+                if not self._pending:
+                    return 0
+                rows = list(self._pending)
+                self._pending.clear()
+            try:
+                self._store.append_batch(rows)
+            except (OSError, ValueError) as e:
+                logger.error(f"Process log flush failed, {len(rows)} lines lost: {e}")
+                with self._cond:
+                    self.dropped += len(rows)
+                return 0
+            with self._cond:
+                self.flushed += len(rows)
+                self.batches += 1
+            return len(rows)
+
+    def stop(self):
+        """Stop the background thread and flush what is still queued."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout=10)
+        self.flush()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                "queued": self.queued,
+                "flushed": self.flushed,
+                "dropped": self.dropped,
+                "pending": len(self._pending),
+                "batches": self.batches,
+            }
+
+
+class UserCache:
+    """
+    TTL cache of user rows for the authorization decorators.
+    A cached row answers the authorized/banned checks without touching the
+    database until it is USER_CACHE_TTL seconds old. Ban and admin changes
+    made through DatabaseManager drop the entry straight away. The
+    last_active bump that every update used to write is collected here and
+    written for all users in one batch by flush_activity().
+    """
+
+    def __init__(self, database: AsyncDatabase, ttl: float = USER_CACHE_TTL):
+        self._adb = database
+        self.ttl = ttl
+        # user_id -> (loaded_at, row, (username, first_name, last_name))
+        self._entries: Dict[int, Tuple[float, Optional[sqlite3.Row], tuple]] = {}
+        self._activity: Dict[int, str] = {}
+        # Bumped on every invalidation so a load racing a ban is not cached
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        database.user_listeners.append(self.invalidate)
+
+    def invalidate(self, user_id: int = None):
+        """Forget one user, or everyone when user_id is None."""
+        self._generation += 1
+        if user_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(user_id, None)
+
+    async def authorize(self, user) -> Tuple[bool, bool]:
+        """Register the Telegram user and return (authorized, banned)."""
+        profile = (user.username, user.first_name, user.last_name)
+        entry = self._entries.get(user.id)
+        if entry and time.monotonic() - entry[0] < self.ttl and entry[2] == profile:
+            self.hits += 1
+            self._activity[user.id] = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+            row = entry[1]
+        else:
+            self.misses += 1
+            generation = self._generation
+            # A new or changed user is written right away, which also sets last_active
+            await self._adb.upsert_user(
+                user_id=user.id,
+                username=user.username,
+                first_name=user.first_name,
+                last_name=user.last_name,
+            )
+            row = await self._adb.get_user(user.id)
+            self._activity.pop(user.id, None)
+            if generation == self._generation:
+                self._entries[user.id] = (time.monotonic(), row, profile)
+        authorized = DatabaseManager.check_authorized(user.id, row)
+        return authorized, bool(row and row["is_banned"])
+
+    async def flush_activity(self) -> int:
+        """Write the coalesced last_active timestamps."""
+        if not self._activity:
+            return 0
+        pending, self._activity = self._activity, {}
+        await self._adb.touch_users([(ts, user_id) for user_id, ts in pending.items()])
+        return len(pending)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "cached": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "pending_activity": len(self._activity),
+        }
+
+
+class RetentionEngine:
+    """
+    Chunked retention for the history tables.
+    A table's policy prunes rows older than the days passed to run(),
+    unless it sets ignore_caller_days and its own max_age_days (None for
+    no age limit); it may also cap the rows kept per project. By default
+    only the tables cleanup_old_logs always pruned are touched; the
+    deployment log and notification policies are enabled through the
+    RETENTION_* settings. Old rows are deleted in rowid ranges of RETENTION_CHUNK_ROWS, one short
+    transaction per chunk with a RETENTION_PAUSE in between, so the writer
+    is never held for longer than a single chunk. Freed pages are handed
+    back with an incremental vacuum afterwards.
+    """
+
+    # Pruned by the caller's days, as cleanup_old_logs always did
+    POLICIES: Dict[str, Dict[str, Any]] = {
+        "system_stats": {},
+        "file_operations": {},
+    }
+
+    def __init__(
+        self,
+        manager: DatabaseManager,
+        chunk_rows: int = RETENTION_CHUNK_ROWS,
+        pause: float = RETENTION_PAUSE,
+        policies: Dict[str, Dict[str, Any]] = None,
+    ):
+        self._db = manager
+        self.chunk_rows = chunk_rows
+        self.pause = pause
+        self.policies = policies if policies is not None else self.default_policies()
+
+    @classmethod
+    def default_policies(cls) -> Dict[str, Dict[str, Any]]:
+        policies = {table: dict(policy) for table, policy in cls.POLICIES.items()}
+        if RETENTION_DEPLOYMENT_LOG_DAYS or RETENTION_DEPLOYMENT_LOG_ROWS:
+            policies["deployment_logs"] = {
+                "ignore_caller_days": True,
+                "max_age_days": RETENTION_DEPLOYMENT_LOG_DAYS,
+                "max_rows_per_project": RETENTION_DEPLOYMENT_LOG_ROWS,
+            }
+        if RETENTION_NOTIFICATION_DAYS:
+            policies["notifications"] = {
+                "ignore_caller_days": True,
+                "max_age_days": RETENTION_NOTIFICATION_DAYS,
+            }
+        return policies
+
+    def run(self, days: int = 7) -> Dict[str, int]:
+        """Apply every policy; returns rows deleted per table."""
+        deleted = {}
+        for table, policy in self.policies.items():
+            count = 0
+            max_age = policy.get("max_age_days") if policy.get("ignore_caller_days") else days
+            if max_age:
+                count += self.delete_older_than(table, max_age)
+            if policy.get("max_rows_per_project"):
+                count += self.trim_per_project(table, policy["max_rows_per_project"])
+            deleted[table] = count
+        if any(deleted.values()):
+            logger.info(f"Retention removed {sum(deleted.values())} rows: {deleted}")
+            self._db.incremental_vacuum()
+        return deleted
+
+    def delete_older_than(self, table: str, days: int) -> int:
+        """Delete rows with created_at older than `days`, one rowid range at a time."""
+        cutoff = self._db.fetchone("SELECT datetime('now', ?) AS cutoff", (f"-{days} days",))["cutoff"]
+        bounds = self._db.fetchone(
+            f"SELECT MIN(rowid) AS lo, MAX(rowid) AS hi FROM {table} WHERE created_at < ?",
+            (cutoff,),
+        )
+        if not bounds or bounds["lo"] is None:
+            return 0
+        deleted = 0
+        lo = bounds["lo"]
+        while lo <= bounds["hi"]:
+            hi = lo + self.chunk_rows
+            deleted += self._delete(
+                f"DELETE FROM {table} WHERE rowid >= ? AND rowid < ? AND created_at < ?",
+                (lo, hi, cutoff),
+            )
+            lo = hi
+        return deleted
+
+    def trim_per_project(self, table: str, max_rows: int) -> int:
+        """Keep only the newest `max_rows` rows of each project."""
+        over = self._db.fetchall(
+            f"SELECT project_id FROM {table} GROUP BY project_id HAVING COUNT(*) > ?",
+            (max_rows,),
+        )
+        deleted = 0
+        for row in over:
+            project_id = row["project_id"]
+            newest_dropped = self._db.fetchone(
+                f"SELECT rowid FROM {table} WHERE project_id = ? "
+                f"ORDER BY rowid DESC LIMIT 1 OFFSET ?",
+                (project_id, max_rows),
+            )
+            if not newest_dropped:
+                continue
+            while True:
+                count = self._delete(
+                    f"DELETE FROM {table} WHERE rowid IN ("
+                    f"SELECT rowid FROM {table} WHERE project_id = ? AND rowid <= ? LIMIT ?)",
+                    (project_id, newest_dropped[0], self.chunk_rows),
+                )
+                deleted += count
+                if count < self.chunk_rows:
+                    break
+        return deleted
+
+    def _delete(self, query: str, params: tuple) -> int:
+        """Run one chunk in its own transaction, then leave the writer free briefly."""
+        count = self._db.execute_rowcount(query, params)
+        time.sleep(self.pause)
+        return count
+
+
+# ── Global Database Instances ──
 db = DatabaseManager()
+adb = AsyncDatabase(db)
+log_store = SegmentedLogStore()
+log_writer = ProcessLogWriter(log_store)
+user_cache = UserCache(adb)
+retention = RetentionEngine(db)
+
+
+def import_legacy_process_logs(manager: DatabaseManager, store: SegmentedLogStore, batch: int = 5000) -> int:
+    """Move rows left in the old process_logs table into the segment store."""
+    last_id = 0
+    moved = 0
+    while True:
+        rows = manager.fetchall(
+            "SELECT id, project_id, log_type, content, created_at FROM process_logs "
+            "WHERE id > ? ORDER BY id LIMIT ?",
+            (last_id, batch),
+        )
+        if not rows:
+            break
+        moved += store.import_rows(
+            [(r["project_id"], r["log_type"], r["content"], r["created_at"]) for r in rows]
+        )
+        last_id = rows[-1]["id"]
+    if moved:
+        manager.execute("DELETE FROM process_logs WHERE id <= ?", (last_id,))
+        logger.info(f"Moved {moved} process log rows into {store.root}")
+    return moved
+
+
+async def cleanup_old_logs(days: int = 7):
+    """Apply log retention to the database tables and the segment store."""
+    await adb.run(retention.run, days)
+    await adb.run(log_store.drop_older_than, days)
 
 
 # ┌─────────────────────────────────────────────────────────────────────────────┐
@@ -1220,13 +2310,13 @@ class ProcessManager:
                 proc_info._reader_task = task
 
                 # Update database
-                db.update_project(
+                await adb.update_project(
                     project_id,
                     status="running",
                     pid=process.pid,
                     last_deployed=datetime.now().isoformat(),
                 )
-                db.execute(
+                await adb.execute(
                     "UPDATE projects SET deploy_count = deploy_count + 1 WHERE project_id = ?",
                     (project_id,),
                 )
@@ -1256,7 +2346,7 @@ class ProcessManager:
             if not proc_info.is_running:
                 # Clean up
                 del self._processes[project_id]
-                db.update_project(project_id, status="stopped", pid=None)
+                await adb.update_project(project_id, status="stopped", pid=None)
                 return True, "Process was already stopped"
 
             try:
@@ -1288,13 +2378,13 @@ class ProcessManager:
                 del self._processes[project_id]
 
                 # Update database
-                db.update_project(
+                await adb.update_project(
                     project_id,
                     status="stopped",
                     pid=None,
                     last_stopped=datetime.now().isoformat(),
                 )
-                db.execute(
+                await adb.execute(
                     "UPDATE projects SET total_runtime = total_runtime + ? WHERE project_id = ?",
                     (runtime, project_id),
                 )
@@ -1305,7 +2395,7 @@ class ProcessManager:
             except ProcessLookupError:
                 if project_id in self._processes:
                     del self._processes[project_id]
-                db.update_project(project_id, status="stopped", pid=None)
+                await adb.update_project(project_id, status="stopped", pid=None)
                 return True, "Process was already terminated"
             except Exception as e:
                 logger.error(f"Failed to stop process: {e}")
@@ -1332,7 +2422,7 @@ class ProcessManager:
             project_id, project_type, main_file, working_dir, env_vars
         )
         if success:
-            db.execute(
+            await adb.execute(
                 "UPDATE projects SET restart_count = restart_count + 1 WHERE project_id = ?",
                 (project_id,),
             )
@@ -1361,11 +2451,8 @@ class ProcessManager:
                         except Exception:
                             pass
 
-                        # Store in database (throttled)
-                        try:
-                            db.add_process_log(proc_info.project_id, log_entry)
-                        except Exception:
-                            pass
+                        # Store in database (group-committed in batches)
+                        log_writer.add(proc_info.project_id, log_entry)
                 else:
                     if not proc_info.is_running:
                         break
@@ -1384,23 +2471,23 @@ class ProcessManager:
                 final_msg = f"Process exited with code {exit_code} after {UI.format_uptime(runtime)}"
                 proc_info.log_buffer.append(f"[SYSTEM] {final_msg}")
 
-                db.update_project(
+                await adb.update_project(
                     proc_info.project_id,
                     status="crashed" if exit_code != 0 else "stopped",
                     pid=None,
                     last_stopped=datetime.now().isoformat(),
                 )
-                db.execute(
+                await adb.execute(
                     "UPDATE projects SET total_runtime = total_runtime + ? WHERE project_id = ?",
                     (runtime, proc_info.project_id),
                 )
                 if exit_code != 0:
-                    db.execute(
+                    await adb.execute(
                         "UPDATE projects SET error_count = error_count + 1 WHERE project_id = ?",
                         (proc_info.project_id,),
                     )
 
-                db.log_deployment(
+                await adb.log_deployment(
                     proc_info.project_id,
                     0,
                     "auto_stop",
@@ -1415,14 +2502,14 @@ class ProcessManager:
                     f"Process ended: {proc_info.project_id} (exit={exit_code})"
                 )
 
-    def get_logs(self, project_id: str, lines: int = 50) -> List[str]:
+    async def get_logs(self, project_id: str, lines: int = 50) -> List[str]:
         """Get recent log lines from buffer."""
         proc_info = self._processes.get(project_id)
         if proc_info:
             return list(proc_info.log_buffer)[-lines:]
-        # Fall back to database
-        rows = db.get_process_logs(project_id, limit=lines)
-        return [r["content"] for r in reversed(rows)]
+        # Fall back to the log store
+        records = await adb.run(log_store.tail, project_id, lines)
+        return [r["content"] for r in records]
 
     def get_all_running(self) -> Dict[str, ProcessInfo]:
         """Get all running processes."""
@@ -1551,7 +2638,7 @@ class SystemMonitor:
         }
 
     @classmethod
-    def save_snapshot(cls):
+    async def save_snapshot(cls):
         """Save current system stats to database."""
         cpu = cls.get_cpu_info()
         mem = cls.get_memory_info()
@@ -1576,7 +2663,7 @@ class SystemMonitor:
             "active_procs": process_manager.running_count,
             "load_avg": load_str,
         }
-        db.save_system_stats(stats)
+        await adb.save_system_stats(stats)
 
 
 # ── Global System Monitor ──
@@ -1808,16 +2895,10 @@ def authorized(func: Callable) -> Callable:
         if not user:
             return
 
-        # Register/update user
-        db.upsert_user(
-            user_id=user.id,
-            username=user.username,
-            first_name=user.first_name,
-            last_name=user.last_name,
-        )
+        # Register/update user and check authorization (cached)
+        is_authorized, is_banned = await user_cache.authorize(user)
 
-        # Check authorization
-        if not db.is_user_authorized(user.id):
+        if not is_authorized:
             text = (
                 f"{Emoji.LOCK} {Fonts.small_caps('access denied')}\n\n"
                 f"{UI.DIVIDER_THIN}\n\n"
@@ -1839,8 +2920,7 @@ def authorized(func: Callable) -> Callable:
             return
 
         # Check if banned
-        user_data = db.get_user(user.id)
-        if user_data and user_data["is_banned"]:
+        if is_banned:
             text = (
                 f"{Emoji.ERROR} {Fonts.small_caps('you have been banned')}\n\n"
                 f"{UI.BULLET} {Fonts.small_caps('contact')} {OWNER_USERNAME}\n"
@@ -1919,11 +2999,11 @@ class MenuBuilder:
     """Builds all bot menus and inline keyboards."""
 
     @staticmethod
-    def get_main_menu_text(user_first_name: str, user_id: int) -> str:
+    async def get_main_menu_text(user_first_name: str, user_id: int) -> str:
         """Generate the beautiful main menu text."""
         running = process_manager.running_count
-        total_projects = len(db.get_user_projects(user_id))
-        unread = db.get_unread_count(user_id)
+        total_projects = len(await adb.get_user_projects(user_id))
+        unread = await adb.get_unread_count(user_id)
 
         # System quick stats
         cpu = psutil.cpu_percent(interval=0.1)
@@ -1958,10 +3038,10 @@ class MenuBuilder:
         return text
 
     @staticmethod
-    def get_main_menu_keyboard(user_id: int) -> InlineKeyboardMarkup:
+    async def get_main_menu_keyboard(user_id: int) -> InlineKeyboardMarkup:
         """Generate the main menu inline keyboard."""
         is_owner = user_id == OWNER_ID
-        unread = db.get_unread_count(user_id)
+        unread = await adb.get_unread_count(user_id)
         notif_text = f"{Emoji.BELL} ɴᴏᴛɪғɪᴄᴀᴛɪᴏɴs ({unread})" if unread > 0 else f"{Emoji.BELL} ɴᴏᴛɪғɪᴄᴀᴛɪᴏɴs"
 
         keyboard = [
@@ -2127,8 +3207,8 @@ async def start_command(
 ) -> None:
     """Handle /start command - Show main menu."""
     user = update.effective_user
-    text = menu.get_main_menu_text(user.first_name, user.id)
-    keyboard = menu.get_main_menu_keyboard(user.id)
+    text = await menu.get_main_menu_text(user.first_name, user.id)
+    keyboard = await menu.get_main_menu_keyboard(user.id)
 
     if update.message:
         await update.message.reply_text(text, reply_markup=keyboard)
@@ -2263,7 +3343,7 @@ async def status_command(
 ) -> None:
     """Handle /status command - Show running processes."""
     user = update.effective_user
-    projects = db.get_user_projects(user.id)
+    projects = await adb.get_user_projects(user.id)
 
     if not projects:
         text = (
@@ -2332,8 +3412,8 @@ async def callback_router(
 
     # ── Main Menu ──
     if data == "menu_main" or data == "menu_refresh":
-        text = menu.get_main_menu_text(user.first_name, user.id)
-        keyboard = menu.get_main_menu_keyboard(user.id)
+        text = await menu.get_main_menu_text(user.first_name, user.id)
+        keyboard = await menu.get_main_menu_keyboard(user.id)
         try:
             await query.edit_message_text(text, reply_markup=keyboard)
         except BadRequest:
@@ -2437,7 +3517,7 @@ async def show_deploy_console(
 ) -> None:
     """Show the deploy console with project list."""
     user = update.effective_user
-    projects = db.get_user_projects(user.id)
+    projects = await adb.get_user_projects(user.id)
     query = update.callback_query
 
     text = (
@@ -2510,7 +3590,7 @@ async def handle_deploy_action(
 
     if data.startswith("deploy_select_"):
         project_id = data.replace("deploy_select_", "")
-        project = db.get_project(project_id)
+        project = await adb.get_project(project_id)
 
         if not project:
             await query.answer("❌ Project not found!", show_alert=True)
@@ -2637,7 +3717,7 @@ async def handle_deploy_action(
 
     elif data.startswith("deploy_start_"):
         project_id = data.replace("deploy_start_", "")
-        project = db.get_project(project_id)
+        project = await adb.get_project(project_id)
         if not project:
             await query.answer("❌ Project not found!", show_alert=True)
             return
@@ -2665,7 +3745,7 @@ async def handle_deploy_action(
             env_vars=env_vars if env_vars else None,
         )
 
-        db.log_deployment(
+        await adb.log_deployment(
             project_id,
             user.id,
             "start",
@@ -2674,7 +3754,7 @@ async def handle_deploy_action(
         )
 
         if success:
-            db.add_notification(
+            await adb.add_notification(
                 user.id,
                 "Deploy Success",
                 f"Project '{project['project_name']}' started successfully.",
@@ -2712,13 +3792,13 @@ async def handle_deploy_action(
 
     elif data.startswith("deploy_stop_"):
         project_id = data.replace("deploy_stop_", "")
-        project = db.get_project(project_id)
+        project = await adb.get_project(project_id)
         if not project:
             await query.answer("❌ Project not found!", show_alert=True)
             return
 
         success, msg = await process_manager.stop_process(project_id)
-        db.log_deployment(
+        await adb.log_deployment(
             project_id, user.id, "stop", "success" if success else "failed", msg
         )
 
@@ -2749,7 +3829,7 @@ async def handle_deploy_action(
 
     elif data.startswith("deploy_restart_"):
         project_id = data.replace("deploy_restart_", "")
-        project = db.get_project(project_id)
+        project = await adb.get_project(project_id)
         if not project:
             await query.answer("❌ Project not found!", show_alert=True)
             return
@@ -2765,7 +3845,7 @@ async def handle_deploy_action(
             project_id, project["project_type"], project["main_file"],
             project["directory"], env_vars if env_vars else None,
         )
-        db.log_deployment(
+        await adb.log_deployment(
             project_id, user.id, "restart", "success" if success else "failed", msg
         )
 
@@ -2807,7 +3887,7 @@ async def handle_deploy_action(
 
     elif data.startswith("deploy_detect_"):
         project_id = data.replace("deploy_detect_", "")
-        project = db.get_project(project_id)
+        project = await adb.get_project(project_id)
         if not project:
             await query.answer("❌ Project not found!", show_alert=True)
             return
@@ -2817,7 +3897,7 @@ async def handle_deploy_action(
         )
 
         if main_file:
-            db.update_project(
+            await adb.update_project(
                 project_id, project_type=proj_type, main_file=main_file
             )
             await query.answer(
@@ -2837,12 +3917,12 @@ async def handle_deploy_action(
 
     elif data.startswith("deploy_history_"):
         project_id = data.replace("deploy_history_", "")
-        project = db.get_project(project_id)
+        project = await adb.get_project(project_id)
         if not project:
             await query.answer("❌ Project not found!", show_alert=True)
             return
 
-        logs = db.get_deployment_logs(project_id, limit=15)
+        logs = await adb.get_deployment_logs(project_id, limit=15)
 
         text = (
             f"{Emoji.LOG} {Fonts.bold('DEPLOYMENT HISTORY')} {Emoji.LOG}\n"
@@ -2899,7 +3979,7 @@ async def show_file_manager(
     """Show file manager with project selection."""
     user = update.effective_user
     query = update.callback_query
-    projects = db.get_user_projects(user.id)
+    projects = await adb.get_user_projects(user.id)
 
     text = (
         f"{Emoji.FOLDER} {Fonts.bold('FILE MANAGER')} {Emoji.FOLDER}\n"
@@ -2978,7 +4058,7 @@ async def handle_file_action(
         project_id = parts[0]
         sub_path = parts[1] if len(parts) > 1 else ""
 
-        project = db.get_project(project_id)
+        project = await adb.get_project(project_id)
         if not project:
             await query.answer("❌ Project not found!", show_alert=True)
             return
@@ -3099,7 +4179,7 @@ async def handle_file_action(
         project_id = parts[0]
         file_rel = parts[1] if len(parts) > 1 else ""
 
-        project = db.get_project(project_id)
+        project = await adb.get_project(project_id)
         if not project:
             await query.answer("❌ Project not found!", show_alert=True)
             return
@@ -3195,7 +4275,7 @@ async def handle_file_action(
         project_id = parts[0]
         file_rel = parts[1] if len(parts) > 1 else ""
 
-        project = db.get_project(project_id)
+        project = await adb.get_project(project_id)
         if not project:
             await query.answer("❌ Project not found!", show_alert=True)
             return
@@ -3224,7 +4304,7 @@ async def handle_file_action(
                         f"{UI.BULLET} {UI.format_bytes(file_path.stat().st_size)}"
                     ),
                 )
-            db.log_file_operation(
+            await adb.log_file_operation(
                 user.id, "download", str(file_rel), project_id,
                 file_path.stat().st_size, "success",
             )
@@ -3236,7 +4316,7 @@ async def handle_file_action(
         project_id = parts[0]
         file_rel = parts[1] if len(parts) > 1 else ""
 
-        project = db.get_project(project_id)
+        project = await adb.get_project(project_id)
         if not project:
             await query.answer("❌ Project not found!", show_alert=True)
             return
@@ -3342,7 +4422,7 @@ async def show_logs_menu(
     """Show logs menu with project selection."""
     user = update.effective_user
     query = update.callback_query
-    projects = db.get_user_projects(user.id)
+    projects = await adb.get_user_projects(user.id)
 
     text = (
         f"{Emoji.LOG} {Fonts.bold('LIVE LOGS')} {Emoji.LOG}\n"
@@ -3384,8 +4464,7 @@ async def show_logs_menu(
     if stopped_projects:
         text += f"{Emoji.OFFLINE} {Fonts.small_caps('stopped (history available)')}:\n\n"
         for proj in stopped_projects:
-            log_rows = db.get_process_logs(proj["project_id"], limit=1)
-            has_logs = len(log_rows) > 0
+            has_logs = await adb.run(log_store.has_logs, proj["project_id"])
             if has_logs:
                 text += f"  {Emoji.OFFLINE} {proj['project_name']}\n"
                 buttons.append(
@@ -3427,14 +4506,14 @@ async def handle_log_action(
 
     if data.startswith("log_view_"):
         project_id = data.replace("log_view_", "")
-        project = db.get_project(project_id)
+        project = await adb.get_project(project_id)
 
         if not project:
             await query.answer("❌ Project not found!", show_alert=True)
             return
 
         is_running = process_manager.is_running(project_id)
-        logs = process_manager.get_logs(project_id, lines=30)
+        logs = await process_manager.get_logs(project_id, lines=30)
 
         status_icon = Emoji.ONLINE if is_running else Emoji.OFFLINE
         status_text = Fonts.small_caps("live") if is_running else Fonts.small_caps("history")
@@ -3494,13 +4573,13 @@ async def handle_log_action(
 
     elif data.startswith("log_clear_"):
         project_id = data.replace("log_clear_", "")
-        project = db.get_project(project_id)
+        project = await adb.get_project(project_id)
         if not project:
             await query.answer("❌ Project not found!", show_alert=True)
             return
 
-        # Clear database logs
-        db.clear_process_logs(project_id)
+        # Clear stored logs
+        await adb.run(log_store.clear, project_id)
 
         # Clear buffer if process exists
         proc = process_manager.get_process(project_id)
@@ -3520,16 +4599,16 @@ async def handle_log_action(
 
     elif data.startswith("log_export_"):
         project_id = data.replace("log_export_", "")
-        project = db.get_project(project_id)
+        project = await adb.get_project(project_id)
         if not project:
             await query.answer("❌ Project not found!", show_alert=True)
             return
 
         # Get all logs
-        logs = process_manager.get_logs(project_id, lines=MAX_LOG_LINES)
-        db_logs = db.get_process_logs(project_id, limit=500)
+        logs = await process_manager.get_logs(project_id, lines=MAX_LOG_LINES)
+        stored_logs = await adb.run(log_store.tail, project_id, 500)
 
-        all_logs = [r["content"] for r in reversed(db_logs)]
+        all_logs = [r["content"] for r in stored_logs]
         if not all_logs:
             all_logs = logs
 
@@ -3568,7 +4647,7 @@ async def show_projects_menu(
     """Show all user projects with details."""
     user = update.effective_user
     query = update.callback_query
-    projects = db.get_user_projects(user.id)
+    projects = await adb.get_user_projects(user.id)
 
     text = (
         f"{Emoji.PACKAGE} {Fonts.bold('MY PROJECTS')} {Emoji.PACKAGE}\n"
@@ -3653,7 +4732,7 @@ async def handle_project_action(
 
     if data.startswith("proj_detail_"):
         project_id = data.replace("proj_detail_", "")
-        project = db.get_project(project_id)
+        project = await adb.get_project(project_id)
 
         if not project:
             await query.answer("❌ Project not found!", show_alert=True)
@@ -3751,7 +4830,7 @@ async def handle_project_action(
 
     elif data.startswith("proj_env_"):
         project_id = data.replace("proj_env_", "")
-        project = db.get_project(project_id)
+        project = await adb.get_project(project_id)
 
         if not project:
             await query.answer("❌ Project not found!", show_alert=True)
@@ -3798,7 +4877,7 @@ async def handle_project_action(
 
     elif data.startswith("proj_edit_"):
         project_id = data.replace("proj_edit_", "")
-        project = db.get_project(project_id)
+        project = await adb.get_project(project_id)
 
         if not project:
             await query.answer("❌ Project not found!", show_alert=True)
@@ -3880,7 +4959,7 @@ async def handle_project_action(
             return
 
         project_id, proj_type, main_file = parts
-        db.update_project(project_id, project_type=proj_type, main_file=main_file)
+        await adb.update_project(project_id, project_type=proj_type, main_file=main_file)
         await query.answer(f"✅ Main file set to: {main_file} ({proj_type})", show_alert=True)
 
         # Refresh
@@ -3968,7 +5047,7 @@ async def handle_document_upload(
         return
 
     # Check project limit
-    project_count = db.get_project_count(user.id)
+    project_count = await adb.get_project_count(user.id)
     if project_count >= MAX_PROJECTS:
         await message.reply_text(
             f"{Emoji.ERROR} {Fonts.small_caps('project limit reached')}\n\n"
@@ -4040,7 +5119,7 @@ async def handle_document_upload(
         proj_type, main_file = file_manager.detect_project_type(project_dir)
 
         # Step 5: Save to database
-        db.create_project(
+        await adb.create_project(
             project_id=project_id,
             user_id=user.id,
             project_name=project_name,
@@ -4049,12 +5128,12 @@ async def handle_document_upload(
             main_file=main_file,
         )
 
-        db.log_file_operation(
+        await adb.log_file_operation(
             user.id, "upload", filename, project_id, file_size, "success",
             f"Extracted {file_count} files",
         )
 
-        db.add_notification(
+        await adb.add_notification(
             user.id,
             "Project Uploaded",
             f"Project '{project_name}' uploaded successfully with {file_count} files.",
@@ -4141,8 +5220,8 @@ async def show_notifications(
     """Show user notifications."""
     user = update.effective_user
     query = update.callback_query
-    notifications = db.get_notifications(user.id, limit=15)
-    unread = db.get_unread_count(user.id)
+    notifications = await adb.get_notifications(user.id, limit=15)
+    unread = await adb.get_unread_count(user.id)
 
     text = (
         f"{Emoji.BELL} {Fonts.bold('NOTIFICATIONS')} {Emoji.BELL}\n"
@@ -4211,7 +5290,7 @@ async def handle_notification_action(
     user = update.effective_user
 
     if data == "notif_markall":
-        db.mark_all_notifications_read(user.id)
+        await adb.mark_all_notifications_read(user.id)
         await query.answer("✅ All notifications marked as read!", show_alert=True)
         # Refresh
         update.callback_query.data = "menu_notifications"
@@ -4228,7 +5307,7 @@ async def show_settings(
     """Show user settings."""
     user = update.effective_user
     query = update.callback_query
-    user_data = db.get_user(user.id)
+    user_data = await adb.get_user(user.id)
 
     notifications_enabled = user_data["notifications"] if user_data else 1
     theme = user_data["theme"] if user_data else "default"
@@ -4290,10 +5369,10 @@ async def handle_settings_action(
     user = update.effective_user
 
     if data == "set_toggle_notif":
-        user_data = db.get_user(user.id)
+        user_data = await adb.get_user(user.id)
         current = user_data["notifications"] if user_data else 1
         new_val = 0 if current else 1
-        db.execute(
+        await adb.execute(
             "UPDATE users SET notifications = ? WHERE user_id = ?",
             (new_val, user.id),
         )
@@ -4302,7 +5381,7 @@ async def handle_settings_action(
         await show_settings(update, context)
 
     elif data == "set_cleanup_logs":
-        db.cleanup_old_logs(days=7)
+        await cleanup_old_logs(days=7)
         await query.answer("✅ Old logs cleaned up (7+ days)!", show_alert=True)
         await show_settings(update, context)
 
@@ -4318,10 +5397,10 @@ async def show_admin_panel(
     """Show admin panel (owner only)."""
     query = update.callback_query
 
-    all_users = db.get_all_users()
-    all_projects = db.get_all_projects()
+    all_users = await adb.get_all_users()
+    all_projects = await adb.get_all_projects()
     running = process_manager.running_count
-    db_size = db.get_db_size()
+    db_size = await adb.get_db_size()
 
     text = (
         f"{Emoji.CROWN} {Fonts.bold('ADMIN PANEL')} {Emoji.CROWN}\n"
@@ -4410,7 +5489,7 @@ async def handle_admin_action(
         return
 
     if data == "admin_users":
-        users = db.get_all_users()
+        users = await adb.get_all_users()
 
         text = (
             f"{Emoji.USERS} {Fonts.bold('USER MANAGEMENT')} {Emoji.USERS}\n"
@@ -4452,7 +5531,7 @@ async def handle_admin_action(
             pass
 
     elif data == "admin_all_projects":
-        projects = db.get_all_projects()
+        projects = await adb.get_all_projects()
 
         text = (
             f"{Emoji.PACKAGE} {Fonts.bold('ALL PROJECTS')} {Emoji.PACKAGE}\n"
@@ -4491,13 +5570,13 @@ async def handle_admin_action(
 
     elif data == "admin_db_optimize":
         try:
-            db.vacuum()
-            await query.answer("✅ Database optimized!", show_alert=True)
+            freed = await adb.incremental_vacuum()
+            await query.answer(f"✅ Database optimized! {freed} pages freed", show_alert=True)
         except Exception as e:
             await query.answer(f"❌ Error: {str(e)[:50]}", show_alert=True)
 
     elif data == "admin_cleanup":
-        db.cleanup_old_logs(days=3)
+        await cleanup_old_logs(days=3)
         await query.answer("✅ Old data cleaned up!", show_alert=True)
         await show_admin_panel(update, context)
 
@@ -4513,27 +5592,26 @@ async def show_database_info(
     """Show database information."""
     query = update.callback_query
 
-    db_size = db.get_db_size()
-    user_count = len(db.get_all_users())
-    project_count = len(db.get_all_projects())
+    db_size = await adb.get_db_size()
+    user_count = len(await adb.get_all_users())
+    project_count = len(await adb.get_all_projects())
 
     # Count records in each table
     tables = {
-        "users": db.fetchone("SELECT COUNT(*) as cnt FROM users"),
-        "projects": db.fetchone("SELECT COUNT(*) as cnt FROM projects"),
-        "deployment_logs": db.fetchone("SELECT COUNT(*) as cnt FROM deployment_logs"),
-        "process_logs": db.fetchone("SELECT COUNT(*) as cnt FROM process_logs"),
-        "file_operations": db.fetchone("SELECT COUNT(*) as cnt FROM file_operations"),
-        "system_stats": db.fetchone("SELECT COUNT(*) as cnt FROM system_stats"),
-        "notifications": db.fetchone("SELECT COUNT(*) as cnt FROM notifications"),
-        "scheduled_tasks": db.fetchone("SELECT COUNT(*) as cnt FROM scheduled_tasks"),
+        "users": await adb.fetchone("SELECT COUNT(*) as cnt FROM users"),
+        "projects": await adb.fetchone("SELECT COUNT(*) as cnt FROM projects"),
+        "deployment_logs": await adb.fetchone("SELECT COUNT(*) as cnt FROM deployment_logs"),
+        "file_operations": await adb.fetchone("SELECT COUNT(*) as cnt FROM file_operations"),
+        "system_stats": await adb.fetchone("SELECT COUNT(*) as cnt FROM system_stats"),
+        "notifications": await adb.fetchone("SELECT COUNT(*) as cnt FROM notifications"),
+        "scheduled_tasks": await adb.fetchone("SELECT COUNT(*) as cnt FROM scheduled_tasks"),
     }
 
     text = (
         f"{Emoji.DATABASE} {Fonts.bold('DATABASE INFO')} {Emoji.DATABASE}\n"
         f"{UI.DIVIDER_STAR}\n\n"
         f"  {Emoji.DISK} {Fonts.small_caps('size')}: {UI.format_bytes(db_size)}\n"
-        f"  {Emoji.GEAR} {Fonts.small_caps('schema version')}: {DatabaseManager.SCHEMA_VERSION}\n"
+        f"  {Emoji.GEAR} {Fonts.small_caps('schema version')}: {await adb.get_schema_version()}\n"
         f"  {Emoji.FILE} {Fonts.small_caps('path')}: {DATABASE_PATH.name}\n\n"
         f"{UI.DIVIDER_THIN}\n\n"
         f"  {Fonts.small_caps('table records')}:\n\n"
@@ -4543,6 +5621,35 @@ async def show_database_info(
         count = row["cnt"] if row else 0
         text += f"    {UI.TRIANGLE} {Fonts.small_caps(table_name)}: {Fonts.bold(str(count))}\n"
 
+    log_stats = log_writer.get_stats()
+    text += (
+        f"\n  {Fonts.small_caps('process log writer')}: "
+        f"{log_stats['flushed']} written in {log_stats['batches']} batches, "
+        f"{log_stats['pending']} pending, {log_stats['dropped']} dropped\n"
+    )
+    cache_stats = user_cache.get_stats()
+    text += (
+        f"  {Fonts.small_caps('user cache')}: "
+        f"{cache_stats['cached']} cached, {cache_stats['hits']} hits, "
+        f"{cache_stats['misses']} misses\n"
+    )
+    store_stats = await adb.run(log_store.get_stats)
+    text += (
+        f"  {Fonts.small_caps('process log store')}: "
+        f"{store_stats['records']} lines in {store_stats['segments']} segments "
+        f"({store_stats['sealed']} sealed), {UI.format_bytes(store_stats['bytes'])}\n"
+    )
+
+    # Time spent waiting for the writer lock and for a pooled reader
+    lock_stats = await adb.get_lock_stats()
+    text += f"\n{UI.DIVIDER_THIN}\n\n  {Fonts.small_caps('lock waits')}:\n\n"
+    for kind, stats in lock_stats.items():
+        text += (
+            f"    {UI.TRIANGLE} {Fonts.small_caps(kind)}: "
+            f"avg {stats['wait_avg'] * 1000:.2f}ms, max {stats['wait_max'] * 1000:.1f}ms "
+            f"({int(stats['count'])} ops)\n"
+        )
+
     text += f"\n{UI.DIVIDER_STAR}"
 
     buttons = [
@@ -4590,7 +5697,7 @@ async def handle_confirmation(
 
     if data.startswith("confirm_delete_proj_"):
         project_id = data.replace("confirm_delete_proj_", "")
-        project = db.get_project(project_id)
+        project = await adb.get_project(project_id)
 
         if not project:
             await query.answer("❌ Project not found!", show_alert=True)
@@ -4629,7 +5736,7 @@ async def handle_confirmation(
 
     elif data.startswith("confirm_yes_delproj_"):
         project_id = data.replace("confirm_yes_delproj_", "")
-        project = db.get_project(project_id)
+        project = await adb.get_project(project_id)
 
         if not project:
             await query.answer("❌ Project not found!", show_alert=True)
@@ -4648,11 +5755,12 @@ async def handle_confirmation(
         log_file = LOGS_DIR / f"{project_id}.log"
         log_file.unlink(missing_ok=True)
 
-        # Delete from database
+        # Delete from database and log store
         project_name = project["project_name"]
-        db.delete_project(project_id)
+        await adb.delete_project(project_id)
+        await adb.run(log_store.clear, project_id)
 
-        db.log_file_operation(
+        await adb.log_file_operation(
             user.id, "delete_project", project_name, project_id, 0, "success",
         )
 
@@ -4675,7 +5783,7 @@ async def handle_confirmation(
         project_id = parts[0]
         file_rel = parts[1] if len(parts) > 1 else ""
 
-        project = db.get_project(project_id)
+        project = await adb.get_project(project_id)
         if not project:
             await query.answer("❌ Project not found!", show_alert=True)
             return
@@ -4715,7 +5823,7 @@ async def handle_confirmation(
         project_id = parts[0]
         file_rel = parts[1] if len(parts) > 1 else ""
 
-        project = db.get_project(project_id)
+        project = await adb.get_project(project_id)
         if not project:
             await query.answer("❌ Project not found!", show_alert=True)
             return
@@ -4724,7 +5832,7 @@ async def handle_confirmation(
         success, msg = file_manager.delete_path(file_path)
 
         if success:
-            db.log_file_operation(
+            await adb.log_file_operation(
                 user.id, "delete", file_rel, project_id, 0, "success",
             )
             await query.answer(f"✅ {msg}", show_alert=True)
@@ -4744,7 +5852,7 @@ async def handle_confirmation(
         project_id = parts[0]
         dir_rel = parts[1] if len(parts) > 1 else ""
 
-        project = db.get_project(project_id)
+        project = await adb.get_project(project_id)
         if not project:
             await query.answer("❌ Project not found!", show_alert=True)
             return
@@ -4783,7 +5891,7 @@ async def handle_confirmation(
         project_id = parts[0]
         dir_rel = parts[1] if len(parts) > 1 else ""
 
-        project = db.get_project(project_id)
+        project = await adb.get_project(project_id)
         if not project:
             await query.answer("❌ Project not found!", show_alert=True)
             return
@@ -4792,7 +5900,7 @@ async def handle_confirmation(
         success, msg = file_manager.delete_path(dir_path)
 
         if success:
-            db.log_file_operation(
+            await adb.log_file_operation(
                 user.id, "delete_dir", dir_rel, project_id, 0, "success",
             )
             await query.answer(f"✅ {msg}", show_alert=True)
@@ -4860,7 +5968,7 @@ async def deploy_command(
 ) -> None:
     """Handle /deploy command."""
     user = update.effective_user
-    projects = db.get_user_projects(user.id)
+    projects = await adb.get_user_projects(user.id)
 
     text = (
         f"{Emoji.DEPLOY} {Fonts.bold('DEPLOY CONSOLE')} {Emoji.DEPLOY}\n"
@@ -4900,7 +6008,7 @@ async def logs_command(
 ) -> None:
     """Handle /logs command."""
     user = update.effective_user
-    projects = db.get_user_projects(user.id)
+    projects = await adb.get_user_projects(user.id)
 
     buttons = []
     for proj in projects:
@@ -4942,7 +6050,7 @@ async def files_command(
     """Handle /files command."""
     # Create a fake callback query context and route
     user = update.effective_user
-    projects = db.get_user_projects(user.id)
+    projects = await adb.get_user_projects(user.id)
 
     buttons = []
     for proj in projects:
@@ -5016,7 +6124,7 @@ async def adduser_command(
     try:
         target_id = int(args[0])
         ALLOWED_USERS.add(target_id)
-        db.set_admin(target_id, True)
+        await adb.set_admin(target_id, True)
         await update.message.reply_text(
             f"{Emoji.SUCCESS} {Fonts.small_caps('user')} {target_id} {Fonts.small_caps('authorized!')}"
         )
@@ -5046,7 +6154,7 @@ async def ban_command(
                 f"{Emoji.ERROR} {Fonts.small_caps('cannot ban the owner!')}"
             )
             return
-        db.ban_user(target_id)
+        await adb.ban_user(target_id)
         ALLOWED_USERS.discard(target_id)
         await update.message.reply_text(
             f"{Emoji.SUCCESS} {Fonts.small_caps('user')} {target_id} {Fonts.small_caps('banned!')}"
@@ -5063,10 +6171,10 @@ async def stats_command(
     update: Update, context: ContextTypes.DEFAULT_TYPE
 ) -> None:
     """Handle /stats command - Show bot statistics."""
-    users = db.get_all_users()
-    projects = db.get_all_projects()
+    users = await adb.get_all_users()
+    projects = await adb.get_all_projects()
     running = process_manager.running_count
-    db_size = db.get_db_size()
+    db_size = await adb.get_db_size()
 
     total_deploys = sum(p["deploy_count"] for p in projects)
     total_errors = sum(p["error_count"] for p in projects)
@@ -5111,7 +6219,7 @@ async def setenv_command(
         )
         return
 
-    project = db.get_project(project_id)
+    project = await adb.get_project(project_id)
     if not project:
         await update.message.reply_text(
             f"{Emoji.ERROR} {Fonts.small_caps('project not found!')}"
@@ -5121,7 +6229,7 @@ async def setenv_command(
     key, value = kv.split("=", 1)
     env_vars = json.loads(project["env_vars"] or "{}")
     env_vars[key.strip()] = value.strip()
-    db.update_project(project_id, env_vars=json.dumps(env_vars))
+    await adb.update_project(project_id, env_vars=json.dumps(env_vars))
 
     await update.message.reply_text(
         f"{Emoji.SUCCESS} {Fonts.small_caps('env var set')}!\n"
@@ -5146,7 +6254,7 @@ async def setmain_command(
     project_id = args[0]
     main_file = args[1]
 
-    project = db.get_project(project_id)
+    project = await adb.get_project(project_id)
     if not project:
         await update.message.reply_text(
             f"{Emoji.ERROR} {Fonts.small_caps('project not found!')}"
@@ -5166,7 +6274,7 @@ async def setmain_command(
     type_map = {".py": "python", ".js": "nodejs", ".java": "java"}
     proj_type = type_map.get(ext, project["project_type"])
 
-    db.update_project(project_id, main_file=main_file, project_type=proj_type)
+    await adb.update_project(project_id, main_file=main_file, project_type=proj_type)
 
     await update.message.reply_text(
         f"{Emoji.SUCCESS} {Fonts.small_caps('main file set')}!\n"
@@ -5183,15 +6291,15 @@ async def health_check_job(context: ContextTypes.DEFAULT_TYPE) -> None:
     """Periodic health check job - monitors running processes."""
     try:
         # Save system stats
-        system_monitor.save_snapshot()
+        await system_monitor.save_snapshot()
 
         # Check for crashed processes
-        running_projects = db.get_running_projects()
+        running_projects = await adb.get_running_projects()
         for proj in running_projects:
             project_id = proj["project_id"]
             if not process_manager.is_running(project_id):
                 # Process crashed but DB still shows running
-                db.update_project(
+                await adb.update_project(
                     project_id,
                     status="crashed",
                     pid=None,
@@ -5208,7 +6316,7 @@ async def health_check_job(context: ContextTypes.DEFAULT_TYPE) -> None:
                         proj["directory"],
                         env_vars if env_vars else None,
                     )
-                    db.log_deployment(
+                    await adb.log_deployment(
                         project_id, 0, "auto_restart",
                         "success" if success else "failed", msg,
                     )
@@ -5217,7 +6325,7 @@ async def health_check_job(context: ContextTypes.DEFAULT_TYPE) -> None:
                     )
 
                     # Notify owner
-                    db.add_notification(
+                    await adb.add_notification(
                         proj["user_id"],
                         "Auto-Restart",
                         f"Project '{proj['project_name']}' was auto-restarted. Status: {'success' if success else 'failed'}",
@@ -5228,10 +6336,18 @@ async def health_check_job(context: ContextTypes.DEFAULT_TYPE) -> None:
         logger.error(f"Health check error: {e}")
 
 
+async def user_activity_job(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Write the batched last_active updates."""
+    try:
+        await user_cache.flush_activity()
+    except Exception as e:
+        logger.error(f"User activity flush error: {e}")
+
+
 async def cleanup_job(context: ContextTypes.DEFAULT_TYPE) -> None:
     """Periodic cleanup job."""
     try:
-        db.cleanup_old_logs(days=7)
+        await cleanup_old_logs(days=7)
 
         # Clean temp directory
         for item in TEMP_DIR.iterdir():
@@ -5293,15 +6409,27 @@ async def post_init(application: Application) -> None:
             first=300,
             name="cleanup",
         )
+        job_queue.run_repeating(
+            user_activity_job,
+            interval=USER_ACTIVITY_FLUSH_INTERVAL,
+            first=USER_ACTIVITY_FLUSH_INTERVAL,
+            name="user_activity",
+        )
+
+    # One-time move of process_logs rows into the segment store
+    try:
+        await adb.run(import_legacy_process_logs, db, log_store)
+    except Exception as e:
+        logger.error(f"Legacy process log import failed: {e}")
 
     # Restore running processes from DB (mark as crashed if we can't find them)
-    running = db.get_running_projects()
+    running = await adb.get_running_projects()
     for proj in running:
         if proj["pid"]:
             try:
                 os.kill(proj["pid"], 0)  # Check if process exists
             except (OSError, ProcessLookupError):
-                db.update_project(
+                await adb.update_project(
                     proj["project_id"],
                     status="crashed",
                     pid=None,
@@ -5316,7 +6444,11 @@ async def post_shutdown(application: Application) -> None:
     """Run before bot shutdown."""
     logger.info("Shutting down... Stopping all processes.")
     await process_manager.stop_all()
-    db.close()
+    # Commit the log lines still queued before the database closes
+    await adb.run(log_writer.stop)
+    log_store.close()
+    await user_cache.flush_activity()
+    await adb.close()
     logger.info(f"{BOT_NAME} shut down gracefully.")
 
 
@@ -5418,7 +6550,7 @@ class ProcessWatchdog:
     exponential backoff and configurable restart policies.
     """
 
-    def __init__(self, process_mgr: ProcessManager, database: DatabaseManager):
+    def __init__(self, process_mgr: ProcessManager, database: AsyncDatabase):
         self._pm = process_mgr
         self._db = database
         self._restart_backoff: Dict[str, float] = {}
@@ -5444,7 +6576,7 @@ class ProcessWatchdog:
 
     async def _send_alert(self, user_id: int, title: str, message: str, alert_type: str = "warning"):
         """Send alert to user via registered callbacks."""
-        self._db.add_notification(user_id, title, message, alert_type)
+        await self._db.add_notification(user_id, title, message, alert_type)
         for callback in self._alert_callbacks:
             try:
                 await callback(user_id, title, message, alert_type)
@@ -5556,7 +6688,7 @@ class ProcessWatchdog:
     async def monitor_cycle(self):
         """Single monitoring cycle - check all running processes."""
         running = self._pm.get_all_running()
-        all_projects = self._db.get_all_projects()
+        all_projects = await self._db.get_all_projects()
 
         for proj in all_projects:
             project_id = proj["project_id"]
@@ -5569,13 +6701,13 @@ class ProcessWatchdog:
 
                 self._crash_history[project_id].append(time.time())
 
-                self._db.update_project(
+                await self._db.update_project(
                     project_id,
                     status="crashed",
                     pid=None,
                     last_stopped=datetime.now().isoformat(),
                 )
-                self._db.execute(
+                await self._db.execute(
                     "UPDATE projects SET error_count = error_count + 1 WHERE project_id = ?",
                     (project_id,),
                 )
@@ -5587,7 +6719,7 @@ class ProcessWatchdog:
                             f"Watchdog: {proj['project_name']} crash rate exceeded, "
                             f"disabling auto-restart"
                         )
-                        self._db.update_project(project_id, auto_restart=0)
+                        await self._db.update_project(project_id, auto_restart=0)
                         await self._send_alert(
                             proj["user_id"],
                             "⚠️ Auto-Restart Disabled",
@@ -5630,7 +6762,7 @@ class ProcessWatchdog:
                                 "error",
                             )
 
-                        self._db.log_deployment(
+                        await self._db.log_deployment(
                             project_id,
                             proj["user_id"],
                             "watchdog_restart",
@@ -5712,7 +6844,7 @@ class ProcessWatchdog:
 
 
 # ── Global Watchdog Instance ──
-watchdog = ProcessWatchdog(process_manager, db)
+watchdog = ProcessWatchdog(process_manager, adb)
 
 
 # ┌─────────────────────────────────────────────────────────────────────────────┐
@@ -6139,7 +7271,7 @@ async def handle_advanced_deploy_action(
 
     if data.startswith("adv_backup_create_"):
         project_id = data.replace("adv_backup_create_", "")
-        project = db.get_project(project_id)
+        project = await adb.get_project(project_id)
         if not project:
             await query.answer("❌ Project not found!", show_alert=True)
             return
@@ -6162,7 +7294,7 @@ async def handle_advanced_deploy_action(
         )
 
         if success:
-            db.log_file_operation(
+            await adb.log_file_operation(
                 user.id, "backup", str(backup_path), project_id,
                 backup_path.stat().st_size if backup_path else 0, "success",
             )
@@ -6189,7 +7321,7 @@ async def handle_advanced_deploy_action(
 
     elif data.startswith("adv_backup_list_"):
         project_id = data.replace("adv_backup_list_", "")
-        project = db.get_project(project_id)
+        project = await adb.get_project(project_id)
         if not project:
             await query.answer("❌ Project not found!", show_alert=True)
             return
@@ -6282,7 +7414,7 @@ async def handle_advanced_deploy_action(
         parts = data.replace("adv_backup_restore_", "").split(":")
         project_id, idx = parts[0], int(parts[1])
 
-        project = db.get_project(project_id)
+        project = await adb.get_project(project_id)
         backups = backup_manager.list_backups(project_id)
 
         if not project or idx >= len(backups):
@@ -6321,7 +7453,7 @@ async def handle_advanced_deploy_action(
         parts = data.replace("adv_backup_confirmrestore_", "").split(":")
         project_id, idx = parts[0], int(parts[1])
 
-        project = db.get_project(project_id)
+        project = await adb.get_project(project_id)
         backups = backup_manager.list_backups(project_id)
 
         if not project or idx >= len(backups):
@@ -6343,14 +7475,14 @@ async def handle_advanced_deploy_action(
         if success:
             proj_type, main_file = file_manager.detect_project_type(Path(project["directory"]))
             if main_file:
-                db.update_project(project_id, project_type=proj_type, main_file=main_file)
+                await adb.update_project(project_id, project_type=proj_type, main_file=main_file)
 
         update.callback_query.data = f"deploy_select_{project_id}"
         await handle_deploy_action(update, context, f"deploy_select_{project_id}")
 
     elif data.startswith("adv_deps_check_"):
         project_id = data.replace("adv_deps_check_", "")
-        project = db.get_project(project_id)
+        project = await adb.get_project(project_id)
         if not project:
             await query.answer("❌ Project not found!", show_alert=True)
             return
@@ -6406,7 +7538,7 @@ async def handle_advanced_deploy_action(
 
     elif data.startswith("adv_deps_install_"):
         project_id = data.replace("adv_deps_install_", "")
-        project = db.get_project(project_id)
+        project = await adb.get_project(project_id)
         if not project:
             await query.answer("❌ Project not found!", show_alert=True)
             return
@@ -6476,7 +7608,7 @@ async def enhanced_handle_deploy_action(
 
     if data.startswith("deploy_select_"):
         project_id = data.replace("deploy_select_", "")
-        project = db.get_project(project_id)
+        project = await adb.get_project(project_id)
 
         if not project:
             query = update.callback_query
@@ -6616,13 +7748,13 @@ async def enhanced_handle_deploy_action(
 
     elif data.startswith("deploy_toggle_ar_"):
         project_id = data.replace("deploy_toggle_ar_", "")
-        project = db.get_project(project_id)
+        project = await adb.get_project(project_id)
         if not project:
             await update.callback_query.answer("❌ Not found!", show_alert=True)
             return
 
         new_val = 0 if project["auto_restart"] else 1
-        db.update_project(project_id, auto_restart=new_val)
+        await adb.update_project(project_id, auto_restart=new_val)
         status = "enabled" if new_val else "disabled"
         await update.callback_query.answer(
             f"✅ Auto-restart {status}!", show_alert=True
@@ -6707,7 +7839,7 @@ class LiveLogStreamer:
             while True:
                 iteration += 1
                 is_running = process_manager.is_running(project_id)
-                logs = process_manager.get_logs(project_id, lines=20)
+                logs = await process_manager.get_logs(project_id, lines=20)
 
                 status_icon = Emoji.ONLINE if is_running else Emoji.OFFLINE
                 status_text = "ʟɪᴠᴇ" if is_running else "sᴛᴏᴘᴘᴇᴅ"
@@ -6841,7 +7973,7 @@ async def enhanced_handle_log_action(
 
     if data.startswith("log_stream_start_"):
         project_id = data.replace("log_stream_start_", "")
-        project = db.get_project(project_id)
+        project = await adb.get_project(project_id)
         if not project:
             await query.answer("❌ Not found!", show_alert=True)
             return
@@ -6872,14 +8004,14 @@ async def enhanced_handle_log_action(
 
     elif data.startswith("log_view_"):
         project_id = data.replace("log_view_", "")
-        project = db.get_project(project_id)
+        project = await adb.get_project(project_id)
 
         if not project:
             await query.answer("❌ Not found!", show_alert=True)
             return
 
         is_running = process_manager.is_running(project_id)
-        logs = process_manager.get_logs(project_id, lines=30)
+        logs = await process_manager.get_logs(project_id, lines=30)
 
         status_icon = Emoji.ONLINE if is_running else Emoji.OFFLINE
         status_text = Fonts.small_caps("live") if is_running else Fonts.small_caps("history")
@@ -7067,7 +8199,7 @@ async def terminal_command(
         return
 
     project_id = args[0]
-    project = db.get_project(project_id)
+    project = await adb.get_project(project_id)
     if not project:
         await update.message.reply_text(
             f"{Emoji.ERROR} {Fonts.small_caps('project not found!')}"
@@ -7243,9 +8375,9 @@ class MetricsGraph:
         return result
 
     @classmethod
-    def generate_system_report_graph(cls) -> str:
+    async def generate_system_report_graph(cls) -> str:
         """Generate graphs from stored system stats."""
-        stats = db.fetchall(
+        stats = await adb.fetchall(
             "SELECT * FROM system_stats ORDER BY created_at DESC LIMIT 60"
         )
 
@@ -7302,8 +8434,8 @@ async def enhanced_callback_router(
 
     # ── Main Menu ──
     if data in ("menu_main", "menu_refresh"):
-        text = menu.get_main_menu_text(user.first_name, user.id)
-        keyboard = menu.get_main_menu_keyboard(user.id)
+        text = await menu.get_main_menu_text(user.first_name, user.id)
+        keyboard = await menu.get_main_menu_keyboard(user.id)
         try:
             await query.edit_message_text(text, reply_markup=keyboard)
         except BadRequest:
@@ -7327,7 +8459,7 @@ async def enhanced_callback_router(
 
     # ── Metrics Graph ──
     elif data == "menu_metrics":
-        report = MetricsGraph.generate_system_report_graph()
+        report = await MetricsGraph.generate_system_report_graph()
         keyboard = menu.get_back_and_refresh("menu_health", "menu_metrics")
         try:
             await query.edit_message_text(report, reply_markup=keyboard)
@@ -7814,15 +8946,10 @@ def rate_limited_authorized(action_type: str = "messages"):
                     await update.message.reply_text(rate_msg)
                 return
 
-            # Then auth check
-            db.upsert_user(
-                user_id=user.id,
-                username=user.username,
-                first_name=user.first_name,
-                last_name=user.last_name,
-            )
+            # Then auth check (cached)
+            is_authorized, is_banned = await user_cache.authorize(user)
 
-            if not db.is_user_authorized(user.id):
+            if not is_authorized:
                 text = (
                     f"{Emoji.LOCK} {Fonts.small_caps('access denied')}\n\n"
                     f"{UI.DIVIDER_THIN}\n\n"
@@ -7838,8 +8965,7 @@ def rate_limited_authorized(action_type: str = "messages"):
                     await update.message.reply_text(text)
                 return
 
-            user_data = db.get_user(user.id)
-            if user_data and user_data["is_banned"]:
+            if is_banned:
                 if update.callback_query:
                     await update.callback_query.answer(
                         "⛔ You are banned!", show_alert=True
@@ -7902,11 +9028,11 @@ class SearchEngine:
         return 0.0
 
     @classmethod
-    def search_projects(
+    async def search_projects(
         cls, user_id: int, query: str, limit: int = 10
     ) -> List[Dict[str, Any]]:
         """Search projects by name, type, or ID."""
-        projects = db.get_user_projects(user_id)
+        projects = await adb.get_user_projects(user_id)
         results = []
 
         for proj in projects:
@@ -7975,35 +9101,28 @@ class SearchEngine:
         return results[:limit]
 
     @classmethod
-    def search_logs(
+    async def search_logs(
         cls, project_id: str, query: str, limit: int = 30
     ) -> List[Dict[str, Any]]:
-        """Search through process logs."""
-        logs = db.get_process_logs(project_id, limit=500)
-        results = []
-
-        query_lower = query.lower()
-
-        for log in logs:
-            content = log["content"]
-            if query_lower in content.lower():
-                results.append({
-                    "content": content,
-                    "log_type": log["log_type"],
-                    "created_at": log["created_at"],
-                    "score": 1.0 if query_lower in content.lower() else 0.5,
-                })
-
-        results.sort(key=lambda x: x["score"], reverse=True)
-        return results[:limit]
+        """Search through process logs, newest first."""
+        matches = await adb.run(log_store.search, project_id, query, limit)
+        return [
+            {
+                "content": log["content"],
+                "log_type": log["log_type"],
+                "created_at": log["created_at"],
+                "score": 1.0,
+            }
+            for log in matches
+        ]
 
     @classmethod
-    def global_search(
+    async def global_search(
         cls, user_id: int, query: str
     ) -> Dict[str, List[Dict[str, Any]]]:
         """Perform a global search across all categories."""
         return {
-            "projects": cls.search_projects(user_id, query, limit=5),
+            "projects": await cls.search_projects(user_id, query, limit=5),
             "files": [],  # Requires project context
             "logs": [],  # Requires project context
         }
@@ -8038,7 +9157,7 @@ async def search_command(
     query = " ".join(args)
     user = update.effective_user
 
-    results = search_engine.search_projects(user.id, query)
+    results = await search_engine.search_projects(user.id, query)
 
     text = (
         f"{Emoji.SEARCH} {Fonts.bold('SEARCH RESULTS')} {Emoji.SEARCH}\n"
@@ -8107,7 +9226,7 @@ async def searchfile_command(
     project_id = args[0]
     query = " ".join(args[1:])
 
-    project = db.get_project(project_id)
+    project = await adb.get_project(project_id)
     if not project:
         await update.message.reply_text(
             f"{Emoji.ERROR} {Fonts.small_caps('project not found!')}"
@@ -8173,14 +9292,14 @@ async def searchlog_command(
     project_id = args[0]
     query = " ".join(args[1:])
 
-    project = db.get_project(project_id)
+    project = await adb.get_project(project_id)
     if not project:
         await update.message.reply_text(
             f"{Emoji.ERROR} {Fonts.small_caps('project not found!')}"
         )
         return
 
-    results = search_engine.search_logs(project_id, query)
+    results = await search_engine.search_logs(project_id, query)
 
     text = (
         f"{Emoji.SEARCH} {Fonts.bold('LOG SEARCH')} {Emoji.SEARCH}\n"
@@ -8236,12 +9355,12 @@ class AnalyticsEngine:
     """
 
     @staticmethod
-    def get_deployment_analytics(
+    async def get_deployment_analytics(
         user_id: int = None, days: int = 7
     ) -> Dict[str, Any]:
         """Get deployment analytics."""
         if user_id:
-            logs = db.fetchall(
+            logs = await adb.fetchall(
                 """
                 SELECT action, status, COUNT(*) as cnt,
                        AVG(duration) as avg_duration,
@@ -8254,7 +9373,7 @@ class AnalyticsEngine:
                 (user_id, f"-{days} days"),
             )
         else:
-            logs = db.fetchall(
+            logs = await adb.fetchall(
                 """
                 SELECT action, status, COUNT(*) as cnt,
                        AVG(duration) as avg_duration,
@@ -8294,10 +9413,10 @@ class AnalyticsEngine:
         }
 
     @staticmethod
-    def get_project_rankings(user_id: int = None) -> List[Dict[str, Any]]:
+    async def get_project_rankings(user_id: int = None) -> List[Dict[str, Any]]:
         """Get project rankings by various metrics."""
         if user_id:
-            projects = db.fetchall(
+            projects = await adb.fetchall(
                 """
                 SELECT project_name, project_type, deploy_count,
                        total_runtime, error_count, restart_count, status
@@ -8308,7 +9427,7 @@ class AnalyticsEngine:
                 (user_id,),
             )
         else:
-            projects = db.fetchall(
+            projects = await adb.fetchall(
                 """
                 SELECT project_name, project_type, deploy_count,
                        total_runtime, error_count, restart_count, status, user_id
@@ -8341,9 +9460,9 @@ class AnalyticsEngine:
         return rankings
 
     @staticmethod
-    def get_system_performance_summary(hours: int = 24) -> Dict[str, Any]:
+    async def get_system_performance_summary(hours: int = 24) -> Dict[str, Any]:
         """Get system performance summary over time."""
-        stats = db.fetchall(
+        stats = await adb.fetchall(
             """
             SELECT
                 AVG(cpu_percent) as avg_cpu,
@@ -8389,12 +9508,12 @@ class AnalyticsEngine:
         }
 
     @staticmethod
-    def get_file_operation_summary(
+    async def get_file_operation_summary(
         user_id: int = None, days: int = 7
     ) -> Dict[str, Any]:
         """Get file operation analytics."""
         if user_id:
-            ops = db.fetchall(
+            ops = await adb.fetchall(
                 """
                 SELECT operation, status, COUNT(*) as cnt,
                        SUM(file_size) as total_size
@@ -8405,7 +9524,7 @@ class AnalyticsEngine:
                 (user_id, f"-{days} days"),
             )
         else:
-            ops = db.fetchall(
+            ops = await adb.fetchall(
                 """
                 SELECT operation, status, COUNT(*) as cnt,
                        SUM(file_size) as total_size
@@ -8423,9 +9542,9 @@ class AnalyticsEngine:
         }
 
     @staticmethod
-    def get_uptime_report() -> Dict[str, Any]:
+    async def get_uptime_report() -> Dict[str, Any]:
         """Get detailed uptime report for all projects."""
-        projects = db.get_all_projects()
+        projects = await adb.get_all_projects()
         total_runtime = sum(p["total_runtime"] for p in projects)
         total_deploys = sum(p["deploy_count"] for p in projects)
         total_errors = sum(p["error_count"] for p in projects)
@@ -8467,19 +9586,19 @@ async def analytics_command(
     user = update.effective_user
 
     # Deployment analytics
-    deploy_stats = analytics.get_deployment_analytics(user.id, days=7)
+    deploy_stats = await analytics.get_deployment_analytics(user.id, days=7)
 
     # Project rankings
-    rankings = analytics.get_project_rankings(user.id)
+    rankings = await analytics.get_project_rankings(user.id)
 
     # System performance
-    sys_perf = analytics.get_system_performance_summary(hours=24)
+    sys_perf = await analytics.get_system_performance_summary(hours=24)
 
     # File operations
-    file_stats = analytics.get_file_operation_summary(user.id, days=7)
+    file_stats = await analytics.get_file_operation_summary(user.id, days=7)
 
     # Uptime report
-    uptime = analytics.get_uptime_report()
+    uptime = await analytics.get_uptime_report()
 
     text = (
         f"{Emoji.STATS} {Fonts.bold('ANALYTICS DASHBOARD')} {Emoji.STATS}\n"
@@ -8603,7 +9722,7 @@ async def quick_deploy_command(
     query = " ".join(args)
     user = update.effective_user
 
-    results = search_engine.search_projects(user.id, query, limit=1)
+    results = await search_engine.search_projects(user.id, query, limit=1)
     if not results:
         await update.message.reply_text(
             f"{Emoji.ERROR} {Fonts.small_caps('project not found')}: '{query}'"
@@ -8639,7 +9758,7 @@ async def quick_deploy_command(
         project["directory"], env_vars if env_vars else None,
     )
 
-    db.log_deployment(
+    await adb.log_deployment(
         project_id, user.id, "quick_deploy",
         "success" if success else "failed", msg,
     )
@@ -8687,7 +9806,7 @@ async def quick_stop_command(
     query = " ".join(args)
     user = update.effective_user
 
-    results = search_engine.search_projects(user.id, query, limit=1)
+    results = await search_engine.search_projects(user.id, query, limit=1)
     if not results:
         await update.message.reply_text(
             f"{Emoji.ERROR} {Fonts.small_caps('project not found')}: '{query}'"
@@ -8705,7 +9824,7 @@ async def quick_stop_command(
         return
 
     success, msg = await process_manager.stop_process(project_id)
-    db.log_deployment(
+    await adb.log_deployment(
         project_id, user.id, "quick_stop",
         "success" if success else "failed", msg,
     )
@@ -8734,7 +9853,7 @@ async def quick_restart_command(
     query = " ".join(args)
     user = update.effective_user
 
-    results = search_engine.search_projects(user.id, query, limit=1)
+    results = await search_engine.search_projects(user.id, query, limit=1)
     if not results:
         await update.message.reply_text(
             f"{Emoji.ERROR} {Fonts.small_caps('project not found')}: '{query}'"
@@ -8755,7 +9874,7 @@ async def quick_restart_command(
         project["directory"], env_vars if env_vars else None,
     )
 
-    db.log_deployment(
+    await adb.log_deployment(
         project_id, user.id, "quick_restart",
         "success" if success else "failed", msg,
     )
@@ -8784,7 +9903,7 @@ async def quick_logs_command(
     query = " ".join(args)
     user = update.effective_user
 
-    results = search_engine.search_projects(user.id, query, limit=1)
+    results = await search_engine.search_projects(user.id, query, limit=1)
     if not results:
         await update.message.reply_text(
             f"{Emoji.ERROR} {Fonts.small_caps('project not found')}: '{query}'"
@@ -8794,7 +9913,7 @@ async def quick_logs_command(
     project = results[0]["project"]
     project_id = project["project_id"]
 
-    logs = process_manager.get_logs(project_id, lines=25)
+    logs = await process_manager.get_logs(project_id, lines=25)
     is_running = process_manager.is_running(project_id)
 
     log_text = "\n".join(logs[-20:]) if logs else "No logs available."
@@ -8846,7 +9965,7 @@ async def delenv_command(
     project_id = args[0]
     key = args[1].strip()
 
-    project = db.get_project(project_id)
+    project = await adb.get_project(project_id)
     if not project:
         await update.message.reply_text(
             f"{Emoji.ERROR} {Fonts.small_caps('project not found!')}"
@@ -8856,7 +9975,7 @@ async def delenv_command(
     env_vars = json.loads(project["env_vars"] or "{}")
     if key in env_vars:
         del env_vars[key]
-        db.update_project(project_id, env_vars=json.dumps(env_vars))
+        await adb.update_project(project_id, env_vars=json.dumps(env_vars))
         await update.message.reply_text(
             f"{Emoji.SUCCESS} {Fonts.small_caps('env var removed')}: {Fonts.mono(key)}\n"
             f"{UI.BULLET} {Fonts.small_caps('restart to apply changes')}"
@@ -8880,7 +9999,7 @@ async def listenv_command(
         return
 
     project_id = args[0]
-    project = db.get_project(project_id)
+    project = await adb.get_project(project_id)
     if not project:
         await update.message.reply_text(
             f"{Emoji.ERROR} {Fonts.small_caps('project not found!')}"
@@ -8929,7 +10048,7 @@ async def rename_command(
     project_id = args[0]
     new_name = " ".join(args[1:])
 
-    project = db.get_project(project_id)
+    project = await adb.get_project(project_id)
     if not project:
         await update.message.reply_text(
             f"{Emoji.ERROR} {Fonts.small_caps('project not found!')}"
@@ -8945,7 +10064,7 @@ async def rename_command(
         return
 
     old_name = project["project_name"]
-    db.update_project(project_id, project_name=safe_name)
+    await adb.update_project(project_id, project_name=safe_name)
 
     await update.message.reply_text(
         f"{Emoji.SUCCESS} {Fonts.small_caps('project renamed')}\n"
@@ -8970,14 +10089,14 @@ async def describe_command(
     project_id = args[0]
     description = " ".join(args[1:])[:500]
 
-    project = db.get_project(project_id)
+    project = await adb.get_project(project_id)
     if not project:
         await update.message.reply_text(
             f"{Emoji.ERROR} {Fonts.small_caps('project not found!')}"
         )
         return
 
-    db.update_project(project_id, description=description)
+    await adb.update_project(project_id, description=description)
 
     await update.message.reply_text(
         f"{Emoji.SUCCESS} {Fonts.small_caps('description updated')}\n"
@@ -9003,7 +10122,7 @@ async def broadcast_command(
         return
 
     message_text = " ".join(args)
-    users = db.get_all_users()
+    users = await adb.get_all_users()
 
     broadcast_text = (
         f"{Emoji.BELL} {Fonts.bold('BROADCAST')} {Emoji.BELL}\n"
@@ -9059,7 +10178,7 @@ async def unban_command(
 
     try:
         target_id = int(args[0])
-        db.unban_user(target_id)
+        await adb.unban_user(target_id)
         ALLOWED_USERS.add(target_id)
         rate_limiter.reset_user(target_id)
         await update.message.reply_text(
@@ -9092,7 +10211,7 @@ async def removeuser_command(
             )
             return
 
-        db.set_admin(target_id, False)
+        await adb.set_admin(target_id, False)
         ALLOWED_USERS.discard(target_id)
         await update.message.reply_text(
             f"{Emoji.SUCCESS} {Fonts.small_caps('user')} {target_id} "
@@ -9121,7 +10240,7 @@ async def export_config_command(
         return
 
     project_id = args[0]
-    project = db.get_project(project_id)
+    project = await adb.get_project(project_id)
     if not project:
         await update.message.reply_text(
             f"{Emoji.ERROR} {Fonts.small_caps('project not found!')}"